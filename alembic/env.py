@@ -20,17 +20,27 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 # 1. Importa a Base (do models.py)
-from models.base import BaseModel 
+from src.models.base import BaseModel
+from src.configs.settings import settings
 
 # 2. Importa TODOS os arquivos de modelo para popular o target_metadata
 #    (Mesmo que eles não sejam usados diretamente aqui, eles precisam ser carregados)
 from src.models.atleta import AtletaModel
 from src.models.categorias import CategoriaModel
 from src.models.centro_treinamento import CentroTreinamentoModel # Adicione outros modelos se houver
+from src.models.medida import MedidaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+from src.models.atleta_chave import AtletaChaveModel
+from src.models.atleta_registro import AtletaRegistroModel
+from src.models.outbox import OutboxModel
 
 # Carrega o objeto de configuração principal do Alembic, obtendo as definições do alembic.ini
 config = context.config
 
+# Usa o mesmo banco da aplicação (variável DB_URL), quando definida
+if os.environ.get("DB_URL"):
+    config.set_main_option("sqlalchemy.url", settings.DB_URL)
+
 # Se existir um arquivo de configuração de logging (geralmente alembic.ini),
 # inicializa o sistema de logs do Alembic.
 if config.config_file_name is not None:
@@ -56,6 +66,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,      # Define o metadata do ORM
         literal_binds=True,                   # Insere valores diretamente no SQL
         dialect_opts={"paramstyle": "named"}, # Define o estilo de parâmetros
+        transaction_per_migration=True,       # Uma transação por revisão (ver modo online)
     )
 
     # Inicia uma transação e executa as migrações (gera o SQL de alteração de schema)
@@ -69,8 +80,21 @@ def run_migrations_offline() -> None:
 def do_run_migrations(connection: Connection) -> None:
     """Executa as migrações usando uma conexão existente (sincronamente dentro do async)."""
 
-    # Configura o contexto do Alembic com a conexão e o metadata do ORM
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # Nenhum comando da migração fica mais que MIGRACAO_LOCK_TIMEOUT na fila de um lock:
+    # melhor falhar rápido do que bloquear todas as escritas que chegarem depois dele.
+    # (ver src/core/migracoes.py para DDL com novas tentativas e índices CONCURRENTLY)
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET lock_timeout = '{settings.MIGRACAO_LOCK_TIMEOUT}'")
+        connection.commit()
+
+    # Configura o contexto do Alembic com a conexão e o metadata do ORM.
+    # transaction_per_migration: cada revisão tem a própria transação, o que permite
+    # blocos fora de transação (autocommit_block) como CREATE INDEX CONCURRENTLY.
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
 
     # Inicia a transação e aplica as migrações
     with context.begin_transaction():
@@ -0,0 +1,29 @@
+"""eventos_seq
+
+Revision ID: 4c1e7a9d2b10
+Revises: 38917fd59ea3
+Create Date: 2026-10-19 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e7a9d2b10'
+down_revision: Union[str, Sequence[str], None] = '38917fd59ea3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sequence que numera os eventos do feed SSE (pg_notify), compartilhada por todos os processos
+    op.execute(sa.schema.CreateSequence(sa.Sequence('eventos_id_seq')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('eventos_id_seq')))
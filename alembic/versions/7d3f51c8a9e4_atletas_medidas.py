@@ -0,0 +1,47 @@
+"""atletas_medidas
+
+Revision ID: 7d3f51c8a9e4
+Revises: 4c1e7a9d2b10
+Create Date: 2026-10-19 10:41:07.532981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f51c8a9e4'
+down_revision: Union[str, Sequence[str], None] = '4c1e7a9d2b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('atletas_medidas',
+    sa.Column('pk_id', sa.BigInteger(), nullable=False),
+    sa.Column('atleta_id', sa.Integer(), nullable=False),
+    sa.Column('peso', sa.Float(), nullable=True),
+    sa.Column('altura', sa.Float(), nullable=True),
+    sa.Column('medido_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['atleta_id'], ['atletas.pk_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+    op.create_index('ix_atletas_medidas_atleta_medido_em', 'atletas_medidas', ['atleta_id', 'medido_em'], unique=False)
+    op.create_index('ix_atletas_medidas_medido_em_brin', 'atletas_medidas', ['medido_em'], unique=False, postgresql_using='brin')
+
+    # Ponto inicial do histórico: as medidas atuais de cada atleta
+    op.execute(
+        "INSERT INTO atletas_medidas (id, atleta_id, peso, altura, medido_em) "
+        "SELECT gen_random_uuid(), pk_id, peso, altura, created_at FROM atletas"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_atletas_medidas_medido_em_brin', table_name='atletas_medidas', postgresql_using='brin')
+    op.drop_index('ix_atletas_medidas_atleta_medido_em', table_name='atletas_medidas')
+    op.drop_table('atletas_medidas')
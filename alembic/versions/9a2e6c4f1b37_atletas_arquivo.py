@@ -0,0 +1,77 @@
+"""atletas_arquivo
+
+Revision ID: 9a2e6c4f1b37
+Revises: 7d3f51c8a9e4
+Create Date: 2026-10-19 14:05:22.184310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.core.migracoes import (
+    backfill_em_lotes, criar_indice_concorrente, ddl_com_lock_timeout, remover_indice_concorrente
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a2e6c4f1b37'
+down_revision: Union[str, Sequence[str], None] = '7d3f51c8a9e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Coluna com DEFAULT constante: no PostgreSQL 11+ não reescreve a tabela
+    ddl_com_lock_timeout(
+        "ALTER TABLE atletas ADD COLUMN ultima_atividade_em TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"
+    )
+    # Atividade real: a medida mais recente do atleta (ou o cadastro)
+    backfill_em_lotes(
+        "atletas",
+        "ultima_atividade_em = GREATEST(created_at, COALESCE("
+        "(SELECT max(m.medido_em) FROM atletas_medidas m WHERE m.atleta_id = atletas.pk_id), created_at))",
+    )
+    criar_indice_concorrente('ix_atletas_ultima_atividade_em', 'atletas', ['ultima_atividade_em'])
+
+    op.create_table('atletas_arquivo',
+    sa.Column('pk_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('cpf', sa.String(length=11), nullable=False),
+    sa.Column('idade', sa.Integer(), nullable=False),
+    sa.Column('peso', sa.Float(), nullable=False),
+    sa.Column('altura', sa.Float(), nullable=False),
+    sa.Column('sexo', sa.String(length=1), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ultima_atividade_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('arquivado_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('centro_treinamento_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['categoria_id'], ['categorias.pk_id'], ),
+    sa.ForeignKeyConstraint(['centro_treinamento_id'], ['centros_treinamento.pk_id'], ),
+    sa.PrimaryKeyConstraint('pk_id'),
+    sa.UniqueConstraint('cpf')
+    )
+
+    # O histórico passa a apontar para atletas quentes ou arquivados: sem FOREIGN KEY
+    ddl_com_lock_timeout("ALTER TABLE atletas_medidas DROP CONSTRAINT IF EXISTS atletas_medidas_atleta_id_fkey")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Devolve os arquivados para a tabela quente antes de restaurar a FOREIGN KEY
+    op.execute(
+        "INSERT INTO atletas (pk_id, id, nome, cpf, idade, peso, altura, sexo, created_at, "
+        "categoria_id, centro_treinamento_id) "
+        "SELECT pk_id, id, nome, cpf, idade, peso, altura, sexo, created_at, "
+        "categoria_id, centro_treinamento_id FROM atletas_arquivo"
+    )
+    op.create_foreign_key(
+        'atletas_medidas_atleta_id_fkey', 'atletas_medidas', 'atletas', ['atleta_id'], ['pk_id'], ondelete='CASCADE'
+    )
+    op.drop_table('atletas_arquivo')
+    remover_indice_concorrente('ix_atletas_ultima_atividade_em', 'atletas')
+    op.drop_column('atletas', 'ultima_atividade_em')
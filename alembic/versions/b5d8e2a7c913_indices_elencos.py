@@ -0,0 +1,30 @@
+"""indices_elencos
+
+Revision ID: b5d8e2a7c913
+Revises: 9a2e6c4f1b37
+Create Date: 2026-10-19 16:12:48.603517
+
+"""
+from typing import Sequence, Union
+
+from src.core.migracoes import criar_indice_concorrente, remover_indice_concorrente
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d8e2a7c913'
+down_revision: Union[str, Sequence[str], None] = '9a2e6c4f1b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Elencos embutidos (?incluir=atletas): atletas de cada pai em ordem de cadastro
+    criar_indice_concorrente('ix_atletas_categoria_id_pk_id', 'atletas', ['categoria_id', 'pk_id'])
+    criar_indice_concorrente('ix_atletas_centro_treinamento_id_pk_id', 'atletas', ['centro_treinamento_id', 'pk_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    remover_indice_concorrente('ix_atletas_centro_treinamento_id_pk_id', 'atletas')
+    remover_indice_concorrente('ix_atletas_categoria_id_pk_id', 'atletas')
@@ -0,0 +1,98 @@
+"""cpf_normalizado
+
+Revision ID: c7e1f4a92d58
+Revises: b5d8e2a7c913
+Create Date: 2026-10-19 17:40:11.927304
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import text
+
+from src.core.migracoes import backfill_em_lotes, ddl_com_lock_timeout, validar_constraint
+from src.schemas.atleta import digitos_verificadores_cpf_sql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1f4a92d58'
+down_revision: Union[str, Sequence[str], None] = 'b5d8e2a7c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABELAS = ("atletas", "atletas_arquivo")
+# Só remove a pontuação: valores sem exatamente 11 dígitos não são completados nem
+# cortados (viraria um CPF com cara de válido, mas errado) - ver _verificar_digitos
+_NORMALIZADO = "regexp_replace(cpf, '[^0-9]', '', 'g')"
+_SO_DIGITOS = "cpf ~ '^[0-9]{11}$'"
+
+
+def _verificar_digitos() -> None:
+    """
+    CPFs sem 11 dígitos (sem a pontuação) ou com dígitos verificadores errados precisam ser
+    corrigidos à mão antes: a API confere os dígitos, e não os encontraria nem aceitaria mais.
+    """
+    if context.is_offline_mode():
+        return
+    # CASE: os dígitos verificadores só são calculados para quem tem 11 dígitos
+    invalidos = op.get_bind().execute(text(
+        f"SELECT tabela, pk_id, cpf, problema FROM ("
+        f"SELECT tabela, pk_id, cpf, CASE "
+        f"WHEN length(normalizado) <> 11 THEN 'sem 11 dígitos' "
+        f"WHEN normalizado = repeat(substr(normalizado, 1, 1), 11) THEN 'dígitos repetidos' "
+        f"WHEN substr(normalizado, 10, 2) <> {digitos_verificadores_cpf_sql('normalizado')} "
+        f"THEN 'dígitos verificadores errados' END AS problema FROM ("
+        f"SELECT 'atletas' AS tabela, pk_id, cpf, {_NORMALIZADO} AS normalizado FROM atletas "
+        f"UNION ALL SELECT 'atletas_arquivo', pk_id, cpf, {_NORMALIZADO} FROM atletas_arquivo) todos"
+        f") verificados WHERE problema IS NOT NULL ORDER BY tabela, pk_id LIMIT 50"
+    )).all()
+    if invalidos:
+        lista = "; ".join(
+            f"{tabela}.pk_id={pk_id}: {cpf!r} ({problema})" for tabela, pk_id, cpf, problema in invalidos
+        )
+        raise RuntimeError(f"CPFs inválidos (corrija antes de migrar; até 50 listados): {lista}")
+
+
+def _verificar_duplicados() -> None:
+    """CPFs que viram o mesmo valor ao normalizar precisam ser resolvidos à mão antes."""
+    if context.is_offline_mode():
+        return
+    duplicados = op.get_bind().execute(text(
+        f"SELECT {_NORMALIZADO} AS normalizado, array_agg(cpf) AS variantes "
+        f"FROM (SELECT cpf FROM atletas UNION ALL SELECT cpf FROM atletas_arquivo) todos "
+        f"GROUP BY 1 HAVING count(*) > 1 LIMIT 20"
+    )).all()
+    if duplicados:
+        lista = "; ".join(f"{normalizado}: {', '.join(variantes)}" for normalizado, variantes in duplicados)
+        raise RuntimeError(f"CPFs duplicados após a normalização (resolva antes de migrar): {lista}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        # SQLite (ambiente local): a aplicação já grava apenas CPFs normalizados
+        return
+    _verificar_digitos()
+    _verificar_duplicados()
+    # Rode depois do deploy da versão que normaliza o CPF na entrada: a partir daí só
+    # os registros antigos podem estar fora do formato
+    for tabela in _TABELAS:
+        backfill_em_lotes(tabela, f"cpf = {_NORMALIZADO}", where=f"NOT ({_SO_DIGITOS})")
+        # NOT VALID: o ALTER não varre a tabela segurando o lock forte
+        ddl_com_lock_timeout(
+            f"ALTER TABLE {tabela} ADD CONSTRAINT ck_{tabela}_cpf_digitos CHECK ({_SO_DIGITOS}) NOT VALID"
+        )
+        # Commita o ALTER (libera o ACCESS EXCLUSIVE) e valida em outra transação, que só pede
+        # SHARE UPDATE EXCLUSIVE: leituras e escritas seguem durante a varredura
+        validar_constraint(tabela, f"ck_{tabela}_cpf_digitos")
+    # A UNIQUE existente (atletas_cpf_key / atletas_arquivo_cpf_key) passa a valer sobre o
+    # CPF normalizado: variantes formatadas do mesmo CPF não entram mais
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    # Os CPFs continuam normalizados (não há como recuperar a formatação original)
+    for tabela in reversed(_TABELAS):
+        ddl_com_lock_timeout(f"ALTER TABLE {tabela} DROP CONSTRAINT IF EXISTS ck_{tabela}_cpf_digitos")
@@ -0,0 +1,48 @@
+"""outbox
+
+Revision ID: d2a9f6b81c34
+Revises: c7e1f4a92d58
+Create Date: 2026-10-19 19:02:37.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a9f6b81c34'
+down_revision: Union[str, Sequence[str], None] = 'c7e1f4a92d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox',
+    sa.Column('pk_id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('agregado', sa.String(length=30), nullable=False),
+    sa.Column('agregado_id', sa.String(length=36), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('dados', sa.JSON(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('proxima_tentativa_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ultimo_erro', sa.Text(), nullable=True),
+    sa.Column('falhou_em', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+    op.create_index('ix_outbox_agregado_pk_id', 'outbox', ['agregado', 'agregado_id', 'pk_id'], unique=False)
+    op.create_index(
+        'ix_outbox_pendentes', 'outbox', ['proxima_tentativa_em'], unique=False,
+        postgresql_where=sa.text('falhou_em IS NULL'), sqlite_where=sa.text('falhou_em IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_pendentes', table_name='outbox')
+    op.drop_index('ix_outbox_agregado_pk_id', table_name='outbox')
+    op.drop_table('outbox')
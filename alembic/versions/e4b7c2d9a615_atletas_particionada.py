@@ -0,0 +1,236 @@
+"""atletas_particionada
+
+Revision ID: e4b7c2d9a615
+Revises: d2a9f6b81c34
+Create Date: 2026-10-19 21:12:48.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.core.migracoes import copiar_em_lotes, ddl_com_lock_timeout
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c2d9a615'
+down_revision: Union[str, Sequence[str], None] = 'd2a9f6b81c34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições por HASH(centro_treinamento_id). Trocar depois exige reconstruir a tabela
+_PARTICOES = 16
+_CHAVES = "pk_id, id, cpf, centro_treinamento_id"
+
+# Unicidade global de id/cpf: cada escrita em `atletas` reflete na tabela de chaves.
+# ON CONFLICT (pk_id): a chave pode ter sido reservada antes (cadastro em lote, cópia
+# inicial); CPF ou id repetidos continuam violando os UNIQUE de atletas_chaves.
+_FUNCAO_CHAVES = """
+CREATE OR REPLACE FUNCTION atletas_manter_chaves() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM atletas_chaves WHERE pk_id = OLD.pk_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO atletas_chaves (pk_id, id, cpf, centro_treinamento_id)
+        VALUES (NEW.pk_id, NEW.id, NEW.cpf, NEW.centro_treinamento_id)
+        ON CONFLICT (pk_id) DO NOTHING;
+    END IF;
+    RETURN NULL;
+END $$
+"""
+
+# Durante a cópia, as escritas na tabela atual são repetidas na nova (TG_ARGV[0])
+_FUNCAO_ENCAMINHAR = """
+CREATE OR REPLACE FUNCTION atletas_encaminhar() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        EXECUTE format('DELETE FROM %I WHERE pk_id = $1 AND centro_treinamento_id = $2', TG_ARGV[0])
+            USING OLD.pk_id, OLD.centro_treinamento_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        EXECUTE format('INSERT INTO %I SELECT ($1).*', TG_ARGV[0]) USING NEW;
+    END IF;
+    RETURN NULL;
+END $$
+"""
+
+
+# Demais índices da tabela atual (criados fora destas migrações ou por outras que vierem
+# antes desta) recriados na nova: o LIKE não os copia. O nome definitivo fica no
+# comentário até a troca. Em uma tabela particionada, UNIQUE sem a chave de partição não
+# é aceito: viram índices comuns (a unicidade de id/cpf é da tabela de chaves).
+_COPIAR_INDICES = """
+DO $$
+DECLARE
+    indice record;
+BEGIN
+    FOR indice IN
+        SELECT c.oid, c.relname, i.indisunique, pg_get_indexdef(i.indexrelid) AS definicao
+        FROM pg_index AS i JOIN pg_class AS c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'atletas'::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint AS r WHERE r.conindid = i.indexrelid)
+          AND c.relname <> ALL (ARRAY[{ignorados}])
+    LOOP
+        EXECUTE format(
+            'CREATE %sINDEX %I ON %I USING %s',
+            CASE WHEN indice.indisunique THEN '{unico}' ELSE '' END,
+            'ix_copia_' || indice.oid || '_{nome}', '{nome}',
+            substring(indice.definicao FROM ' USING (.*)$')
+        );
+        EXECUTE format('COMMENT ON INDEX %I IS %L', 'ix_copia_' || indice.oid || '_{nome}', indice.relname);
+    END LOOP;
+END $$
+"""
+
+# Na troca, as cópias recebem o nome que tinham na tabela antiga (livre após o DROP)
+_RENOMEAR_INDICES = """
+DO $$
+DECLARE
+    indice record;
+BEGIN
+    FOR indice IN
+        SELECT c.relname, obj_description(c.oid, 'pg_class') AS original
+        FROM pg_index AS i JOIN pg_class AS c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'atletas'::regclass AND c.relname LIKE 'ix\\_copia\\_%'
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', indice.relname, indice.original);
+        EXECUTE format('COMMENT ON INDEX %I IS NULL', indice.original);
+    END LOOP;
+END $$
+"""
+
+
+def _triggers_chaves(tabela: str) -> list[str]:
+    # UPDATE só das colunas das chaves: as escritas frequentes (peso, ultima_atividade_em) não tocam nelas
+    return [
+        f"CREATE TRIGGER atletas_chaves_escrita AFTER INSERT OR DELETE ON {tabela} "
+        f"FOR EACH ROW EXECUTE FUNCTION atletas_manter_chaves()",
+        f"CREATE TRIGGER atletas_chaves_alteracao AFTER UPDATE OF id, cpf, centro_treinamento_id ON {tabela} "
+        f"FOR EACH ROW EXECUTE FUNCTION atletas_manter_chaves()",
+    ]
+
+
+def _nova_tabela(nome: str, particionada: bool) -> None:
+    """Cria `nome` com as colunas (na mesma ordem), defaults, CHECKs e índices de `atletas`."""
+    particao = " PARTITION BY HASH (centro_treinamento_id)" if particionada else ""
+    chave = "pk_id, centro_treinamento_id" if particionada else "pk_id"
+    op.execute(f"CREATE TABLE {nome} (LIKE atletas INCLUDING DEFAULTS INCLUDING CONSTRAINTS){particao}")
+    op.execute(f"ALTER TABLE {nome} ADD CONSTRAINT {nome}_pkey PRIMARY KEY ({chave})")
+    if not particionada:
+        op.execute(f"ALTER TABLE {nome} ADD CONSTRAINT {nome}_cpf_key UNIQUE (cpf)")
+    # FOREIGN KEYs já com o nome definitivo (o nome de constraint só precisa ser único na tabela)
+    op.execute(
+        f"ALTER TABLE {nome} ADD CONSTRAINT atletas_categoria_id_fkey "
+        f"FOREIGN KEY (categoria_id) REFERENCES categorias (pk_id)"
+    )
+    op.execute(
+        f"ALTER TABLE {nome} ADD CONSTRAINT atletas_centro_treinamento_id_fkey "
+        f"FOREIGN KEY (centro_treinamento_id) REFERENCES centros_treinamento (pk_id)"
+    )
+    if particionada:
+        for resto in range(_PARTICOES):
+            op.execute(
+                f"CREATE TABLE atletas_p{resto:02d} PARTITION OF {nome} "
+                f"FOR VALUES WITH (MODULUS {_PARTICOES}, REMAINDER {resto})"
+            )
+    # Índices criados com a tabela vazia (instantâneo); a cópia os preenche.
+    # Em uma tabela particionada, cada partição ganha o seu (índices locais).
+    for indice, colunas in _indices(particionada).items():
+        op.execute(f"CREATE INDEX {indice}_{nome} ON {nome} ({colunas})")
+    # Os de _indices já foram criados acima (em qualquer um dos sentidos da migração)
+    ignorados = ", ".join(f"'{indice}'" for indice in _indices(particionada=True))
+    op.execute(_COPIAR_INDICES.format(nome=nome, unico="" if particionada else "UNIQUE ", ignorados=ignorados))
+
+
+def _indices(particionada: bool) -> dict[str, str]:
+    indices = {
+        "ix_atletas_categoria_id_pk_id": "categoria_id, pk_id",
+        "ix_atletas_centro_treinamento_id_pk_id": "centro_treinamento_id, pk_id",
+        "ix_atletas_ultima_atividade_em": "ultima_atividade_em",
+    }
+    if particionada:
+        # Sem UNIQUE por id/cpf nas partições (a unicidade é da tabela de chaves):
+        # índices comuns para as buscas já podadas para uma partição
+        indices["ix_atletas_id"] = "id"
+        indices["ix_atletas_cpf"] = "cpf"
+    return indices
+
+
+def _trocar(nova: str, particionada: bool) -> None:
+    """
+    Troca `atletas` pela tabela nova. Único passo com lock forte: como a nova já está
+    completa (cópia + trigger), só apaga a antiga e renomeia (milissegundos).
+    """
+    comandos = [
+        "LOCK TABLE atletas IN ACCESS EXCLUSIVE MODE",
+        # A sequence dos pk_id pertence à coluna da tabela antiga: sairia junto no DROP
+        "ALTER SEQUENCE atletas_pk_id_seq OWNED BY NONE",
+        "DROP TABLE atletas",
+        f"ALTER TABLE {nova} RENAME TO atletas",
+        "ALTER SEQUENCE atletas_pk_id_seq OWNED BY atletas.pk_id",
+        f"ALTER INDEX {nova}_pkey RENAME TO atletas_pkey",
+    ]
+    if not particionada:
+        comandos.append(f"ALTER INDEX {nova}_cpf_key RENAME TO atletas_cpf_key")
+    comandos += [f"ALTER INDEX {indice}_{nova} RENAME TO {indice}" for indice in _indices(particionada)]
+    comandos.append(_RENOMEAR_INDICES)
+    if particionada:
+        comandos += _triggers_chaves("atletas")
+    ddl_com_lock_timeout(*comandos)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        # SQLite (ambiente local): sem particionamento, `atletas` continua como está
+        return
+    # Roda com a aplicação no ar: as escritas continuam durante as cópias e só a troca
+    # final pede lock exclusivo. Depois, ligue ATLETAS_PARTICIONADA=true.
+
+    # 1. Chaves globais, mantidas por trigger desde já e copiadas em lotes
+    op.create_table('atletas_chaves',
+    sa.Column('pk_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('cpf', sa.String(length=11), nullable=False),
+    sa.Column('centro_treinamento_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('pk_id'),
+    sa.UniqueConstraint('cpf'),
+    sa.UniqueConstraint('id', name='atletas_chaves_id_key')
+    )
+    op.execute(_FUNCAO_CHAVES)
+    op.execute(_FUNCAO_ENCAMINHAR)
+    ddl_com_lock_timeout(*_triggers_chaves("atletas"))
+    copiar_em_lotes("atletas", "atletas_chaves", _CHAVES)
+
+    # 2. Tabela particionada, alimentada pelo trigger e pela cópia
+    _nova_tabela("atletas_particionada", particionada=True)
+    ddl_com_lock_timeout(
+        "CREATE TRIGGER atletas_encaminhar AFTER INSERT OR UPDATE OR DELETE ON atletas "
+        "FOR EACH ROW EXECUTE FUNCTION atletas_encaminhar('atletas_particionada')"
+    )
+    copiar_em_lotes("atletas", "atletas_particionada")
+    op.execute("ANALYZE atletas_particionada")
+
+    # 3. Troca (os triggers da tabela antiga saem com ela)
+    _trocar("atletas_particionada", particionada=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    # Desligue ATLETAS_PARTICIONADA antes: a tabela de chaves deixa de existir
+    _nova_tabela("atletas_unica", particionada=False)
+    ddl_com_lock_timeout(
+        "CREATE TRIGGER atletas_encaminhar AFTER INSERT OR UPDATE OR DELETE ON atletas "
+        "FOR EACH ROW EXECUTE FUNCTION atletas_encaminhar('atletas_unica')"
+    )
+    copiar_em_lotes("atletas", "atletas_unica")
+    op.execute("ANALYZE atletas_unica")
+    _trocar("atletas_unica", particionada=False)
+
+    op.drop_table('atletas_chaves')
+    op.execute("DROP FUNCTION IF EXISTS atletas_encaminhar()")
+    op.execute("DROP FUNCTION IF EXISTS atletas_manter_chaves()")
@@ -0,0 +1,45 @@
+"""atletas_registro
+
+Revision ID: f6a1d3b8c720
+Revises: e4b7c2d9a615
+Create Date: 2026-10-19 23:40:12.208731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a1d3b8c720'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c2d9a615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Usada só no banco principal com SHARDS (nos shards fica vazia)
+    op.create_table('atletas_registro',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('cpf', sa.String(length=11), nullable=False),
+    sa.Column('criado_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('pk_id'),
+    sa.UniqueConstraint('cpf')
+    )
+    op.create_index('ix_atletas_registro_criado_em', 'atletas_registro', ['criado_em'], unique=False)
+    if op.get_context().dialect.name == "postgresql":
+        # Os pk_id globais começam depois dos já usados em `atletas` deste banco: ele
+        # pode ser também um dos shards, com atletas gravados antes do sharding
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('atletas_registro', 'pk_id'), "
+            "(SELECT coalesce(max(pk_id), 0) + 1 FROM atletas), false)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_atletas_registro_criado_em', table_name='atletas_registro')
+    op.drop_table('atletas_registro')
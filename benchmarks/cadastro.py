@@ -0,0 +1,69 @@
+# benchmarks/cadastro.py
+"""
+Vazão de `POST /atletas` com muitas requisições concorrentes, com e sem o
+cadastro agrupado (ATLETAS_AGRUPAMENTO_ATIVO).
+
+As requisições vão direto para a aplicação (httpx + ASGITransport, sem rede),
+então a diferença medida é a do banco: um commit por cadastro x um INSERT de
+várias linhas e um commit por lote. Cria a categoria/CT de teste se não existirem
+e usa CPFs novos a cada rodada (banco LOCAL de testes, nunca produção).
+
+Uso:
+    poetry run python -m benchmarks.cadastro --requisicoes 2000 --concorrencia 200
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+
+from src.app.main import app
+from src.configs.settings import settings
+from src.core.database import engine
+from src.schemas.atleta import digitos_verificadores_cpf
+
+CATEGORIA = {"nome": "Bench"}
+CENTRO = {"nome": "CT Bench", "endereco": "Rua Bench, 1", "proprietario": "Bench"}
+
+
+async def rodada(cliente: httpx.AsyncClient, requisicoes: int, concorrencia: int) -> tuple[float, Counter]:
+    semaforo = asyncio.Semaphore(concorrencia)
+    prefixo = random.randint(0, 99)
+
+    async def cadastrar(n: int) -> int:
+        base = f"{prefixo:02d}{n:07d}"
+        atleta = {
+            "nome": f"Atleta {n}", "cpf": base + digitos_verificadores_cpf(base), "idade": 20, "peso": 70.0,
+            "altura": 1.75, "sexo": "M", "categoria": CATEGORIA, "centro_treinamento": CENTRO,
+        }
+        async with semaforo:
+            return (await cliente.post("/atletas/", json=atleta)).status_code
+
+    inicio = time.perf_counter()
+    status = await asyncio.gather(*(cadastrar(n) for n in range(requisicoes)))
+    return time.perf_counter() - inicio, Counter(status)
+
+
+async def main(requisicoes: int, concorrencia: int) -> None:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as cliente:
+        await cliente.post("/categorias/", json=CATEGORIA)
+        await cliente.post("/centros-treinamento/", json=CENTRO)
+
+        print(f"{'modo':<24}{'tempo':>10}{'cadastros/s':>14}  status")
+        for agrupado in (False, True):
+            settings.ATLETAS_AGRUPAMENTO_ATIVO = agrupado
+            duracao, status = await rodada(cliente, requisicoes, concorrencia)
+            nome = f"agrupado ({settings.ATLETAS_AGRUPAMENTO_MAX}/lote)" if agrupado else "um commit por cadastro"
+            print(f"{nome:<24}{duracao:>9.2f}s{requisicoes / duracao:>14,.0f}  {dict(status)}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requisicoes, args.concorrencia))
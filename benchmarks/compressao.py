@@ -0,0 +1,81 @@
+# benchmarks/compressao.py
+"""
+Benchmark da compressão de respostas: bytes trafegados e custo de CPU por requisição.
+
+Gera uma listagem sintética no formato de `AtletaOut` (o mesmo JSON devolvido por
+`GET /atletas`) e mede, para cada algoritmo disponível:
+  - tamanho do corpo enviado e taxa de compressão;
+  - tempo de CPU por requisição comprimindo do zero (cache frio);
+  - tempo de CPU por requisição quando a variante já está no cache (repetição de uma
+    listagem em cache, que chega ao middleware com a sua chave).
+
+Uso:
+    poetry run python -m benchmarks.compressao --atletas 5000 --repeticoes 50
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from src.core.compressao import CompressaoMiddleware, algoritmos_disponiveis
+
+# Chave de uma listagem em cache (ver src/core/listagens.py)
+CHAVE = b"listagem:bench:1"
+
+
+def gerar_listagem(quantidade: int) -> bytes:
+    """Gera o JSON de uma listagem de atletas parecida com a resposta real."""
+    random.seed(42)
+    categorias = ["Scale", "RX", "Master", "Teen"]
+    centros = ["CT King", "CT Queen", "CT Norte", "CT Sul"]
+    atletas = [
+        {
+            "id": str(uuid.uuid4()),
+            "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc).isoformat(),
+            "pk_id": i,
+            "nome": f"Atleta {i}",
+            "cpf": f"{random.randrange(10**10, 10**11):011d}",
+            "idade": random.randint(16, 60),
+            "peso": round(random.uniform(50, 110), 1),
+            "altura": round(random.uniform(1.5, 2.0), 2),
+            "sexo": random.choice("MF"),
+            "categoria": {"nome": random.choice(categorias)},
+            "centro_treinamento": {"nome": random.choice(centros)},
+        }
+        for i in range(quantidade)
+    ]
+    return json.dumps(atletas).encode()
+
+
+def medir(corpo: bytes, repeticoes: int) -> None:
+    print(f"Corpo original: {len(corpo):,} bytes\n")
+    print(f"{'algoritmo':<10}{'bytes':>12}{'taxa':>8}{'CPU frio (ms)':>16}{'CPU cache (ms)':>16}")
+
+    for algoritmo in algoritmos_disponiveis():
+        # Sem cache: cada requisição comprime o corpo inteiro
+        sem_cache = CompressaoMiddleware(app=None, cache_max_bytes=0)
+        inicio = time.process_time()
+        for _ in range(repeticoes):
+            comprimido = sem_cache.comprimir_completo(corpo, algoritmo)
+        frio = (time.process_time() - inicio) / repeticoes * 1000
+
+        # Com cache: apenas a primeira requisição comprime, as demais acham a variante pela chave
+        com_cache = CompressaoMiddleware(app=None)
+        com_cache.comprimir_completo(corpo, algoritmo, CHAVE)
+        inicio = time.process_time()
+        for _ in range(repeticoes):
+            com_cache.comprimir_completo(corpo, algoritmo, CHAVE)
+        quente = (time.process_time() - inicio) / repeticoes * 1000
+
+        taxa = len(corpo) / len(comprimido)
+        print(f"{algoritmo:<10}{len(comprimido):>12,}{taxa:>7.1f}x{frio:>16.3f}{quente:>16.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--atletas", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+    medir(gerar_listagem(args.atletas), args.repeticoes)
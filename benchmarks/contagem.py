@@ -0,0 +1,79 @@
+# benchmarks/contagem.py
+"""
+Benchmark dos modos de contagem das listagens (`?total=exato|aproximado`).
+
+Usa o banco configurado em DB_URL (PostgreSQL). Se a tabela `atletas` tiver menos
+linhas que `--linhas`, completa com atletas sintéticos (generate_series) e roda ANALYZE.
+Mede a latência média de cada modo, com e sem filtro:
+  - exato (sem cache): SELECT count(*) a cada requisição;
+  - exato (com cache): repetição dentro do TTL, sem escritas no meio;
+  - aproximado: pg_class.reltuples (sem filtro) ou estimativa do EXPLAIN (com filtro).
+
+Uso:
+    poetry run python -m benchmarks.contagem --linhas 1000000 --repeticoes 20
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import func, select, text
+
+from src.core import contagem
+from src.core.cache_backends import cache
+from src.core.database import async_session
+from src.models.atleta import AtletaModel
+from src.schemas.atleta import digitos_verificadores_cpf_sql
+
+# CPF válido a partir de n (base de 9 dígitos + verificadores): a API recusa os inválidos
+_BASE_CPF = "lpad(n::text, 9, '0')"
+CPF_SINTETICO = f"{_BASE_CPF} || {digitos_verificadores_cpf_sql(_BASE_CPF)}"
+
+
+async def popular(linhas: int) -> None:
+    async with async_session() as session:
+        atual = (await session.execute(select(func.count()).select_from(AtletaModel))).scalar_one()
+        if atual >= linhas:
+            return
+        print(f"Inserindo {linhas - atual:,} atletas sintéticos...")
+        # Usa a primeira categoria e o primeiro CT existentes (cadastre-os antes pela API)
+        await session.execute(text(f"""
+            INSERT INTO atletas (id, nome, cpf, idade, peso, altura, sexo, created_at, categoria_id, centro_treinamento_id)
+            SELECT gen_random_uuid(), 'Atleta ' || n, {CPF_SINTETICO}, 18 + n % 40, 60 + n % 40,
+                   1.5 + (n % 50) / 100.0, CASE WHEN n % 2 = 0 THEN 'M' ELSE 'F' END, now(),
+                   (SELECT min(pk_id) FROM categorias), (SELECT min(pk_id) FROM centros_treinamento)
+            FROM generate_series(:inicio, :fim) AS n
+        """), {"inicio": atual + 1, "fim": linhas})
+        await session.commit()
+        await session.execute(text("ANALYZE atletas"))
+
+
+async def medir(nome: str, consulta, modo: str, repeticoes: int, limpar_cache: bool) -> None:
+    async with async_session() as session:
+        total, usado = await contagem.contar(session, consulta, modo)  # aquecimento
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            if limpar_cache:
+                await cache.fechar()  # esvazia o backend em memória
+            total, usado = await contagem.contar(session, consulta, modo)
+        media = (time.perf_counter() - inicio) / repeticoes * 1000
+    print(f"{nome:<32}{usado:<12}{total:>14,}{media:>12.3f} ms")
+
+
+async def main(linhas: int, repeticoes: int) -> None:
+    await popular(linhas)
+    todos = select(AtletaModel)
+    filtrado = select(AtletaModel).where(AtletaModel.sexo == "F")
+
+    print(f"{'cenário':<32}{'modo':<12}{'total':>14}{'latência':>15}")
+    for rotulo, consulta in (("sem filtro", todos), ("filtro sexo='F'", filtrado)):
+        await medir(f"{rotulo} / exato sem cache", consulta, "exato", repeticoes, limpar_cache=True)
+        await medir(f"{rotulo} / exato com cache", consulta, "exato", repeticoes, limpar_cache=False)
+        await medir(f"{rotulo} / aproximado", consulta, "aproximado", repeticoes, limpar_cache=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.linhas, args.repeticoes))
@@ -0,0 +1,69 @@
+# src/controllers/admin.py
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from src.core.cache_backends import cache
+from src.core.outbox import despachante, pendencias
+from src.core.perfil import armazenamento_perfis
+
+router = APIRouter()
+
+
+# --- PROFILING (src/core/perfil.py) ---
+@router.get(
+    '/perfis',
+    summary='Listar os perfis de requisição gravados',
+    status_code=status.HTTP_200_OK,
+)
+async def listar_perfis() -> list[dict]:
+    """Resumos (sem a lista de funções), do mais recente para o mais antigo."""
+    return armazenamento_perfis.listar()
+
+
+@router.get(
+    '/perfis/{id}',
+    summary='Consultar um perfil de requisição',
+    status_code=status.HTTP_200_OK,
+)
+async def consultar_perfil(id: str) -> dict:
+    """Tempo total/CPU, lag do event loop e as funções de maior tempo acumulado."""
+    resumo = armazenamento_perfis.resumo(id)
+    if resumo is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Perfil não encontrado: {id}')
+    return resumo
+
+
+@router.get(
+    '/perfis/{id}/pstats',
+    summary='Baixar os dados brutos do perfil (pstats)',
+    status_code=status.HTTP_200_OK,
+    response_class=FileResponse,
+)
+async def baixar_perfil(id: str):
+    """Arquivo do cProfile, para abrir com `python -m pstats` ou snakeviz."""
+    caminho = armazenamento_perfis.arquivo_pstats(id)
+    if caminho is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Perfil não encontrado: {id}')
+    return FileResponse(caminho, media_type='application/octet-stream', filename=f'{id}.prof')
+
+
+# --- OUTBOX (src/core/outbox.py) ---
+@router.get(
+    '/outbox',
+    summary='Métricas da entrega de eventos para integrações',
+    status_code=status.HTTP_200_OK,
+)
+async def metricas_outbox() -> dict:
+    """Vazão e latência do despachante deste processo e o tamanho da fila de cada banco."""
+    return {"despachante": despachante.metricas.resumo(), "filas": await pendencias()}
+
+
+# --- CACHE (src/core/cache_backends.py) ---
+@router.get(
+    '/cache',
+    summary='Métricas do cache e da invalidação entre workers',
+    status_code=status.HTTP_200_OK,
+)
+async def metricas_cache() -> dict:
+    """Taxa de acerto por espaço do cache, invalidações difundidas/recebidas e o lag delas (deste processo)."""
+    return cache.resumo()
@@ -1,18 +1,41 @@
 # src/controllers/atleta.py
 
+import asyncio
 from datetime import datetime, timezone
-from fastapi import APIRouter, Body, status, HTTPException
-from pydantic import UUID4, ValidationError
+from functools import lru_cache
+from uuid import uuid4
+from fastapi import APIRouter, Body, Header, Query, Response, status, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import UUID4, TypeAdapter, ValidationError, create_model
+from sqlalchemy import Sequence, any_, bindparam, delete, exists, insert, or_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
-from typing import Type # Importação útil para tipagem de classes de modelo
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Optional, Type # Importação útil para tipagem de classes de modelo
 
 # Importações dos modelos e schemas
 from src.models.atleta import AtletaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+from src.models.atleta_chave import AtletaChaveModel
 from src.models.categorias import CategoriaModel
 from src.models.centro_treinamento import CentroTreinamentoModel
-from src.schemas.atleta import AtletaIn, AtletaOut, AtletaUpdate
-from src.api.dependencies import DatabaseDependency
+from src.models.medida import MedidaModel
+from src.schemas.atleta import AtletaBatchIn, AtletaIn, AtletaOut, AtletaUpdate, Cpf
+from src.api.dependencies import (
+    DatabaseDependency, PaginacaoDependency, ShardsDependency, TotalQuery
+)
+from src.configs.settings import settings
+from src.core.agrupamento import AgrupadorEscritas
+from src.core.bloom import indice_cpfs
+from src.core.cache import marcar_alteradas
+from src.core.shards import (
+    SessoesShards, executar_consultas, liberar_reservas, mesclar, reservar_cpfs, roteador, trocar_cpf_reservado
+)
+from src.core.contagem import contar
+from src.core.eventos import broker, publicar
+from src.core.listagens import chave_listagem, guardar_listagem, obter_listagem
 
 router = APIRouter()
 
@@ -38,6 +61,410 @@ async def get_entity_or_400(
         )
     return entity
 
+# --- CAMPOS PARCIAIS (?fields=) ---
+# Campos aninhados do AtletaOut e a coluna (via JOIN) que os alimenta
+_CAMPOS_ANINHADOS = {
+    "categoria": CategoriaModel.nome,
+    "centro_treinamento": CentroTreinamentoModel.nome,
+}
+
+CamposQuery = Annotated[
+    Optional[str],
+    Query(description='Campos do atleta a retornar, separados por vírgula (ex.: nome,cpf)'),
+]
+
+IncluirArquivadosQuery = Annotated[
+    bool,
+    Query(description='Inclui atletas inativos movidos para o arquivo (consulta mais lenta)'),
+]
+
+# Serializa a listagem direto para bytes (o mesmo JSON do response_model), para o cache
+_LISTA = TypeAdapter(list[AtletaOut])
+
+
+def modelos_atleta(incluir_arquivados: bool) -> tuple[type[AtletaModel | AtletaArquivoModel], ...]:
+    """Tabelas consultadas: só a quente ou quente + arquivo."""
+    return (AtletaModel, AtletaArquivoModel) if incluir_arquivados else (AtletaModel,)
+
+
+def parse_campos(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """Valida o parâmetro `fields` contra os campos do AtletaOut (None = todos)."""
+    if fields is None:
+        return None
+    campos = tuple(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+    invalidos = [c for c in campos if c not in AtletaOut.model_fields]
+    if not campos or invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: '{', '.join(invalidos) or fields}'. "
+                   f"Disponíveis: {', '.join(AtletaOut.model_fields)}"
+        )
+    return campos
+
+
+def select_campos(campos: tuple[str, ...], modelo: type[AtletaModel | AtletaArquivoModel] = AtletaModel):
+    """Monta um SELECT apenas com as colunas necessárias, com JOIN só quando pedido."""
+    colunas = [
+        _CAMPOS_ANINHADOS[campo].label(campo) if campo in _CAMPOS_ANINHADOS else getattr(modelo, campo)
+        for campo in campos
+    ]
+    consulta = select(*colunas).select_from(modelo)
+    if "categoria" in campos:
+        consulta = consulta.join(modelo.categoria)
+    if "centro_treinamento" in campos:
+        consulta = consulta.join(modelo.centro_treinamento)
+    return consulta
+
+
+@lru_cache(maxsize=256)
+def _adaptador_parcial(campos: tuple[str, ...]) -> TypeAdapter:
+    """Schema derivado do AtletaOut contendo só os campos pedidos (um por combinação)."""
+    modelo = create_model(
+        "AtletaParcial",
+        **{campo: (AtletaOut.model_fields[campo].annotation, ...) for campo in campos},
+    )
+    return TypeAdapter(list[modelo])
+
+
+def json_parcial(linhas, campos: tuple[str, ...]) -> bytes:
+    """Serializa linhas do `select_campos` com a mesma formatação do AtletaOut."""
+    dados = [
+        {
+            campo: {"nome": valor} if campo in _CAMPOS_ANINHADOS else valor
+            for campo, valor in zip(campos, linha)
+        }
+        for linha in linhas
+    ]
+    adaptador = _adaptador_parcial(campos)
+    return adaptador.dump_json(adaptador.validate_python(dados))
+
+
+def serializar_parcial(linhas, campos: tuple[str, ...]) -> Response:
+    return Response(content=json_parcial(linhas, campos), media_type="application/json")
+
+
+def filtro_ids(db_session: DatabaseDependency, ids: list, modelo: type[AtletaModel | AtletaArquivoModel] = AtletaModel):
+    """`id = ANY(:ids)` no PostgreSQL (um único parâmetro, mesmo plano para qualquer tamanho de lote)."""
+    if db_session.bind.dialect.name == "postgresql":
+        return modelo.id == any_(bindparam("ids", ids, type_=ARRAY(PG_UUID(as_uuid=True))))
+    return modelo.id.in_(ids)
+
+
+# --- TABELA PARTICIONADA POR CT (ATLETAS_PARTICIONADA) ---
+def particionada(db_session: AsyncSession) -> bool:
+    """`atletas` particionada por centro de treinamento, com a tabela de chaves (migração e4b7c2d9a615)."""
+    return settings.ATLETAS_PARTICIONADA and db_session.bind.dialect.name == "postgresql"
+
+
+def filtro_particao(db_session: AsyncSession, modelo, **filtro) -> list:
+    """
+    Condições extras para buscas por id/cpf na tabela particionada: o CT do atleta, lido
+    da tabela de chaves (índice único). Com a chave de partição na consulta, o PostgreSQL
+    poda as partições na execução e procura em uma só. No arquivo, ou sem partições, nada.
+    """
+    if modelo is not AtletaModel or not particionada(db_session):
+        return []
+    return [
+        AtletaModel.centro_treinamento_id == (
+            select(AtletaChaveModel.centro_treinamento_id)
+            .where(getattr(AtletaChaveModel, coluna) == valor)
+            .scalar_subquery()
+        )
+        for coluna, valor in filtro.items() if coluna in ("id", "cpf")
+    ]
+
+
+async def centros_dos_ids(db_session: AsyncSession, ids: list) -> list[int]:
+    """CTs (chaves de partição) dos ids, para limitar uma busca em lote às partições deles."""
+    consulta = select(AtletaChaveModel.centro_treinamento_id).distinct().where(
+        filtro_ids(db_session, ids, AtletaChaveModel)
+    )
+    return (await db_session.execute(consulta)).scalars().all()
+
+
+async def listar_mesclado(pares: list[tuple[AsyncSession, object]], paginacao, escalar: bool) -> list:
+    """
+    Executa consultas equivalentes (tabela quente e arquivo, em um ou vários shards) e
+    devolve uma única página ordenada por pk_id. Cada consulta traz no máximo
+    offset+limit linhas já ordenadas, e a mescla (merge) mantém a ordem sem reordenar tudo.
+    """
+    fim = None if paginacao.limit is None else paginacao.offset + paginacao.limit
+    ordenadas = []
+    for db_session, consulta in pares:
+        consulta = consulta.order_by(consulta.selected_columns.pk_id)
+        if fim is not None:
+            consulta = consulta.limit(fim)
+        ordenadas.append((db_session, consulta))
+    parciais = await executar_consultas(ordenadas, escalar)
+    return mesclar(parciais, lambda item: item.pk_id, paginacao.offset, fim)
+
+
+async def localizar_atleta(
+    sessoes: SessoesShards,
+    modelos: tuple[type[AtletaModel | AtletaArquivoModel], ...] = (AtletaModel,),
+    **filtro,
+) -> tuple[AsyncSession | None, AtletaModel | AtletaArquivoModel | None]:
+    """
+    Procura o atleta (pelo id ou cpf) em todos os shards ao mesmo tempo (nenhum dos dois
+    diz o shard). Devolve também a sessão do shard onde ele está, para alterações na
+    mesma transação.
+    """
+    async def buscar(_, db_session: AsyncSession):
+        for modelo in modelos:
+            consulta = select(modelo).filter_by(**filtro).where(*filtro_particao(db_session, modelo, **filtro))
+            atleta = (await db_session.execute(consulta)).scalars().first()
+            if atleta:
+                return db_session, atleta
+        return None
+
+    for encontrado in await sessoes.em_todas(buscar):
+        if encontrado:
+            return encontrado
+    return None, None
+
+
+def _nao_encontrado(id: UUID4) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f'Atleta não encontrado no id: {id}'
+    )
+
+
+async def erro_atleta_ausente(sessoes: SessoesShards, id: UUID4) -> HTTPException:
+    """
+    Erro para alterações em um atleta fora da tabela quente: 409 se ele foi arquivado
+    (o arquivo é só leitura), 404 se não existe. A consulta ao arquivo só roda nessa falta.
+    """
+    _, arquivado = await localizar_atleta(sessoes, (AtletaArquivoModel,), id=id)
+    if arquivado:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f'Atleta arquivado por inatividade (somente leitura) no id: {id}'
+        )
+    return _nao_encontrado(id)
+
+
+async def cpf_cadastrado(
+    sessoes: SessoesShards, cpf: str, modelos: tuple[type[AtletaModel | AtletaArquivoModel], ...]
+) -> bool:
+    """
+    Verifica se o CPF existe em algum dos `modelos`, em todos os shards. Quando o filtro
+    de Bloom garante que o CPF não existe, responde sem consultar o banco.
+    """
+    if not indice_cpfs.pode_existir(cpf):
+        return False
+
+    async def procurar(_, db_session: AsyncSession) -> bool:
+        # Particionada: o índice único da tabela de chaves responde por todas as partições
+        consulta = select(or_(*(
+            exists().where(AtletaChaveModel.cpf == cpf)
+            if modelo is AtletaModel and particionada(db_session) else exists().where(modelo.cpf == cpf)
+            for modelo in modelos
+        )))
+        return (await db_session.execute(consulta)).scalar()
+
+    return any(await sessoes.em_todas(procurar))
+
+
+def modelos_unicidade_cpf() -> tuple[type[AtletaModel | AtletaArquivoModel], ...]:
+    """
+    Onde a aplicação precisa conferir o CPF antes de gravar: no arquivo e, com sharding,
+    também na tabela quente dos shards (atalho para o 409; entre shards, quem garante a
+    unicidade é o registro global do banco principal).
+    """
+    return (AtletaArquivoModel, AtletaModel) if roteador.ativo else (AtletaArquivoModel,)
+
+# --- CADASTRO AGRUPADO (ATLETAS_AGRUPAMENTO_ATIVO) ---
+# Item do lote: colunas do atleta, nomes da categoria e do CT (para montar o AtletaOut) e o shard
+CadastroPendente = tuple[dict, str, str, str]
+
+
+def _conflito_cpf(cpf: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Já existe um atleta cadastrado com o CPF: {cpf}"
+    )
+
+
+def _violou_cpf_unico(erro: IntegrityError) -> bool:
+    """UNIQUE do CPF (atletas_cpf_key, atletas_chaves_cpf_key...) e não outra violação (ex.: FOREIGN KEY)."""
+    origem = erro.orig
+    codigo = getattr(origem, "sqlstate", None) or getattr(origem, "pgcode", None)
+    mensagem = str(origem)
+    if codigo is not None:
+        return codigo == "23505" and "cpf" in mensagem
+    # SQLite: "UNIQUE constraint failed: atletas.cpf"
+    return "UNIQUE constraint failed" in mensagem and ".cpf" in mensagem
+
+
+def _erro_cadastro(erro: Exception, cpf: str) -> HTTPException:
+    """Mesma resposta nos dois caminhos de cadastro: 409 só para CPF repetido, 500 para o resto."""
+    if isinstance(erro, IntegrityError) and _violou_cpf_unico(erro):
+        return _conflito_cpf(cpf)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Ocorreu um erro ao inserir os dados: {str(erro)}"
+    )
+
+
+async def _inserir_atletas(db_session, linhas: list[dict]) -> dict[str, int]:
+    """
+    INSERT de várias linhas ignorando CPFs já existentes (ON CONFLICT DO NOTHING).
+    Retorna cpf -> pk_id das linhas efetivamente inseridas.
+    """
+    if particionada(db_session):
+        return await _inserir_atletas_particionada(db_session, linhas)
+    dialeto_insert = pg_insert if db_session.bind.dialect.name == "postgresql" else sqlite_insert
+    consulta = (
+        dialeto_insert(AtletaModel)
+        .values(linhas)
+        .on_conflict_do_nothing()
+        .returning(AtletaModel.pk_id, AtletaModel.cpf)
+    )
+    return {cpf: pk_id for pk_id, cpf in (await db_session.execute(consulta)).all()}
+
+
+async def _inserir_atletas_particionada(db_session, linhas: list[dict]) -> dict[str, int]:
+    """
+    A tabela particionada não tem UNIQUE(cpf) para o ON CONFLICT: os CPFs são reservados
+    antes na tabela de chaves (pk_id tirado da sequence dos atletas) e só as linhas
+    reservadas são inseridas, já com o pk_id. O trigger reconhece a reserva pelo pk_id.
+    """
+    reservas = (
+        pg_insert(AtletaChaveModel)
+        .values([
+            {"pk_id": Sequence("atletas_pk_id_seq").next_value(), "id": linha["id"],
+             "cpf": linha["cpf"], "centro_treinamento_id": linha["centro_treinamento_id"]}
+            for linha in linhas
+        ])
+        .on_conflict_do_nothing()
+        .returning(AtletaChaveModel.pk_id, AtletaChaveModel.cpf)
+    )
+    inseridos = {cpf: pk_id for pk_id, cpf in (await db_session.execute(reservas)).all()}
+    if inseridos:
+        await db_session.execute(insert(AtletaModel), [
+            {**linha, "pk_id": inseridos[linha["cpf"]]} for linha in linhas if linha["cpf"] in inseridos
+        ])
+    return inseridos
+
+
+async def _liberar_reservas(pk_ids) -> None:
+    pk_ids = list(pk_ids)
+    if pk_ids:
+        async with roteador.fabrica_principal()() as principal:
+            await liberar_reservas(principal, pk_ids)
+
+
+async def cadastrar_lote(itens: list[CadastroPendente]) -> list[AtletaOut | BaseException]:
+    """
+    Grava um lote de cadastros (uma transação por shard, em paralelo) e devolve, na
+    ordem dos itens, o AtletaOut de cada um ou o erro daquele item (CPF duplicado).
+    """
+    por_shard: dict[str, list[int]] = {}
+    for posicao, item in enumerate(itens):
+        por_shard.setdefault(item[3], []).append(posicao)
+
+    resultados: list[AtletaOut | BaseException | None] = [None] * len(itens)
+
+    async def gravar(shard: str, posicoes: list[int]) -> None:
+        try:
+            gravados = await _cadastrar_no_shard(shard, [itens[posicao] for posicao in posicoes])
+        except Exception as erro:
+            gravados = [erro] * len(posicoes)
+        for posicao, resultado in zip(posicoes, gravados):
+            resultados[posicao] = resultado
+
+    await asyncio.gather(*(gravar(shard, posicoes) for shard, posicoes in por_shard.items()))
+    return resultados
+
+
+async def _cadastrar_no_shard(shard: str, itens: list[CadastroPendente]) -> list[AtletaOut | HTTPException]:
+    """Grava os cadastros de um shard em uma única transação."""
+    resultados: list[AtletaOut | HTTPException | None] = [None] * len(itens)
+    # CPF repetido dentro do próprio lote: só o primeiro concorre à inserção
+    primeiro_por_cpf: dict[str, int] = {}
+    for posicao, (linha, *_) in enumerate(itens):
+        if linha["cpf"] in primeiro_por_cpf:
+            resultados[posicao] = _conflito_cpf(linha["cpf"])
+        else:
+            primeiro_por_cpf[linha["cpf"]] = posicao
+
+    pendentes = [(posicao, itens[posicao][0]) for posicao in primeiro_por_cpf.values()]
+    reservados: dict[str, int] = {}
+    if roteador.ativo:
+        # Com sharding, o CPF é reservado no registro global (banco principal), que também
+        # dá o pk_id; os CPFs recusados lá caem no 409 abaixo, como os ignorados pelo ON CONFLICT
+        async with roteador.fabrica_principal()() as principal:
+            reservados = await reservar_cpfs(principal, [linha for _, linha in pendentes])
+        pendentes = [
+            (posicao, {**linha, "pk_id": reservados[linha["cpf"]]})
+            for posicao, linha in pendentes if linha["cpf"] in reservados
+        ]
+
+    async with roteador.fabrica(shard)() as db_session:
+        linhas = [linha for _, linha in pendentes]
+        inseridos = {}
+        try:
+            if linhas:
+                async with db_session.begin_nested():
+                    inseridos = await _inserir_atletas(db_session, linhas)
+        except IntegrityError:
+            # CPFs repetidos não chegam aqui (ON CONFLICT DO NOTHING): é outra violação (ex.:
+            # categoria removida no meio do caminho). Linha a linha, cada uma no seu SAVEPOINT,
+            # para o erro ficar só com quem o causou
+            inseridos = {}
+            for posicao, linha in pendentes:
+                try:
+                    async with db_session.begin_nested():
+                        inseridos.update(await _inserir_atletas(db_session, [linha]))
+                except IntegrityError as erro:
+                    resultados[posicao] = _erro_cadastro(erro, linha["cpf"])
+
+        if inseridos:
+            # Primeiro ponto do histórico de medidas de cada atleta
+            await db_session.execute(insert(MedidaModel), [
+                {"id": uuid4(), "atleta_id": inseridos[linha["cpf"]], "peso": linha["peso"],
+                 "altura": linha["altura"], "medido_em": linha["created_at"]}
+                for linha in linhas if linha["cpf"] in inseridos
+            ])
+            # Inserções fora da unidade de trabalho do ORM: avisa os caches manualmente
+            marcar_alteradas(db_session, AtletaModel.__tablename__, MedidaModel.__tablename__)
+
+        for posicao in primeiro_por_cpf.values():
+            linha, categoria, centro_treinamento, _ = itens[posicao]
+            if resultados[posicao] is not None:
+                continue
+            if linha["cpf"] not in inseridos:
+                # Ignorada pelo ON CONFLICT: o CPF já existia
+                resultados[posicao] = _conflito_cpf(linha["cpf"])
+                continue
+            atleta_out = AtletaOut.model_validate({
+                **{campo: valor for campo, valor in linha.items() if campo in AtletaOut.model_fields},
+                "pk_id": inseridos[linha["cpf"]],
+                "categoria": {"nome": categoria},
+                "centro_treinamento": {"nome": centro_treinamento},
+            })
+            await publicar(db_session, "atletas", "criado", atleta_out.model_dump(mode="json"))
+            resultados[posicao] = atleta_out
+
+        try:
+            await db_session.commit()
+        except Exception:
+            await _liberar_reservas(reservados.values())
+            raise
+    # Reservas das linhas que não entraram (ex.: FOREIGN KEY)
+    await _liberar_reservas(pk_id for cpf, pk_id in reservados.items() if cpf not in inseridos)
+    for cpf in inseridos:
+        indice_cpfs.adicionar(cpf)
+    return resultados
+
+
+agrupador_cadastros: AgrupadorEscritas[CadastroPendente, AtletaOut] = AgrupadorEscritas(
+    cadastrar_lote,
+    janela=settings.ATLETAS_AGRUPAMENTO_JANELA_MS / 1000,
+    maximo=settings.ATLETAS_AGRUPAMENTO_MAX,
+)
+
 # --- ROTA: POST / ---
 @router.post(
     path="/",
@@ -45,7 +472,11 @@ async def get_entity_or_400(
     status_code=status.HTTP_201_CREATED,
     response_model=AtletaOut
 )
-async def post_atleta(db_session: DatabaseDependency, atleta_in: AtletaIn = Body(...)):
+async def post_atleta(
+    db_session: DatabaseDependency,
+    sessoes: ShardsDependency,
+    atleta_in: AtletaIn = Body(...),
+):
     """
     Cria um novo atleta, validando a existência da Categoria e do Centro de Treinamento.
     """
@@ -58,9 +489,60 @@ async def post_atleta(db_session: DatabaseDependency, atleta_in: AtletaIn = Body
         db_session, CentroTreinamentoModel, atleta_in.centro_treinamento.nome, "Centro de Treinamento"
     )
 
+    # O CPF também não pode pertencer a um atleta arquivado ou de outro shard
+    if await cpf_cadastrado(sessoes, atleta_in.cpf, modelos_unicidade_cpf()):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Já existe um atleta cadastrado com o CPF: {atleta_in.cpf}"
+        )
+
     # 2. Criação do modelo Atleta
     # A validação de input é feita pelo FastAPI/Pydantic.
     atleta_data = atleta_in.model_dump(exclude={"categoria", "centro_treinamento"})
+
+    if settings.ATLETAS_AGRUPAMENTO_ATIVO:
+        # Cadastros concorrentes viram um único INSERT de várias linhas (um commit por lote)
+        agora = datetime.now(timezone.utc)
+        linha = {
+            **atleta_data,
+            "id": uuid4(),
+            "created_at": agora,
+            "ultima_atividade_em": agora,
+            "categoria_id": categoria.pk_id,
+            "centro_treinamento_id": centro_treinamento.pk_id,
+        }
+        shard = roteador.shard_do_centro(centro_treinamento.id)
+        # Devolve as conexões ao pool enquanto espera: o lote usa uma sessão própria e,
+        # com muitas requisições esperando, elas esgotariam o pool antes dele
+        await db_session.close()
+        await sessoes.fechar()
+        try:
+            return await agrupador_cadastros.enviar((linha, categoria.nome, centro_treinamento.nome, shard))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Ocorreu um erro ao inserir os dados: {str(e)}"
+            )
+
+    # O atleta é gravado no shard do seu CT (sem sharding, a própria db_session)
+    sessao = sessoes.do_centro(centro_treinamento.id)
+    if sessao is not db_session:
+        # Categoria e CT são replicados em todos os shards com o mesmo pk_id:
+        # traz as instâncias para a sessão do shard sem consultá-lo
+        categoria = await sessao.merge(categoria, load=False)
+        centro_treinamento = await sessao.merge(centro_treinamento, load=False)
+
+    reserva = None
+    if roteador.ativo:
+        # CPF único entre os shards e pk_id global: reservados no registro do banco principal
+        atleta_data["id"] = uuid4()
+        reservados = await reservar_cpfs(db_session, [{"id": atleta_data["id"], "cpf": atleta_in.cpf}])
+        if not reservados:
+            raise _conflito_cpf(atleta_in.cpf)
+        reserva = atleta_data["pk_id"] = reservados[atleta_in.cpf]
+
     atleta_model = AtletaModel(
         **atleta_data,
         categoria_id=categoria.pk_id,
@@ -72,25 +554,33 @@ async def post_atleta(db_session: DatabaseDependency, atleta_in: AtletaIn = Body
 
     # 3. Persistência no banco de dados e tratamento de erros
     try:
-        db_session.add(atleta_model)
-        await db_session.commit()
-        await db_session.refresh(atleta_model)
+        sessao.add(atleta_model)
+        # flush gera pk_id/id na transação para o evento sair junto com o commit
+        await sessao.flush()
+        # Primeiro ponto do histórico de medidas
+        sessao.add(MedidaModel(atleta_id=atleta_model.pk_id, peso=atleta_model.peso, altura=atleta_model.altura))
+        atleta_out = AtletaOut.model_validate(atleta_model)
+        await publicar(sessao, "atletas", "criado", atleta_out.model_dump(mode="json"))
+        await sessao.commit()
+        indice_cpfs.adicionar(atleta_out.cpf)
     
-    except IntegrityError:
-        # Uso de 409 CONFLICT, mais semântico que 303 SEE_OTHER para chaves duplicadas.
-        await db_session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Já existe um atleta cadastrado com o CPF: {atleta_in.cpf}"
-        )
+    except IntegrityError as e:
+        # Uso de 409 CONFLICT, mais semântico que 303 SEE_OTHER para chaves duplicadas
+        # (só para o CPF: outras violações, como uma FK, são erro interno)
+        await sessao.rollback()
+        if reserva is not None:
+            await liberar_reservas(db_session, [reserva])
+        raise _erro_cadastro(e, atleta_in.cpf)
     except Exception as e:
-        await db_session.rollback()
+        await sessao.rollback()
+        if reserva is not None:
+            await liberar_reservas(db_session, [reserva])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ocorreu um erro ao inserir os dados: {str(e)}"
         )
 
-    return AtletaOut.model_validate(atleta_model)
+    return atleta_out
 
 # --- ROTA: GET / (Todos) ---
 @router.get(
@@ -99,11 +589,181 @@ async def post_atleta(db_session: DatabaseDependency, atleta_in: AtletaIn = Body
     status_code=status.HTTP_200_OK,
     response_model=list[AtletaOut]
 )
-async def query_all(db_session: DatabaseDependency) -> list[AtletaOut]:
+async def query_all(
+    sessoes: ShardsDependency,
+    paginacao: PaginacaoDependency,
+    nome: Annotated[Optional[str], Query(description='Filtra pelo nome do atleta')] = None,
+    cpf: Annotated[Optional[Cpf], Query(description='Filtra pelo CPF do atleta')] = None,
+    total: TotalQuery = None,
+    fields: CamposQuery = None,
+    incluir_arquivados: IncluirArquivadosQuery = False,
+) -> list[AtletaOut]:
     """Consulta e retorna a lista de todos os atletas."""
-    atletas: list[AtletaModel] = (await db_session.execute(select(AtletaModel))).scalars().all()
-    # Converte os modelos ORM (AtletaModel) para o schema de saída (AtletaOut)
-    return [AtletaOut.model_validate(atleta) for atleta in atletas]
+    campos = parse_campos(fields)
+    modelos = modelos_atleta(incluir_arquivados)
+
+    # Entre escritas a listagem se repete: o JSON pronto vem do cache (src/core/listagens.py).
+    # O AtletaOut traz os nomes da categoria e do CT: as duas tabelas entram na chave.
+    chave = chave_listagem(
+        "atletas",
+        {"paginacao": [paginacao.limit, paginacao.offset], "nome": nome, "cpf": cpf, "total": total,
+         "campos": campos, "incluir_arquivados": incluir_arquivados},
+        [modelo.__tablename__ for modelo in modelos]
+        + [CategoriaModel.__tablename__, CentroTreinamentoModel.__tablename__],
+    )
+    guardada = await obter_listagem(chave)
+    if guardada is not None:
+        return guardada
+
+    bancos = sessoes.todas()
+    mesclar_resultados = len(modelos) * len(bancos) > 1
+    # Mesclar quente + arquivo (ou shards) exige o pk_id no SELECT (ele não é devolvido se não foi pedido)
+    colunas = campos if campos is None or not mesclar_resultados or "pk_id" in campos else campos + ("pk_id",)
+
+    consultas = []
+    for modelo in modelos:
+        consulta = select(modelo) if campos is None else select_campos(colunas, modelo)
+        if nome is not None:
+            consulta = consulta.where(modelo.nome == nome)
+        if cpf is not None:
+            consulta = consulta.where(modelo.cpf == cpf, *filtro_particao(sessoes.principal, modelo, cpf=cpf))
+        consultas.append(consulta)
+
+    contagem = None
+    if total:
+        async def contar_no_shard(shard: str, sessao: AsyncSession) -> list:
+            return [await contar(sessao, consulta, total, escopo=shard) for consulta in consultas]
+
+        parciais = [parcial for lista in await sessoes.em_todas(contar_no_shard) for parcial in lista]
+        contagem = (
+            sum(valor for valor, _ in parciais),
+            "exato" if all(modo == "exato" for _, modo in parciais) else "aproximado",
+        )
+
+    pares = [(sessao, consulta) for _, sessao in bancos for consulta in consultas]
+    if not mesclar_resultados:
+        sessao, consulta = pares[0]
+        resultado = await sessao.execute(paginacao.aplicar(consulta, AtletaModel.pk_id))
+        itens = resultado.scalars().all() if campos is None else resultado.all()
+    else:
+        itens = await listar_mesclado(pares, paginacao, escalar=campos is None)
+
+    if campos is not None:
+        # Sparse fieldset: SELECT e JSON apenas com os campos pedidos
+        corpo = json_parcial(itens, campos)
+    else:
+        # Converte os modelos ORM (AtletaModel) para o schema de saída (AtletaOut)
+        corpo = _LISTA.dump_json([AtletaOut.model_validate(atleta) for atleta in itens])
+    return await guardar_listagem(chave, corpo, contagem)
+
+# --- ROTA: GET /stream (Tempo real) ---
+# Declarada antes de '/{id}' para que 'stream' não seja interpretado como um UUID.
+@router.get(
+    '/stream',
+    summary='Acompanhar cadastros e alterações de atletas em tempo real (SSE)',
+    response_class=StreamingResponse,
+)
+async def stream_atletas(
+    ultimo_id: Annotated[Optional[int], Query(description='Retoma a partir deste id de evento')] = None,
+    last_event_id: Annotated[Optional[int], Header()] = None,
+) -> StreamingResponse:
+    """Envia os eventos 'criado', 'atualizado' e 'removido' de atletas como Server-Sent Events."""
+    return StreamingResponse(
+        broker.stream("atletas", last_event_id if last_event_id is not None else ultimo_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- ROTA: POST /batch-get (Vários pelo id) ---
+@router.post(
+    '/batch-get',
+    summary='Consultar vários atletas pelos ids',
+    status_code=status.HTTP_200_OK,
+    response_model=list[AtletaOut],
+)
+async def batch_get(
+    sessoes: ShardsDependency,
+    fields: CamposQuery = None,
+    incluir_arquivados: IncluirArquivadosQuery = False,
+    lote: AtletaBatchIn = Body(...),
+) -> list[AtletaOut]:
+    """
+    Busca vários atletas em uma única consulta, na ordem dos ids enviados.
+    Ids inexistentes são omitidos do resultado.
+    """
+    ids = list(dict.fromkeys(lote.ids))
+    campos = parse_campos(fields)
+    # O id é necessário para ordenar; entra no SELECT mesmo que não seja devolvido
+    colunas = None if campos is None else (campos if "id" in campos else campos + ("id",))
+
+    async def buscar(_, db_session: AsyncSession) -> dict:
+        por_id = {}
+        for modelo in modelos_atleta(incluir_arquivados):
+            # O arquivo só é consultado para os ids que não estavam na tabela quente
+            faltantes = [id for id in ids if id not in por_id]
+            if not faltantes:
+                break
+            filtros = [filtro_ids(db_session, faltantes, modelo)]
+            if modelo is AtletaModel and particionada(db_session):
+                # Só as partições dos CTs desses atletas (ids sem chave não existem na tabela quente)
+                centros = await centros_dos_ids(db_session, faltantes)
+                if not centros:
+                    continue
+                filtros.append(AtletaModel.centro_treinamento_id.in_(centros))
+            if campos is None:
+                consulta = select(modelo).where(*filtros)
+                por_id.update((atleta.id, atleta) for atleta in (await db_session.execute(consulta)).scalars().all())
+            else:
+                consulta = select_campos(colunas, modelo).where(*filtros)
+                por_id.update((linha.id, linha) for linha in (await db_session.execute(consulta)).all())
+        return por_id
+
+    # Uma consulta por shard, todas ao mesmo tempo
+    por_id = {}
+    for parcial in await sessoes.em_todas(buscar):
+        por_id.update(parcial)
+
+    encontrados = [por_id[id] for id in ids if id in por_id]
+    if campos is None:
+        return [AtletaOut.model_validate(atleta) for atleta in encontrados]
+    return serializar_parcial(encontrados, campos)
+
+# --- ROTA: GET /cpf/{cpf} e HEAD /cpf/{cpf} ---
+@router.get(
+    '/cpf/{cpf}',
+    summary='Consultar um atleta pelo CPF',
+    status_code=status.HTTP_200_OK,
+    response_model=AtletaOut,
+)
+async def query_cpf(
+    cpf: Cpf,
+    sessoes: ShardsDependency,
+    incluir_arquivados: IncluirArquivadosQuery = False,
+) -> AtletaOut:
+    """Aceita o CPF com ou sem pontuação."""
+    atleta = None
+    if indice_cpfs.pode_existir(cpf):
+        _, atleta = await localizar_atleta(sessoes, modelos_atleta(incluir_arquivados), cpf=cpf)
+    if not atleta:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Atleta não encontrado no CPF: {cpf}')
+    return atleta
+
+
+@router.head(
+    '/cpf/{cpf}',
+    summary='Verificar se um CPF já está cadastrado (200 = sim, 404 = não)',
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+)
+async def existe_cpf(
+    cpf: Cpf,
+    sessoes: ShardsDependency,
+    incluir_arquivados: IncluirArquivadosQuery = False,
+) -> Response:
+    """Sem corpo; a maioria das respostas negativas sai do filtro de Bloom, sem consulta ao banco."""
+    if not await cpf_cadastrado(sessoes, cpf, modelos_atleta(incluir_arquivados)):
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(status_code=status.HTTP_200_OK)
 
 # --- ROTA: GET /{id} (Individual) ---
 @router.get(
@@ -112,17 +772,18 @@ async def query_all(db_session: DatabaseDependency) -> list[AtletaOut]:
     status_code=status.HTTP_200_OK,
     response_model=AtletaOut,
 )
-async def query_one(id: UUID4, db_session: DatabaseDependency) -> AtletaOut:
+async def query_one(
+    id: UUID4,
+    sessoes: ShardsDependency,
+    incluir_arquivados: IncluirArquivadosQuery = False,
+) -> AtletaOut:
     """Consulta e retorna um atleta específico pelo seu ID (UUID)."""
     
-    atleta: AtletaModel = (await db_session.execute(select(AtletaModel).filter_by(id=id))).scalars().first()
+    _, atleta = await localizar_atleta(sessoes, modelos_atleta(incluir_arquivados), id=id)
     
     if not atleta:
         # Usando Atleta/404 NOT FOUND com detalhe correto
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'Atleta não encontrado no id: {id}'
-        )
+        raise _nao_encontrado(id)
 
     # Retorna o modelo ORM, permitindo que o Pydantic o valide contra AtletaOut
     return atleta
@@ -134,32 +795,55 @@ async def query_one(id: UUID4, db_session: DatabaseDependency) -> AtletaOut:
     status_code=status.HTTP_200_OK,
     response_model=AtletaOut
 )
-async def patch(id: UUID4, db_session: DatabaseDependency, atleta_up: AtletaUpdate = Body(...)):
+async def patch(id: UUID4, sessoes: ShardsDependency, atleta_up: AtletaUpdate = Body(...)):
     """Atualiza os dados de um atleta pelo ID, permitindo apenas campos fornecidos."""
     
-    atleta: AtletaModel = (
-        await db_session.execute(select(AtletaModel).filter_by(id=id))
-    ).scalars().first()
+    # A alteração acontece na sessão do shard onde o atleta está
+    db_session, atleta = await localizar_atleta(sessoes, id=id)
     
     if not atleta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'Atleta não encontrado no id: {id}'
-        )
+        raise await erro_atleta_ausente(sessoes, id)
 
     # Uso de 'exclude_unset=True' para garantir que apenas os 
     # campos passados na requisição sejam atualizados, ignorando os não definidos.
     atleta_update = atleta_up.model_dump(exclude_unset=True)
+    # Lidos antes: o rollback expira o atleta
+    pk_id, cpf_anterior = atleta.pk_id, atleta.cpf
+    trocou_reserva = False
+    if atleta_update.get("cpf", atleta.cpf) != atleta.cpf:
+        if await cpf_cadastrado(sessoes, atleta_update["cpf"], modelos_unicidade_cpf()):
+            raise _conflito_cpf(atleta_update["cpf"])
+        if roteador.ativo:
+            # O novo CPF passa antes pelo UNIQUE do registro global
+            try:
+                await trocar_cpf_reservado(sessoes.principal, pk_id, atleta_update["cpf"])
+            except IntegrityError:
+                raise _conflito_cpf(atleta_update["cpf"])
+            trocou_reserva = True
     
     # Aplica as atualizações no modelo ORM
     for key, value in atleta_update.items():
         setattr(atleta, key, value)
 
-    await db_session.commit()
-    # Deve-se passar o objeto 'atleta' para o refresh
-    await db_session.refresh(atleta) 
+    # Peso/altura não são sobrescritos sem deixar rastro: cada alteração vira um ponto do histórico
+    if atleta_update.keys() & {"peso", "altura"}:
+        db_session.add(MedidaModel(atleta_id=atleta.pk_id, peso=atleta.peso, altura=atleta.altura))
+
+    try:
+        await db_session.flush()
+        atleta_out = AtletaOut.model_validate(atleta)
+        await publicar(db_session, "atletas", "atualizado", atleta_out.model_dump(mode="json"))
+        await db_session.commit()
+    except IntegrityError as e:
+        await db_session.rollback()
+        if trocou_reserva:
+            await trocar_cpf_reservado(sessoes.principal, pk_id, cpf_anterior)
+        # 409 só para o CPF repetido; outras violações (ex.: FOREIGN KEY) são erro interno, como no POST
+        raise _erro_cadastro(e, atleta_update.get("cpf"))
+    if "cpf" in atleta_update:
+        indice_cpfs.adicionar(atleta_out.cpf)
     
-    return atleta # Retorna o objeto atualizado
+    return atleta_out # Retorna o objeto atualizado
 
 # --- ROTA: DELETE /{id} ---
 @router.delete(
@@ -170,24 +854,26 @@ async def patch(id: UUID4, db_session: DatabaseDependency, atleta_up: AtletaUpda
     response_model=AtletaOut
 )
 # Tipagem de retorno é AtletaOut (o que será retornado)
-async def delete_atleta(id: UUID4, db_session: DatabaseDependency) -> AtletaOut:
+async def delete_atleta(id: UUID4, sessoes: ShardsDependency) -> AtletaOut:
     """Deleta um atleta pelo ID e retorna o objeto excluído."""
     
-    atleta: AtletaModel = (
-        await db_session.execute(select(AtletaModel).filter_by(id=id))
-    ).scalars().first()
+    db_session, atleta = await localizar_atleta(sessoes, id=id)
     
     if not atleta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'Atleta não encontrado no id: {id}'
-        )
+        raise await erro_atleta_ausente(sessoes, id)
     
     # Cria o modelo de resposta (AtletaOut) ANTES de deletar, pois depois da deleção 
     # o objeto ORM pode estar em um estado inválido para validação.
     atleta_out = AtletaOut.model_validate(atleta) 
 
     await db_session.delete(atleta)
+    # O histórico de medidas não tem FOREIGN KEY (ver MedidaModel): é removido explicitamente
+    await db_session.execute(delete(MedidaModel).where(MedidaModel.atleta_id == atleta.pk_id))
+    marcar_alteradas(db_session, MedidaModel.__tablename__)
+    await publicar(db_session, "atletas", "removido", atleta_out.model_dump(mode="json"))
     await db_session.commit()
+    if roteador.ativo:
+        # Depois do commit no shard: o CPF só fica livre quando o atleta realmente saiu
+        await liberar_reservas(sessoes.principal, [atleta_out.pk_id])
     
     return atleta_out # Retorna o objeto deletado
\ No newline at end of file
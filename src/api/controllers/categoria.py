@@ -1,14 +1,38 @@
 # src/controllers/categoria.py
+from typing import Union
 from uuid import uuid4
-from fastapi import APIRouter, Body, status
-from pydantic import UUID4
+from fastapi import APIRouter, Body, HTTPException, status
+from pydantic import UUID4, TypeAdapter
+from src.models.atleta import AtletaModel
 from src.models.categorias import CategoriaModel
 from src.schemas.categorias import CategoriaIn, CategoriaOut
-from src.api.dependencies import DatabaseDependency
+from src.schemas.elencos import CategoriaComAtletasOut
+from src.api.dependencies import (
+    DatabaseDependency, IncluirQuery, LimiteAtletasQuery, PaginacaoDependency, ShardsDependency, TotalQuery,
+)
+from src.configs.settings import settings
+from src.core.contagem import contar
+from src.core.elencos import carregar_elencos
+from src.core.listagens import chave_listagem, guardar_listagem, obter_listagem
+from src.core.shards import roteador
 from sqlalchemy.future import select
 
 router = APIRouter()
 
+# Serializam a listagem direto para bytes (o mesmo JSON do response_model), para o cache
+_LISTA = TypeAdapter(list[CategoriaOut])
+_LISTA_COM_ATLETAS = TypeAdapter(list[CategoriaComAtletasOut])
+
+
+def com_atletas(categoria: CategoriaModel, total_atletas: int) -> CategoriaComAtletasOut:
+    """Schema de saída com o elenco já carregado por carregar_elencos."""
+    return CategoriaComAtletasOut.model_validate({
+        **CategoriaOut.model_validate(categoria).model_dump(),
+        "atletas": categoria.atletas,
+        "total_atletas": total_atletas,
+    })
+
+
 @router.post(
     '/',
     summary='Criar nova Categoria',
@@ -32,6 +56,8 @@ async def post_categoria(
     db_session.add(categoria_model)
     await db_session.commit()
     await db_session.refresh(categoria_model)  # importante para pegar dados atualizados do DB
+    # Com sharding, a categoria também precisa existir nos shards (FK dos atletas)
+    await roteador.replicar(categoria_model)
 
     # Retornar como Pydantic
     return CategoriaOut.from_orm(categoria_model)
@@ -40,25 +66,67 @@ async def post_categoria(
     '/',
     summary='Consultar todas as categorias',
     status_code=status.HTTP_200_OK,
-    response_model=list[CategoriaOut],
+    response_model=Union[list[CategoriaComAtletasOut], list[CategoriaOut]],
 )
-async def query(db_session: DatabaseDependency) -> list[CategoriaOut]:
-    categorias: list[CategoriaOut] = (await db_session.execute(select(CategoriaModel))).scalars().all()
-    return categorias
+async def query(
+    db_session: DatabaseDependency,
+    sessoes: ShardsDependency,
+    paginacao: PaginacaoDependency,
+    total: TotalQuery = None,
+    incluir: IncluirQuery = None,
+    atletas_limite: LimiteAtletasQuery = settings.ELENCO_LIMITE_PADRAO,
+) -> list[CategoriaOut]:
+    # Entre escritas a listagem se repete: o JSON pronto vem do cache (src/core/listagens.py)
+    tabelas = [CategoriaModel.__tablename__]
+    if incluir == "atletas":
+        tabelas.append(AtletaModel.__tablename__)
+    chave = chave_listagem(
+        "categorias",
+        {"paginacao": [paginacao.limit, paginacao.offset], "total": total, "incluir": incluir,
+         "atletas_limite": atletas_limite if incluir else None},
+        tabelas,
+    )
+    guardada = await obter_listagem(chave)
+    if guardada is not None:
+        return guardada
+
+    consulta = select(CategoriaModel)
+    contagem = await contar(db_session, consulta, total) if total else None
+
+    categorias: list[CategoriaOut] = (
+        await db_session.execute(paginacao.aplicar(consulta, CategoriaModel.pk_id))
+    ).scalars().all()
+
+    if incluir == "atletas":
+        # Elencos de toda a página em uma única consulta
+        totais = await carregar_elencos(sessoes, categorias, atletas_limite)
+        corpo = _LISTA_COM_ATLETAS.dump_json([com_atletas(categoria, totais[categoria.pk_id]) for categoria in categorias])
+    else:
+        corpo = _LISTA.dump_json([CategoriaOut.model_validate(categoria) for categoria in categorias])
+    return await guardar_listagem(chave, corpo, contagem)
 
 @router.get(
     '/{id}',
     summary='Consultar uma categoria pelo id',
     status_code=status.HTTP_200_OK,
-    response_model=CategoriaOut,
+    response_model=Union[CategoriaComAtletasOut, CategoriaOut],
 )
-async def query(id: UUID4, db_session: DatabaseDependency) -> CategoriaOut:
+async def query(
+    id: UUID4,
+    db_session: DatabaseDependency,
+    sessoes: ShardsDependency,
+    incluir: IncluirQuery = None,
+    atletas_limite: LimiteAtletasQuery = settings.ELENCO_LIMITE_PADRAO,
+) -> CategoriaOut:
     categoria: CategoriaOut = (await db_session.execute(select(CategoriaModel).filter_by(id=id))).scalars().first()
     
     if not categoria:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Categoria não encontrada no id: {id}')
 
-    return categoria
+    if incluir == "atletas":
+        totais = await carregar_elencos(sessoes, [categoria], atletas_limite)
+        return com_atletas(categoria, totais[categoria.pk_id])
+    return CategoriaOut.model_validate(categoria)
 
 @router.patch(
     '/{id}',
@@ -88,6 +156,7 @@ async def patch_categoria(
     # 3. Salvar e atualizar
     await db_session.commit()
     await db_session.refresh(categoria)
+    await roteador.replicar(categoria)
 
     return categoria
 
@@ -107,6 +176,7 @@ async def delete_categoria(id: UUID4, db_session: DatabaseDependency) -> None:
     # 2. Remover do banco
     await db_session.delete(categoria)
     await db_session.commit()
+    await roteador.remover(CategoriaModel, categoria.pk_id)
     
     # 3. Retornar 204 No Content (padrão para DELETE bem-sucedido)
     # Não há retorno de objeto.
\ No newline at end of file
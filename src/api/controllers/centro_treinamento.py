@@ -1,15 +1,40 @@
-from uuid import uuid4
-from fastapi import APIRouter, Body, status, HTTPException # Adicionado HTTPException
-from pydantic import UUID4
+from typing import Annotated, Optional, Union
+from fastapi import APIRouter, Body, Header, Query, status, HTTPException # Adicionado HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import UUID4, TypeAdapter
+from src.models.atleta import AtletaModel
 from src.models.centro_treinamento import CentroTreinamentoModel
 from src.schemas.centros_treinamento import CentroTreinamentoIn, CentroTreinamentoOut, CentroTreinamentoPatch
-from src.api.dependencies import DatabaseDependency
+from src.schemas.elencos import CentroTreinamentoComAtletasOut
+from src.api.dependencies import (
+    DatabaseDependency, IncluirQuery, LimiteAtletasQuery, PaginacaoDependency, ShardsDependency, TotalQuery,
+)
+from src.configs.settings import settings
+from src.core.contagem import contar
+from src.core.elencos import carregar_elencos
+from src.core.eventos import broker, publicar
+from src.core.listagens import chave_listagem, guardar_listagem, obter_listagem
+from src.core.shards import roteador
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError # Importado IntegrityError
 
 
 router = APIRouter()
 
+# Serializam a listagem direto para bytes (o mesmo JSON do response_model), para o cache
+_LISTA = TypeAdapter(list[CentroTreinamentoOut])
+_LISTA_COM_ATLETAS = TypeAdapter(list[CentroTreinamentoComAtletasOut])
+
+
+def com_atletas(centro_treinamento: CentroTreinamentoModel, total_atletas: int) -> CentroTreinamentoComAtletasOut:
+    """Schema de saída com o elenco já carregado por carregar_elencos."""
+    return CentroTreinamentoComAtletasOut.model_validate({
+        **CentroTreinamentoOut.model_validate(centro_treinamento, from_attributes=True).model_dump(),
+        "atletas": centro_treinamento.atletas,
+        "total_atletas": total_atletas,
+    })
+
+
 @router.post(
     '/',
     summary='Criar novo Centro de Treinamento',
@@ -26,22 +51,26 @@ async def post_centro_treinamento(
     try:
         # Simplificação: Usar model_dump para passar todos os campos do Pydantic para o modelo SQLAlchemy.
         # Remove a geração manual de UUID, confiando no Pydantic ou no modelo.
-        centro_treinamento_out = CentroTreinamentoOut(
-            id=uuid4(), 
-            **centro_treinamento_in.model_dump()
-        )
         centro_treinamento_model = CentroTreinamentoModel(
             **centro_treinamento_in.model_dump() 
         )
 
         db_session.add(centro_treinamento_model)
-        await db_session.commit()
+        await db_session.flush()
+        # created_at é gerado pelo banco (func.now()), então é preciso recarregar antes do commit
         await db_session.refresh(centro_treinamento_model)
 
         # Usando model_validate (Pydantic V2)
-        return CentroTreinamentoOut.model_validate(centro_treinamento_model, from_attributes=True)
+        centro_treinamento_out = CentroTreinamentoOut.model_validate(centro_treinamento_model, from_attributes=True)
+        await publicar(db_session, "centros_treinamento", "criado", centro_treinamento_out.model_dump(mode="json"))
+        await db_session.commit()
+        # Com sharding, o CT também precisa existir nos shards (FK dos atletas)
+        await roteador.replicar(centro_treinamento_model)
+
+        return centro_treinamento_out
 
     except IntegrityError:
+        await db_session.rollback()
         # TRATAMENTO DE ERRO: Garante que o usuário receba 409 Conflict em vez de 500 Internal Error
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -53,27 +82,88 @@ async def post_centro_treinamento(
     '/',
     summary='Consultar todos os Centros de Treinamento',
     status_code=status.HTTP_200_OK,
-    response_model=list[CentroTreinamentoOut],
+    response_model=Union[list[CentroTreinamentoComAtletasOut], list[CentroTreinamentoOut]],
 )
-async def query_all(db_session: DatabaseDependency) -> list[CentroTreinamentoOut]:
-    centros_treinamento_out: list[CentroTreinamentoOut] = (await db_session.execute(select(CentroTreinamentoModel))).scalars().all()
-    
-    # Converte a lista de modelos SQLAlchemy para lista de schemas Pydantic
-    return [CentroTreinamentoOut.model_validate(ct, from_attributes=True) for ct in centros_treinamento_out]
+async def query_all(
+    db_session: DatabaseDependency,
+    sessoes: ShardsDependency,
+    paginacao: PaginacaoDependency,
+    total: TotalQuery = None,
+    incluir: IncluirQuery = None,
+    atletas_limite: LimiteAtletasQuery = settings.ELENCO_LIMITE_PADRAO,
+) -> list[CentroTreinamentoOut]:
+    # Entre escritas a listagem se repete: o JSON pronto vem do cache (src/core/listagens.py)
+    tabelas = [CentroTreinamentoModel.__tablename__]
+    if incluir == "atletas":
+        tabelas.append(AtletaModel.__tablename__)
+    chave = chave_listagem(
+        "centros_treinamento",
+        {"paginacao": [paginacao.limit, paginacao.offset], "total": total, "incluir": incluir,
+         "atletas_limite": atletas_limite if incluir else None},
+        tabelas,
+    )
+    guardada = await obter_listagem(chave)
+    if guardada is not None:
+        return guardada
+
+    consulta = select(CentroTreinamentoModel)
+    contagem = await contar(db_session, consulta, total) if total else None
+
+    centros_treinamento_out: list[CentroTreinamentoOut] = (
+        await db_session.execute(paginacao.aplicar(consulta, CentroTreinamentoModel.pk_id))
+    ).scalars().all()
+
+    if incluir == "atletas":
+        # Elencos de toda a página em uma única consulta
+        totais = await carregar_elencos(sessoes, centros_treinamento_out, atletas_limite)
+        corpo = _LISTA_COM_ATLETAS.dump_json([com_atletas(ct, totais[ct.pk_id]) for ct in centros_treinamento_out])
+    else:
+        # Converte a lista de modelos SQLAlchemy para lista de schemas Pydantic
+        corpo = _LISTA.dump_json(
+            [CentroTreinamentoOut.model_validate(ct, from_attributes=True) for ct in centros_treinamento_out]
+        )
+    return await guardar_listagem(chave, corpo, contagem)
+
+
+# Declarada antes de '/{id}' para que 'stream' não seja interpretado como um UUID.
+@router.get(
+    '/stream',
+    summary='Acompanhar alterações de Centros de Treinamento em tempo real (SSE)',
+    response_class=StreamingResponse,
+)
+async def stream_centros_treinamento(
+    ultimo_id: Annotated[Optional[int], Query(description='Retoma a partir deste id de evento')] = None,
+    last_event_id: Annotated[Optional[int], Header()] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        broker.stream("centros_treinamento", last_event_id if last_event_id is not None else ultimo_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get(
     '/{id}',
     summary='Consultar um Centro de Treinamento pelo id',
     status_code=status.HTTP_200_OK,
-    response_model=CentroTreinamentoOut,
+    response_model=Union[CentroTreinamentoComAtletasOut, CentroTreinamentoOut],
 )
-async def query_by_id(id: UUID4, db_session: DatabaseDependency) -> CentroTreinamentoOut:
+async def query_by_id(
+    id: UUID4,
+    db_session: DatabaseDependency,
+    sessoes: ShardsDependency,
+    incluir: IncluirQuery = None,
+    atletas_limite: LimiteAtletasQuery = settings.ELENCO_LIMITE_PADRAO,
+) -> CentroTreinamentoOut:
     centro_treinamento = (await db_session.execute(select(CentroTreinamentoModel).filter_by(id=id))).scalars().first()
     
     if not centro_treinamento:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Centro de treinamento não encontrado no id: {id}')
 
+    if incluir == "atletas":
+        totais = await carregar_elencos(sessoes, [centro_treinamento], atletas_limite)
+        return com_atletas(centro_treinamento, totais[centro_treinamento.pk_id])
+
     # Converte o modelo SQLAlchemy para schema Pydantic
     return CentroTreinamentoOut.model_validate(centro_treinamento, from_attributes=True)
 
@@ -108,12 +198,16 @@ async def patch_centro_treinamento(
             setattr(centro_treinamento, key, value)
 
         # 3. Salvar e atualizar
+        await db_session.flush()
+        centro_treinamento_out = CentroTreinamentoOut.model_validate(centro_treinamento, from_attributes=True)
+        await publicar(db_session, "centros_treinamento", "atualizado", centro_treinamento_out.model_dump(mode="json"))
         await db_session.commit()
-        await db_session.refresh(centro_treinamento)
+        await roteador.replicar(centro_treinamento)
 
-        return CentroTreinamentoOut.model_validate(centro_treinamento, from_attributes=True)
+        return centro_treinamento_out
 
     except IntegrityError:
+        await db_session.rollback()
         # Certifique-se de que o campo 'nome' está na requisição para não dar erro aqui
         nome_tentado = centro_treinamento_in.nome if centro_treinamento_in.nome else "Um nome" 
         raise HTTPException(
@@ -138,8 +232,11 @@ async def delete_centro_treinamento(id: UUID4, db_session: DatabaseDependency) -
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Centro de treinamento não encontrado no id: {id}')
 
     # 2. Remover do banco
+    centro_treinamento_out = CentroTreinamentoOut.model_validate(centro_treinamento, from_attributes=True)
     await db_session.delete(centro_treinamento)
+    await publicar(db_session, "centros_treinamento", "removido", centro_treinamento_out.model_dump(mode="json"))
     await db_session.commit()
+    await roteador.remover(CentroTreinamentoModel, centro_treinamento.pk_id)
     
     # Retorna 204 No Content (corpo vazio), conforme o padrão REST para DELETE
     return
\ No newline at end of file
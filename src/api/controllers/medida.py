@@ -0,0 +1,187 @@
+# src/controllers/medida.py
+from datetime import datetime, timezone
+from typing import Annotated, Optional, Union
+from uuid import uuid4
+from fastapi import APIRouter, Body, HTTPException, Query, status
+from pydantic import UUID4
+from sqlalchemy import func, insert, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.api.controllers.atleta import erro_atleta_ausente, localizar_atleta
+from src.api.dependencies import DatabaseDependency, ShardsDependency
+from src.configs.settings import settings
+from src.core.cache import marcar_alteradas
+from src.core.eventos import publicar
+from src.core.shards import SessoesShards
+from src.models.atleta import AtletaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+from src.models.medida import MedidaModel
+from src.schemas.atleta import AtletaOut
+from src.schemas.medidas import (
+    Agregacao, MedidaAgregadaOut, MedidaIn, MedidaOut, MedidasLoteIn, MedidasLoteOut
+)
+
+router = APIRouter()
+
+_COLUNAS = ("id", "atleta_id", "peso", "altura", "medido_em")
+
+
+async def get_atleta_or_404(
+    sessoes: SessoesShards, id: UUID4, modelos: tuple = (AtletaModel,)
+) -> tuple[AsyncSession, AtletaModel | AtletaArquivoModel]:
+    """
+    Atleta pelo id e a sessão do shard onde ele (e as suas medidas) está. Fora da
+    tabela quente, o registro de medidas num arquivado dá 409 (ver erro_atleta_ausente).
+    """
+    db_session, atleta = await localizar_atleta(sessoes, modelos, id=id)
+    if not atleta:
+        if AtletaArquivoModel not in modelos:
+            raise await erro_atleta_ausente(sessoes, id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Atleta não encontrado no id: {id}')
+    return db_session, atleta
+
+
+def _utc(momento: Optional[datetime]) -> datetime:
+    """Medições sem fuso são consideradas em UTC."""
+    if momento is None:
+        return datetime.now(timezone.utc)
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+async def registrar_medidas(db_session: DatabaseDependency, atleta: AtletaModel, medidas: list[MedidaIn]) -> int:
+    """
+    Grava as medidas na transação corrente e, se a mais recente delas for também a mais
+    recente do histórico, atualiza o peso/altura atuais do atleta.
+    """
+    linhas = [
+        {"id": uuid4(), "atleta_id": atleta.pk_id, "peso": m.peso, "altura": m.altura, "medido_em": _utc(m.medido_em)}
+        for m in medidas
+    ]
+    ultima_gravada = (await db_session.execute(
+        select(func.max(MedidaModel.medido_em)).where(MedidaModel.atleta_id == atleta.pk_id)
+    )).scalar()
+
+    if db_session.bind.dialect.name == "postgresql" and len(linhas) > 1:
+        # COPY (protocolo binário) na mesma conexão/transação: muito mais rápido que INSERTs
+        conexao = await db_session.connection()
+        bruta = (await conexao.get_raw_connection()).driver_connection
+        await bruta.copy_records_to_table(
+            MedidaModel.__tablename__,
+            columns=list(_COLUNAS),
+            records=[tuple(linha[c] for c in _COLUNAS) for linha in linhas],
+        )
+    else:
+        await db_session.execute(insert(MedidaModel), linhas)
+    # Inserções fora da unidade de trabalho do ORM: avisa os caches manualmente
+    marcar_alteradas(db_session, MedidaModel.__tablename__)
+
+    # Medida conta como atividade: adia o arquivamento do atleta
+    atleta.ultima_atividade_em = datetime.now(timezone.utc)
+
+    mais_recente = max(linhas, key=lambda linha: linha["medido_em"])
+    if ultima_gravada is None or mais_recente["medido_em"] >= _utc(ultima_gravada):
+        if mais_recente["peso"] is not None:
+            atleta.peso = mais_recente["peso"]
+        if mais_recente["altura"] is not None:
+            atleta.altura = mais_recente["altura"]
+        await db_session.flush()
+        await publicar(db_session, "atletas", "atualizado", AtletaOut.model_validate(atleta).model_dump(mode="json"))
+    return len(linhas)
+
+
+def _periodo(dialeto: str, agregacao: Agregacao):
+    """Expressão SQL com o início do período (dia/semana/mês) de cada medida."""
+    coluna = MedidaModel.medido_em
+    if dialeto == "postgresql":
+        # Literal (e não parâmetro) para o GROUP BY reconhecer a mesma expressão do SELECT
+        unidade = {"dia": "'day'", "semana": "'week'", "mes": "'month'"}[agregacao]
+        return func.date_trunc(literal_column(unidade), coluna)
+    # SQLite (ambiente local/testes); semanas começam na segunda-feira, como no PostgreSQL
+    return {
+        "dia": func.date(coluna),
+        "semana": func.date(coluna, "weekday 0", "-6 days"),
+        "mes": func.date(coluna, "start of month"),
+    }[agregacao]
+
+
+@router.post(
+    '/{id}/medidas',
+    summary='Registrar uma medida (peso/altura) do atleta',
+    status_code=status.HTTP_201_CREATED,
+    response_model=MedidaOut,
+)
+async def post_medida(id: UUID4, sessoes: ShardsDependency, medida_in: MedidaIn = Body(...)) -> MedidaOut:
+    db_session, atleta = await get_atleta_or_404(sessoes, id)
+    medida = medida_in.model_copy(update={"medido_em": _utc(medida_in.medido_em)})
+    await registrar_medidas(db_session, atleta, [medida])
+    await db_session.commit()
+    return MedidaOut(peso=medida.peso, altura=medida.altura, medido_em=medida.medido_em)
+
+
+@router.post(
+    '/{id}/medidas/lote',
+    summary='Registrar medidas em lote (dispositivos vestíveis, balanças)',
+    status_code=status.HTTP_201_CREATED,
+    response_model=MedidasLoteOut,
+)
+async def post_medidas_lote(id: UUID4, sessoes: ShardsDependency, lote: MedidasLoteIn = Body(...)) -> MedidasLoteOut:
+    db_session, atleta = await get_atleta_or_404(sessoes, id)
+    inseridas = await registrar_medidas(db_session, atleta, lote.medidas)
+    await db_session.commit()
+    return MedidasLoteOut(inseridas=inseridas)
+
+
+@router.get(
+    '/{id}/medidas',
+    summary='Consultar o histórico de medidas do atleta',
+    status_code=status.HTTP_200_OK,
+    response_model=Union[list[MedidaOut], list[MedidaAgregadaOut]],
+)
+async def query_medidas(
+    id: UUID4,
+    sessoes: ShardsDependency,
+    inicio: Annotated[Optional[datetime], Query(description='Início do intervalo (inclusive)')] = None,
+    fim: Annotated[Optional[datetime], Query(description='Fim do intervalo (exclusivo)')] = None,
+    agregacao: Annotated[Optional[Agregacao], Query(description='Agrupa por dia, semana ou mês')] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.MEDIDAS_PONTOS_MAX)] = settings.MEDIDAS_PONTOS_MAX,
+):
+    """
+    Sem `agregacao`, devolve os pontos brutos em ordem cronológica (até `limit`).
+    Com `agregacao`, o banco calcula um ponto por período (média/mín/máx), para gráficos
+    de intervalos longos sem trafegar milhões de pontos.
+    """
+    # O histórico continua disponível para atletas arquivados
+    db_session, atleta = await get_atleta_or_404(sessoes, id, (AtletaModel, AtletaArquivoModel))
+
+    filtros = [MedidaModel.atleta_id == atleta.pk_id]
+    if inicio is not None:
+        filtros.append(MedidaModel.medido_em >= _utc(inicio))
+    if fim is not None:
+        filtros.append(MedidaModel.medido_em < _utc(fim))
+
+    if agregacao is None:
+        linhas = (await db_session.execute(
+            select(MedidaModel.peso, MedidaModel.altura, MedidaModel.medido_em)
+            .where(*filtros)
+            .order_by(MedidaModel.medido_em)
+            .limit(limit)
+        )).mappings().all()
+        return [MedidaOut.model_validate(dict(linha)) for linha in linhas]
+
+    periodo = _periodo(db_session.bind.dialect.name, agregacao).label("periodo")
+    linhas = (await db_session.execute(
+        select(
+            periodo,
+            func.count().label("quantidade"),
+            func.avg(MedidaModel.peso).label("peso_medio"),
+            func.min(MedidaModel.peso).label("peso_min"),
+            func.max(MedidaModel.peso).label("peso_max"),
+            func.avg(MedidaModel.altura).label("altura_media"),
+        )
+        .where(*filtros)
+        .group_by(periodo)
+        .order_by(periodo)
+        .limit(limit)
+    )).mappings().all()
+    return [MedidaAgregadaOut.model_validate(dict(linha)) for linha in linhas]
@@ -1,7 +1,77 @@
 # src/dependencies.py
-from typing import Annotated
-from fastapi import Depends
+from dataclasses import dataclass
+import secrets
+from typing import Annotated, AsyncGenerator, Literal, Optional
+from fastapi import Depends, Header, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from src.configs.settings import settings
+from src.core.contagem import ModoTotal
 from src.core.database import get_session
+from src.core.shards import SessoesShards
 
 DatabaseDependency = Annotated[AsyncSession, Depends(get_session)]
+
+
+async def get_sessoes(db_session: DatabaseDependency) -> AsyncGenerator[SessoesShards, None]:
+    """Sessões por shard da requisição (sem sharding, todas são a própria db_session)."""
+    sessoes = SessoesShards(db_session)
+    try:
+        yield sessoes
+    finally:
+        await sessoes.fechar()
+
+
+ShardsDependency = Annotated[SessoesShards, Depends(get_sessoes)]
+
+
+# --- PAGINAÇÃO ---
+@dataclass
+class Paginacao:
+    limit: Optional[int] = None
+    offset: int = 0
+
+    def aplicar(self, consulta: Select, *ordem) -> Select:
+        """Aplica LIMIT/OFFSET com ordenação estável (sem paginação, a consulta não muda)."""
+        if self.limit is None and not self.offset:
+            return consulta
+        return consulta.order_by(*ordem).limit(self.limit).offset(self.offset)
+
+
+async def get_paginacao(
+    limit: Annotated[Optional[int], Query(ge=1, description='Quantidade máxima de registros')] = None,
+    offset: Annotated[int, Query(ge=0, description='Registros a pular')] = 0,
+) -> Paginacao:
+    return Paginacao(limit=limit, offset=offset)
+
+
+PaginacaoDependency = Annotated[Paginacao, Depends(get_paginacao)]
+
+# ?total=exato|aproximado -> devolve o total da listagem no cabeçalho X-Total-Count
+TotalQuery = Annotated[
+    Optional[ModoTotal],
+    Query(description='Inclui o cabeçalho X-Total-Count: "exato" (count) ou "aproximado" (estimativa do banco)'),
+]
+
+
+# --- ELENCOS (?incluir=atletas) ---
+IncluirQuery = Annotated[
+    Optional[Literal["atletas"]],
+    Query(description='Embute os atletas de cada registro (carregados em lote, uma consulta por página)'),
+]
+LimiteAtletasQuery = Annotated[
+    int,
+    Query(ge=1, le=settings.ELENCO_LIMITE_MAX, description='Máximo de atletas embutidos por registro'),
+]
+
+
+# --- ADMINISTRAÇÃO ---
+async def verificar_admin(x_admin_token: Annotated[Optional[str], Header()] = None) -> None:
+    """Rotas /admin exigem X-Admin-Token; sem ADMIN_TOKEN configurado elas nem aparecem (404)."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de administração inválido")
+
+
+AdminDependency = Depends(verificar_admin)
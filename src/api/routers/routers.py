@@ -1,11 +1,15 @@
 from fastapi import APIRouter
 
+from src.api.controllers.admin import router as admin_router
 from src.api.controllers.atleta import router as atleta_router
 from src.api.controllers.categoria import router as categoria_router
 from src.api.controllers.centro_treinamento import router as centro_treinamento_router 
+from src.api.controllers.medida import router as medida_router
+from src.api.dependencies import AdminDependency
 api_router = APIRouter()
 api_router.include_router(atleta_router, prefix="/atletas", tags=["Atletas"])
+api_router.include_router(medida_router, prefix="/atletas", tags=["Medidas"])
 api_router.include_router(categoria_router, prefix="/categorias", tags=["Categorias"])
 api_router.include_router(centro_treinamento_router, prefix="/centros-treinamento",
                       tags=["Centros de Treinamento"])
-
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"], dependencies=[AdminDependency])
@@ -1,13 +1,80 @@
 # /src/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from src.api.controllers.atleta import agrupador_cadastros
 from src.api.routers.routers import api_router
+from src.configs.settings import settings
+from src.core.arquivamento import tarefa_periodica
+from src.core.bloom import indice_cpfs
+from src.core.cache import CANAL_INVALIDACAO, receber_invalidacao
+from src.core.cache_backends import cache
+from src.core.compressao import CompressaoMiddleware
+from src.core.eventos import broker
+from src.core.outbox import despachante
+from src.core.perfil import PerfilMiddleware, armazenamento_perfis
+from src.core.shards import roteador, tarefa_sincronizacao
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia e encerra os serviços de segundo plano junto com a aplicação."""
+    # Conexão LISTEN única do processo, que alimenta os streams SSE e recebe as
+    # invalidações de cache feitas pelos outros workers
+    broker.escutar(CANAL_INVALIDACAO, receber_invalidacao)
+    await broker.iniciar()
+    # Move periodicamente os atletas inativos para a tabela de arquivo
+    arquivamento = asyncio.create_task(tarefa_periodica()) if settings.ARQUIVAMENTO_ATIVO else None
+    # Filtro de CPFs montado em segundo plano (até ficar pronto, as checagens vão ao banco)
+    filtro_cpfs = None
+    if settings.CPF_BLOOM_ATIVO:
+        broker.observar("atletas", indice_cpfs.ao_evento)
+        filtro_cpfs = asyncio.create_task(indice_cpfs.tarefa_periodica(settings.CPF_BLOOM_INTERVALO))
+    # Entrega da outbox para as integrações (pode rodar em um processo à parte)
+    outbox = asyncio.create_task(despachante.executar()) if settings.OUTBOX_DESPACHANTE_ATIVO else None
+    # Réplicas de categorias/CTs que ficaram para trás e reservas órfãs do registro global
+    sincronizacao = asyncio.create_task(tarefa_sincronizacao()) if roteador.ativo else None
+    yield
+    for tarefa in (arquivamento, filtro_cpfs, outbox, sincronizacao):
+        if tarefa is not None:
+            tarefa.cancel()
+            await asyncio.gather(tarefa, return_exceptions=True)
+    # Cadastros ainda aguardando a janela do lote são gravados antes de sair
+    await agrupador_cadastros.esvaziar()
+    await broker.parar()
+    await cache.fechar()
+    # Pools dos shards (o do banco principal é encerrado pelo próprio processo)
+    await roteador.encerrar()
+
 
 # Inicializa a aplicação principal FastAPI
 app = FastAPI(
     title="WorkoutApi",
     version="0.1.0",
-    description="API para um sistema de gestão de treinos."
+    description="API para um sistema de gestão de treinos.",
+    lifespan=lifespan,
 )
 
+# Comprime as respostas (gzip/brotli/zstd) conforme o Accept-Encoding do cliente
+if settings.COMPRESSAO_ATIVA:
+    app.add_middleware(
+        CompressaoMiddleware,
+        tamanho_minimo=settings.COMPRESSAO_TAMANHO_MINIMO,
+        nivel_gzip=settings.COMPRESSAO_NIVEL_GZIP,
+        nivel_brotli=settings.COMPRESSAO_NIVEL_BROTLI,
+        nivel_zstd=settings.COMPRESSAO_NIVEL_ZSTD,
+        cache_max_bytes=settings.COMPRESSAO_CACHE_MAX_BYTES,
+    )
+
+# Profiling por amostragem ou pelo cabeçalho X-Perfil (desligado, nem é instalado)
+if settings.PERFIL_ATIVO:
+    app.add_middleware(
+        PerfilMiddleware,
+        armazenamento=armazenamento_perfis,
+        amostragem=settings.PERFIL_AMOSTRAGEM,
+        token=settings.ADMIN_TOKEN,
+        intervalo_lag=settings.PERFIL_LAG_INTERVALO_MS / 1000,
+    )
+
 # Inclui o roteador principal que agrega todos os endpoints
 app.include_router(api_router)
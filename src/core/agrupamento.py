@@ -0,0 +1,78 @@
+# src/core/agrupamento.py
+"""
+Agrupamento (coalescing) de escritas concorrentes.
+
+Requisições que chegam quase ao mesmo tempo entregam seu item ao agrupador e
+aguardam. O agrupador junta os itens por uma janela curta (`janela` segundos) ou
+até `maximo` itens, e processa todos de uma vez (ex.: um INSERT de várias linhas
+em uma única transação, pagando um único flush de WAL/commit).
+
+A função de processamento recebe a lista de itens e devolve, na mesma ordem, o
+resultado de cada um ou a exceção daquele item (ex.: CPF duplicado); cada
+requisição recebe apenas o que é seu. Se a função falhar por inteiro, a exceção
+vai para todos os itens do lote.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+Processador = Callable[[list[T]], Awaitable[list[R | BaseException]]]
+
+
+class AgrupadorEscritas(Generic[T, R]):
+    def __init__(self, processar: Processador, janela: float, maximo: int) -> None:
+        self.processar = processar
+        self.janela = janela
+        self.maximo = maximo
+        self._pendentes: list[tuple[T, asyncio.Future]] = []
+        self._temporizador: asyncio.TimerHandle | None = None
+        self._lotes: set[asyncio.Task] = set()
+
+    async def enviar(self, item: T) -> R:
+        """Entrega um item para o próximo lote e aguarda o resultado dele."""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendentes.append((item, futuro))
+
+        if len(self._pendentes) >= self.maximo:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.janela, self._despachar)
+        return await futuro
+
+    def _despachar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            # Referência forte até o fim: o loop guarda só referências fracas das tasks
+            tarefa = asyncio.create_task(self._executar(lote))
+            self._lotes.add(tarefa)
+            tarefa.add_done_callback(self._lotes.discard)
+
+    async def _executar(self, lote: list[tuple[T, asyncio.Future]]) -> None:
+        try:
+            resultados = await self.processar([item for item, _ in lote])
+        except Exception as erro:
+            logger.exception("Falha ao processar lote de %d itens", len(lote))
+            resultados = [erro] * len(lote)
+
+        for (_, futuro), resultado in zip(lote, resultados):
+            if futuro.done():  # requisição cancelada (cliente desconectou)
+                continue
+            if isinstance(resultado, BaseException):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    async def esvaziar(self) -> None:
+        """Processa o que estiver pendente e aguarda os lotes em andamento (encerramento da aplicação)."""
+        self._despachar()
+        if self._lotes:
+            await asyncio.gather(*self._lotes, return_exceptions=True)
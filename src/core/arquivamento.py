@@ -0,0 +1,98 @@
+# src/core/arquivamento.py
+"""
+Arquivamento de atletas inativos: move de `atletas` (camada quente) para
+`atletas_arquivo` (camada fria) quem está há ARQUIVAMENTO_INATIVIDADE_DIAS sem atividade.
+
+- Cada lote (ARQUIVAMENTO_LOTE atletas) é uma transação curta: INSERT no arquivo +
+  DELETE na tabela quente. Entre lotes há uma pausa para não competir com o tráfego.
+- No PostgreSQL as linhas são travadas com FOR UPDATE SKIP LOCKED: vários workers
+  podem rodar a tarefa ao mesmo tempo sem disputar (nem duplicar) os mesmos atletas.
+- O histórico de medidas não é movido: ele é ligado ao pk_id, que se mantém no arquivo.
+
+Execução avulsa (ex.: cron):
+    poetry run python -m src.core.arquivamento
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from src.configs.settings import settings
+from src.core.cache import marcar_alteradas
+from src.core.database import async_session
+from src.core.shards import roteador
+from src.models.atleta import AtletaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+
+logger = logging.getLogger(__name__)
+
+_COLUNAS = (
+    "pk_id", "id", "nome", "cpf", "idade", "peso", "altura", "sexo",
+    "created_at", "ultima_atividade_em", "categoria_id", "centro_treinamento_id",
+)
+
+
+async def arquivar_lote(limite: datetime, tamanho: int, fabrica: sessionmaker = async_session) -> int:
+    """Move até `tamanho` atletas inativos desde `limite` para o arquivo. Retorna quantos moveu."""
+    async with fabrica() as session:
+        async with session.begin():
+            pk_ids = (await session.execute(
+                select(AtletaModel.pk_id)
+                .where(AtletaModel.ultima_atividade_em < limite)
+                .order_by(AtletaModel.pk_id)
+                .limit(tamanho)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            if not pk_ids:
+                return 0
+
+            colunas = [getattr(AtletaModel, coluna) for coluna in _COLUNAS]
+            await session.execute(
+                insert(AtletaArquivoModel).from_select(
+                    [*_COLUNAS, "arquivado_em"],
+                    select(*colunas, func.current_timestamp()).where(AtletaModel.pk_id.in_(pk_ids)),
+                )
+            )
+            await session.execute(delete(AtletaModel).where(AtletaModel.pk_id.in_(pk_ids)))
+            marcar_alteradas(session, AtletaModel.__tablename__, AtletaArquivoModel.__tablename__)
+    return len(pk_ids)
+
+
+async def arquivar_inativos(
+    inatividade_dias: int = settings.ARQUIVAMENTO_INATIVIDADE_DIAS,
+    tamanho_lote: int = settings.ARQUIVAMENTO_LOTE,
+    pausa: float = settings.ARQUIVAMENTO_PAUSA,
+) -> int:
+    """Executa lotes até não restar atleta inativo (em cada shard). Retorna o total arquivado."""
+    limite = datetime.now(timezone.utc) - timedelta(days=inatividade_dias)
+    total = 0
+    # O arquivo fica no mesmo banco dos atletas: cada shard arquiva os seus
+    for shard, fabrica in roteador.fabricas():
+        while True:
+            movidos = await arquivar_lote(limite, tamanho_lote, fabrica)
+            total += movidos
+            if movidos:
+                logger.info("Arquivamento (%s): %d atletas movidos (%d no total)", shard, movidos, total)
+            if movidos < tamanho_lote:
+                break
+            await asyncio.sleep(pausa)
+    return total
+
+
+async def tarefa_periodica(intervalo: float = settings.ARQUIVAMENTO_INTERVALO) -> None:
+    """Laço de segundo plano iniciado pelo lifespan da aplicação (ARQUIVAMENTO_ATIVO=true)."""
+    while True:
+        try:
+            await arquivar_inativos()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Falha no arquivamento de atletas inativos")
+        await asyncio.sleep(intervalo)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"{asyncio.run(arquivar_inativos())} atletas arquivados")
@@ -0,0 +1,135 @@
+# src/core/bloom.py
+"""
+Filtro de Bloom dos CPFs cadastrados, em memória, para checagens de existência
+(`HEAD /atletas/cpf/{cpf}`, validação do cadastro) sem ir ao banco.
+
+Um filtro de Bloom nunca dá falso negativo: se ele diz que o CPF não existe, não
+existe, e a resposta sai sem consulta. Se diz que "pode existir" (CPF cadastrado ou
+falso positivo, ~CPF_BLOOM_TAXA_ERRO), o banco confirma.
+
+- É montado no início da aplicação em segundo plano (atletas e arquivo, de todos os
+  shards); enquanto não fica pronto, toda checagem vai ao banco.
+- Recebe os CPFs gravados pelo próprio processo e, pelo feed de eventos
+  (LISTEN/NOTIFY), os gravados pelos outros processos.
+- Remoções não saem do filtro (viram falsos positivos) e o filtro é remontado a cada
+  CPF_BLOOM_INTERVALO segundos, o que também o redimensiona conforme a base cresce
+  e cobre eventos perdidos enquanto a conexão LISTEN esteve caída.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+from typing import Iterator
+
+from sqlalchemy import func, select
+
+from src.configs.settings import settings
+from src.core.eventos import Evento
+from src.core.shards import roteador
+from src.models.atleta import AtletaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+
+logger = logging.getLogger(__name__)
+
+# CPFs lidos do banco por ida ao servidor durante a montagem
+_LOTE_CARGA = 10_000
+
+
+class FiltroBloom:
+    """Conjunto probabilístico de strings (bits em um bytearray, hashing duplo sobre blake2b)."""
+
+    def __init__(self, capacidade: int, taxa_erro: float) -> None:
+        capacidade = max(1, capacidade)
+        # Tamanho e quantidade de funções de hash ótimos para a capacidade/taxa pedidas
+        self.tamanho = max(8, math.ceil(-capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+        self.funcoes = max(1, round(self.tamanho / capacidade * math.log(2)))
+        self.quantidade = 0
+        self._bits = bytearray((self.tamanho + 7) // 8)
+
+    def _posicoes(self, valor: str) -> Iterator[int]:
+        resumo = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(resumo[:8], "little")
+        h2 = int.from_bytes(resumo[8:], "little") | 1
+        return ((h1 + i * h2) % self.tamanho for i in range(self.funcoes))
+
+    def adicionar(self, valor: str) -> None:
+        for posicao in self._posicoes(valor):
+            self._bits[posicao >> 3] |= 1 << (posicao & 7)
+        self.quantidade += 1
+
+    def __contains__(self, valor: str) -> bool:
+        return all(self._bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(valor))
+
+
+class IndiceCpfs:
+    def __init__(self, capacidade_minima: int, taxa_erro: float) -> None:
+        self.capacidade_minima = capacidade_minima
+        self.taxa_erro = taxa_erro
+        self._filtro: FiltroBloom | None = None
+        # CPFs gravados durante uma (re)montagem: entram no filtro novo antes da troca
+        self._durante_carga: list[str] | None = None
+
+    @property
+    def pronto(self) -> bool:
+        return self._filtro is not None
+
+    def pode_existir(self, cpf: str) -> bool:
+        """False = o CPF certamente não está cadastrado. True = é preciso confirmar no banco."""
+        return self._filtro is None or cpf in self._filtro
+
+    def adicionar(self, cpf: str) -> None:
+        if self._filtro is not None:
+            self._filtro.adicionar(cpf)
+        if self._durante_carga is not None:
+            self._durante_carga.append(cpf)
+
+    def ao_evento(self, evento: Evento) -> None:
+        """Observador do canal "atletas" do broker (cadastros e alterações de outros processos)."""
+        cpf = evento.dados.get("cpf")
+        if cpf:
+            self.adicionar(cpf)
+
+    async def carregar(self) -> int:
+        """Monta um filtro novo com todos os CPFs e o coloca no lugar do atual. Retorna quantos leu."""
+        self._durante_carga = []
+        try:
+            total = 0
+            for _, fabrica in roteador.fabricas():
+                async with fabrica() as sessao:
+                    for modelo in (AtletaModel, AtletaArquivoModel):
+                        total += (await sessao.execute(select(func.count()).select_from(modelo))).scalar()
+
+            # Folga para o crescimento até a próxima montagem sem estourar a taxa de erro
+            filtro = FiltroBloom(max(self.capacidade_minima, 2 * total), self.taxa_erro)
+            for _, fabrica in roteador.fabricas():
+                async with fabrica() as sessao:
+                    for modelo in (AtletaModel, AtletaArquivoModel):
+                        cpfs = await sessao.stream_scalars(
+                            select(modelo.cpf).execution_options(yield_per=_LOTE_CARGA)
+                        )
+                        async for cpf in cpfs:
+                            filtro.adicionar(cpf)
+            lidos = filtro.quantidade
+            for cpf in self._durante_carga:
+                filtro.adicionar(cpf)
+            self._filtro = filtro
+        finally:
+            self._durante_carga = None
+        return lidos
+
+    async def tarefa_periodica(self, intervalo: float) -> None:
+        """Monta o filtro no início e, com `intervalo` > 0, o remonta periodicamente."""
+        while True:
+            try:
+                lidos = await self.carregar()
+                logger.info("Filtro de CPFs montado com %d CPFs", lidos)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Falha ao montar o filtro de CPFs")
+            if not intervalo:
+                return
+            await asyncio.sleep(intervalo)
+
+
+indice_cpfs = IndiceCpfs(settings.CPF_BLOOM_CAPACIDADE, settings.CPF_BLOOM_TAXA_ERRO)
@@ -0,0 +1,168 @@
+# src/core/cache.py
+"""
+Versões por tabela para invalidação de caches.
+
+Cada commit que altera uma tabela dá a ela uma versão nova. Um valor em cache
+guarda a versão da(s) tabela(s) de quando foi calculado; se a versão atual for
+diferente, o valor está desatualizado e é descartado.
+
+As tabelas alteradas são detectadas automaticamente nos flushes do ORM. Escritas
+feitas com `insert()`/`update()` diretos (fora da unidade de trabalho do ORM)
+devem ser registradas com `marcar_alteradas(...)`.
+
+Com vários processos (workers), as versões precisam andar juntas: no PostgreSQL o
+commit que altera tabelas executa, na própria transação, um `pg_notify` no canal
+"cache_invalidacao" com as tabelas e a versão nova. A conexão LISTEN de cada
+processo (src/core/eventos.py) recebe a mensagem e aplica a versão, de modo que o
+cache de todos os workers, local ou compartilhado (src/core/cache_backends.py),
+deixa de usar os valores antigos em milissegundos. Em outros bancos (SQLite) as
+versões são só do processo.
+
+As versões são relógios híbridos (microssegundos do relógio de parede, sempre
+maiores que qualquer versão já vista) e cada processo fica com a maior recebida:
+a ordem de chegada das mensagens de bancos diferentes (shards) não importa.
+"""
+import json
+import os
+import time
+from collections import defaultdict, deque
+from itertools import chain
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.configs.settings import settings
+
+# Canal do PostgreSQL usado para difundir as invalidações entre os processos
+CANAL_INVALIDACAO = "cache_invalidacao"
+
+
+def _relogio_us() -> int:
+    return time.time_ns() // 1000
+
+
+class VersoesTabelas:
+    def __init__(self) -> None:
+        # Versão inicial única por processo: valores gravados no cache compartilhado por
+        # outro processo, com versões que este não conhece, nunca são reaproveitados
+        self._inicial = _relogio_us()
+        self._maior = self._inicial
+        self._versoes: defaultdict[str, int] = defaultdict(lambda: self._inicial)
+
+    def versao(self, *tabelas: str) -> tuple[int, ...]:
+        return tuple(self._versoes[tabela] for tabela in tabelas)
+
+    def proxima(self) -> int:
+        """Versão nova, maior que todas as já vistas por este processo."""
+        self._maior = max(_relogio_us(), self._maior + 1)
+        return self._maior
+
+    def invalidar(self, *tabelas: str, versao: int | None = None) -> None:
+        self.aplicar(tabelas, versao or self.proxima())
+
+    def aplicar(self, tabelas, versao: int) -> None:
+        """Adota `versao` nas tabelas em que ela é mais nova que a atual."""
+        self._maior = max(self._maior, versao)
+        for tabela in tabelas:
+            if versao > self._versoes[tabela]:
+                self._versoes[tabela] = versao
+
+
+versoes = VersoesTabelas()
+
+
+class MetricasInvalidacao:
+    """Invalidações difundidas/recebidas pelo processo e o atraso (lag) das últimas."""
+
+    def __init__(self, amostras: int = 1000) -> None:
+        self.enviadas = 0
+        self.recebidas = 0
+        self._atrasos: deque[float] = deque(maxlen=amostras)
+
+    def registrar_recebida(self, atraso: float) -> None:
+        self.recebidas += 1
+        self._atrasos.append(max(0.0, atraso))
+
+    def resumo(self) -> dict:
+        atrasos = sorted(self._atrasos)
+        lag = None
+        if atrasos:
+            lag = {
+                "amostras": len(atrasos),
+                "medio_ms": round(sum(atrasos) / len(atrasos) * 1000, 2),
+                "p99_ms": round(atrasos[min(len(atrasos) - 1, int(len(atrasos) * 0.99))] * 1000, 2),
+                "max_ms": round(atrasos[-1] * 1000, 2),
+            }
+        # Lag: do commit que alterou a tabela até a versão ser aplicada neste processo
+        return {"enviadas": self.enviadas, "recebidas": self.recebidas, "lag": lag}
+
+
+metricas_invalidacao = MetricasInvalidacao()
+
+
+def receber_invalidacao(payload: str) -> None:
+    """Callback do broker para o canal CANAL_INVALIDACAO (inclusive as do próprio processo)."""
+    mensagem = json.loads(payload)
+    versoes.aplicar(mensagem["tabelas"], mensagem["versao"])
+    metricas_invalidacao.registrar_recebida(time.time() - mensagem["enviado_em"])
+
+
+def marcar_alteradas(db_session: AsyncSession | Session, *tabelas: str) -> None:
+    """Registra tabelas alteradas na transação corrente; a versão sobe no commit."""
+    session = db_session.sync_session if isinstance(db_session, AsyncSession) else db_session
+    session.info.setdefault("tabelas_alteradas", set()).update(tabelas)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session: Session, flush_context) -> None:
+    # Em after_flush as coleções new/dirty/deleted ainda refletem o que foi gravado.
+    # Mudanças apenas em coleções (ex.: categoria.atletas ao cadastrar um atleta) não alteram a tabela.
+    alterados = chain(
+        session.new,
+        session.deleted,
+        (obj for obj in session.dirty if session.is_modified(obj, include_collections=False)),
+    )
+    tabelas = {obj.__table__.name for obj in alterados}
+    if tabelas:
+        session.info.setdefault("tabelas_alteradas", set()).update(tabelas)
+
+
+@event.listens_for(Session, "before_commit")
+def _difundir_invalidacao(session: Session) -> None:
+    if not settings.CACHE_DIFUSAO_ATIVA or session.get_bind().dialect.name != "postgresql":
+        return
+    # O commit ainda faria o último flush: antecipa para conhecer todas as tabelas alteradas
+    session.flush()
+    tabelas = session.info.get("tabelas_alteradas")
+    if not tabelas:
+        return
+    versao = versoes.proxima()
+    session.info["versao_cache"] = versao
+    # Na mesma transação: a mensagem só sai se o commit acontecer
+    session.execute(
+        text("SELECT pg_notify(:canal, :payload)"),
+        {
+            "canal": CANAL_INVALIDACAO,
+            "payload": json.dumps({
+                "tabelas": sorted(tabelas), "versao": versao, "enviado_em": time.time(), "origem": os.getpid(),
+            }),
+        },
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_no_commit(session: Session) -> None:
+    tabelas = session.info.pop("tabelas_alteradas", None)
+    versao = session.info.pop("versao_cache", None)
+    if tabelas:
+        # O próprio processo não espera a volta do NOTIFY para deixar de usar os valores antigos
+        versoes.invalidar(*tabelas, versao=versao)
+        if versao is not None:
+            metricas_invalidacao.enviadas += 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_no_rollback(session: Session) -> None:
+    session.info.pop("tabelas_alteradas", None)
+    session.info.pop("versao_cache", None)
@@ -0,0 +1,271 @@
+# src/core/cache_backends.py
+"""
+Cache de valores calculados (contagens das listagens etc.) com armazenamento plugável.
+
+- "memoria" (padrão): LRU no próprio processo, limitado em bytes
+  (CACHE_MEMORIA_MAX_BYTES). Cada worker tem o seu.
+- "redis": servidor compartilhado por todos os workers (CACHE_REDIS_URL), falando o
+  protocolo do Redis (RESP) diretamente sobre asyncio, sem dependência extra. Serve
+  qualquer servidor compatível (Redis, Valkey, KeyDB, Dragonfly).
+
+A chave de cada valor inclui as versões das tabelas de que ele depende
+(src/core/cache.py). Uma escrita em qualquer worker muda essas versões em todos
+eles (NOTIFY), então o valor antigo simplesmente deixa de ser lido e expira pelo TTL.
+Por isso a chave deve ser montada ANTES de calcular o valor: se a tabela mudar no
+meio do cálculo, o resultado fica guardado sob a versão antiga e nunca é servido.
+
+Falhas do servidor compartilhado não derrubam requisições: viram "miss" (o valor é
+recalculado) e são contadas nas métricas (GET /admin/cache).
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Protocol
+from urllib.parse import unquote, urlsplit
+
+from src.configs.settings import settings
+from src.core.cache import metricas_invalidacao, versoes
+
+logger = logging.getLogger(__name__)
+
+
+class BackendCache(Protocol):
+    nome: str
+
+    async def obter(self, chave: str) -> bytes | None: ...
+
+    async def guardar(self, chave: str, valor: bytes, ttl: float) -> None: ...
+
+    async def fechar(self) -> None: ...
+
+    def resumo(self) -> dict: ...
+
+
+# --- MEMÓRIA ---
+class CacheMemoria:
+    """LRU com validade por item, limitado pela soma dos tamanhos dos valores."""
+
+    nome = "memoria"
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._itens: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def obter(self, chave: str) -> bytes | None:
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        expira_em, valor = item
+        if expira_em < time.monotonic():
+            self._remover(chave)
+            return None
+        self._itens.move_to_end(chave)
+        return valor
+
+    async def guardar(self, chave: str, valor: bytes, ttl: float) -> None:
+        if len(valor) > self.max_bytes:
+            return
+        if chave in self._itens:
+            self._remover(chave)
+        self._itens[chave] = (time.monotonic() + ttl, valor)
+        self._bytes += len(valor)
+        while self._bytes > self.max_bytes:
+            self._remover(next(iter(self._itens)))
+
+    def _remover(self, chave: str) -> None:
+        _, valor = self._itens.pop(chave)
+        self._bytes -= len(valor)
+
+    async def fechar(self) -> None:
+        self._itens.clear()
+        self._bytes = 0
+
+    def resumo(self) -> dict:
+        return {"itens": len(self._itens), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+# --- REDIS (RESP) ---
+class ErroResp(Exception):
+    """Resposta de erro do servidor (linha "-ERR ...")."""
+
+
+class ClienteResp:
+    """Cliente mínimo do protocolo do Redis (RESP2) com um pool pequeno de conexões."""
+
+    def __init__(self, url: str, conexoes: int, timeout: float) -> None:
+        partes = urlsplit(url)
+        self.host = partes.hostname or "localhost"
+        self.porta = partes.port or 6379
+        self.usuario = unquote(partes.username) if partes.username else None
+        self.senha = unquote(partes.password) if partes.password else None
+        self.banco = int(partes.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._vagas = asyncio.Semaphore(conexoes)
+        self._livres: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    @staticmethod
+    def _codificar(*partes) -> bytes:
+        blocos = [b"*%d\r\n" % len(partes)]
+        for parte in partes:
+            dado = parte if isinstance(parte, bytes) else str(parte).encode()
+            blocos.append(b"$%d\r\n%s\r\n" % (len(dado), dado))
+        return b"".join(blocos)
+
+    @classmethod
+    async def _ler(cls, leitor: asyncio.StreamReader):
+        linha = await leitor.readline()
+        if not linha:
+            raise ConnectionError("Conexão encerrada pelo servidor")
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return conteudo.decode()
+        if tipo == b"-":
+            raise ErroResp(conteudo.decode())
+        if tipo == b":":
+            return int(conteudo)
+        if tipo == b"$":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return (await leitor.readexactly(tamanho + 2))[:-2]
+        if tipo == b"*":
+            quantidade = int(conteudo)
+            return None if quantidade < 0 else [await cls._ler(leitor) for _ in range(quantidade)]
+        raise ConnectionError(f"Resposta RESP inválida: {linha!r}")
+
+    async def _conectar(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        leitor, escritor = await asyncio.open_connection(self.host, self.porta)
+        iniciais = []
+        if self.senha is not None:
+            iniciais.append(("AUTH", self.usuario, self.senha) if self.usuario else ("AUTH", self.senha))
+        if self.banco:
+            iniciais.append(("SELECT", self.banco))
+        try:
+            for comando in iniciais:
+                escritor.write(self._codificar(*comando))
+                await escritor.drain()
+                await self._ler(leitor)
+        except BaseException:
+            escritor.close()
+            raise
+        return leitor, escritor
+
+    async def comando(self, *partes):
+        async with self._vagas:
+            conexao = self._livres.pop() if self._livres else None
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if conexao is None:
+                        conexao = await self._conectar()
+                    leitor, escritor = conexao
+                    escritor.write(self._codificar(*partes))
+                    await escritor.drain()
+                    resposta = await self._ler(leitor)
+            except ErroResp:
+                # Erro do comando: a conexão continua íntegra (a do AUTH/SELECT já foi fechada)
+                if conexao is not None:
+                    self._livres.append(conexao)
+                raise
+            except BaseException:
+                # Timeout/cancelamento no meio da resposta: o protocolo ficou dessincronizado
+                if conexao is not None:
+                    conexao[1].close()
+                raise
+            self._livres.append(conexao)
+            return resposta
+
+    async def fechar(self) -> None:
+        while self._livres:
+            _, escritor = self._livres.pop()
+            escritor.close()
+
+
+class CacheRedis:
+    """Valores no servidor compartilhado, com expiração do próprio servidor (SET ... PX)."""
+
+    nome = "redis"
+
+    def __init__(self, url: str, conexoes: int, timeout: float, prefixo: str = "workout:cache:") -> None:
+        self.cliente = ClienteResp(url, conexoes, timeout)
+        self.prefixo = prefixo
+        self.erros = 0
+
+    async def obter(self, chave: str) -> bytes | None:
+        try:
+            return await self.cliente.comando("GET", self.prefixo + chave)
+        except (OSError, ErroResp, asyncio.TimeoutError) as erro:
+            self._falhou("GET", erro)
+            return None
+
+    async def guardar(self, chave: str, valor: bytes, ttl: float) -> None:
+        try:
+            await self.cliente.comando("SET", self.prefixo + chave, valor, "PX", max(1, int(ttl * 1000)))
+        except (OSError, ErroResp, asyncio.TimeoutError) as erro:
+            self._falhou("SET", erro)
+
+    def _falhou(self, comando: str, erro: Exception) -> None:
+        self.erros += 1
+        logger.warning("Falha no %s do cache compartilhado (%s:%s): %r", comando, self.cliente.host, self.cliente.porta, erro)
+
+    async def fechar(self) -> None:
+        await self.cliente.fechar()
+
+    def resumo(self) -> dict:
+        return {"servidor": f"{self.cliente.host}:{self.cliente.porta}/{self.cliente.banco}", "erros": self.erros}
+
+
+def criar_backend() -> BackendCache:
+    if settings.CACHE_BACKEND == "redis":
+        return CacheRedis(settings.CACHE_REDIS_URL, settings.CACHE_REDIS_CONEXOES, settings.CACHE_REDIS_TIMEOUT)
+    return CacheMemoria(settings.CACHE_MEMORIA_MAX_BYTES)
+
+
+# --- CACHE VERSIONADO ---
+class CacheVersionado:
+    """Fachada usada pelo código da aplicação: chaves com versão das tabelas e métricas por espaço."""
+
+    def __init__(self, backend: BackendCache) -> None:
+        self.backend = backend
+        self._acertos: defaultdict[str, int] = defaultdict(int)
+        self._falhas: defaultdict[str, int] = defaultdict(int)
+
+    def chave(self, espaco: str, identificacao: str, tabelas) -> str:
+        """Chave de `identificacao` nas versões ATUAIS das `tabelas` (monte antes de calcular o valor)."""
+        resumo = hashlib.blake2b(identificacao.encode(), digest_size=16).hexdigest()
+        versao = ".".join(map(str, versoes.versao(*tabelas)))
+        return f"{espaco}:{resumo}:{versao}"
+
+    async def obter(self, espaco: str, chave: str) -> bytes | None:
+        valor = await self.backend.obter(chave)
+        if valor is None:
+            self._falhas[espaco] += 1
+        else:
+            self._acertos[espaco] += 1
+        return valor
+
+    async def guardar(self, chave: str, valor: bytes, ttl: float) -> None:
+        await self.backend.guardar(chave, valor, ttl)
+
+    async def fechar(self) -> None:
+        await self.backend.fechar()
+
+    def resumo(self) -> dict:
+        espacos = {}
+        for espaco in sorted(self._acertos.keys() | self._falhas.keys()):
+            acertos, falhas = self._acertos[espaco], self._falhas[espaco]
+            espacos[espaco] = {
+                "acertos": acertos,
+                "falhas": falhas,
+                "taxa_acerto": round(acertos / (acertos + falhas), 4),
+            }
+        return {
+            "backend": {"tipo": self.backend.nome, **self.backend.resumo()},
+            "espacos": espacos,
+            "invalidacoes": metricas_invalidacao.resumo(),
+        }
+
+
+cache = CacheVersionado(criar_backend())
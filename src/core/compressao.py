@@ -0,0 +1,323 @@
+# src/core/compressao.py
+"""
+Middleware ASGI de compressão de respostas (gzip, brotli e zstd).
+
+- Negocia o algoritmo pelo cabeçalho `Accept-Encoding` (respeitando os pesos `q`).
+- Não comprime corpos menores que `tamanho_minimo` (o cabeçalho custaria mais que o ganho).
+- Respostas em streaming são comprimidas pedaço a pedaço, sem bufferizar o corpo inteiro.
+- Respostas sem corpo (HEAD, 204, 304) passam intactas, com o Content-Length original.
+- Toda resposta que seria comprimida leva `Vary: Accept-Encoding`, inclusive quando este
+  cliente não aceita compressão (caches compartilhados guardam as variantes separadas).
+- Respostas que a aplicação marca com `X-Compressao-Chave` (as listagens em cache,
+  src/core/listagens.py) têm a versão comprimida guardada num LRU sob essa chave: a mesma
+  listagem repetida entre duas escritas não é comprimida de novo. As demais (consultas
+  filtradas, batch-get...) são comprimidas direto, sem hash nem espaço no cache. O
+  cabeçalho é só interno e não chega ao cliente.
+
+brotli e zstd vêm do extra opcional `compressao` (`poetry install --extras compressao`);
+sem ele, apenas o gzip (biblioteca padrão) é oferecido.
+"""
+import zlib
+from collections import OrderedDict
+from typing import Callable
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+
+# Tipos de conteúdo que não valem a pena comprimir (já comprimidos) ou que não podem
+# esperar o compressor juntar dados (eventos em tempo real).
+TIPOS_EXCLUIDOS = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+# Respostas sem corpo: o Content-Length (quando houver) descreve a representação e não pode
+# ser trocado pelo tamanho de um corpo comprimido que nunca é enviado
+STATUS_SEM_CORPO = (204, 304)
+
+# Marca uma resposta cuja variante comprimida vale guardar: o valor identifica o corpo
+# (mesma chave = mesmo corpo), como a chave da listagem, que muda a cada escrita
+CABECALHO_CHAVE = "X-Compressao-Chave"
+_CHAVE = CABECALHO_CHAVE.lower().encode("latin-1")
+
+
+def _compressivel(inicio: dict) -> bool:
+    """Se a resposta (pelo `http.response.start`) seria comprimida para um cliente que aceitasse."""
+    cabecalhos = {k.lower(): v for k, v in inicio.get("headers", [])}
+    tipo = cabecalhos.get(b"content-type", b"").decode("latin-1")
+    return not (
+        inicio["status"] in STATUS_SEM_CORPO
+        or b"content-encoding" in cabecalhos
+        or tipo.startswith(TIPOS_EXCLUIDOS)
+    )
+
+
+def _cabecalhos_saida(inicio: dict) -> list[tuple[bytes, bytes]]:
+    """
+    Cabeçalhos da resposta sem a marca interna e com `Accept-Encoding` no Vary, quando ela
+    depende dele: comprimida ou não, a mesma URL sai diferente para outros clientes, e um
+    cache compartilhado precisa guardar as variantes separadas. O 304 repete o Vary que o 200 teria.
+    """
+    cabecalhos = [(k, v) for k, v in inicio.get("headers", []) if k.lower() != _CHAVE]
+    if not (_compressivel(inicio) or inicio["status"] == 304):
+        return cabecalhos
+    vary = [v for k, v in cabecalhos if k.lower() == b"vary"]
+    if b"accept-encoding" not in b",".join(vary).lower():
+        vary.append(b"Accept-Encoding")
+    return [(k, v) for k, v in cabecalhos if k.lower() != b"vary"] + [(b"vary", b", ".join(vary))]
+
+
+# --- COMPRESSORES INCREMENTAIS ---
+class _Gzip:
+    def __init__(self, nivel: int):
+        # wbits=31 -> formato gzip (cabeçalho + trailer), e não zlib puro
+        self._obj = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        # Z_SYNC_FLUSH entrega imediatamente tudo o que foi recebido até aqui
+        return self._obj.compress(dados) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, nivel: int):
+        self._obj = brotli.Compressor(quality=nivel)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._obj.process(dados) + self._obj.flush()
+
+    def finalizar(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, nivel: int):
+        self._obj = zstandard.ZstdCompressor(level=nivel).compressobj()
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._obj.compress(dados) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finalizar(self) -> bytes:
+        return self._obj.flush()
+
+
+def algoritmos_disponiveis() -> list[str]:
+    """Algoritmos suportados neste processo, em ordem de preferência do servidor."""
+    disponiveis = []
+    if zstandard is not None:
+        disponiveis.append("zstd")
+    if brotli is not None:
+        disponiveis.append("br")
+    disponiveis.append("gzip")
+    return disponiveis
+
+
+def negociar(accept_encoding: str, disponiveis: list[str]) -> str | None:
+    """
+    Escolhe o algoritmo a partir do `Accept-Encoding` do cliente.
+    Maior peso `q` vence; em caso de empate vale a ordem de preferência do servidor.
+    Retorna None quando nenhum algoritmo aceito está disponível.
+    """
+    pesos: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        pesos[nome] = q
+
+    melhor, melhor_q = None, 0.0
+    for algoritmo in disponiveis:
+        q = pesos.get(algoritmo, pesos.get("*", 0.0))
+        if q > melhor_q:
+            melhor, melhor_q = algoritmo, q
+    return melhor
+
+
+# --- CACHE DE VARIANTES COMPRIMIDAS ---
+class CacheVariantes:
+    """
+    LRU limitado em bytes que guarda corpos já comprimidos, indexados pela chave que a
+    aplicação deu à resposta (CABECALHO_CHAVE) + algoritmo. A chave muda quando o corpo
+    muda (a da listagem leva as versões das tabelas lidas): as entradas antigas só deixam
+    de ser pedidas e saem pelo LRU.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self._itens: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+
+    def obter_ou_comprimir(
+        self, chave_corpo: bytes, corpo: bytes, algoritmo: str, comprimir: Callable[[bytes], bytes]
+    ) -> bytes:
+        chave = (chave_corpo, algoritmo)
+        comprimido = self._itens.get(chave)
+        if comprimido is not None:
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return comprimido
+
+        self.falhas += 1
+        comprimido = comprimir(corpo)
+        if len(comprimido) <= self.max_bytes:
+            self._itens[chave] = comprimido
+            self.bytes_usados += len(comprimido)
+            # Descarta as entradas menos usadas até caber no orçamento
+            while self.bytes_usados > self.max_bytes:
+                _, antigo = self._itens.popitem(last=False)
+                self.bytes_usados -= len(antigo)
+        return comprimido
+
+
+# --- MIDDLEWARE ---
+class CompressaoMiddleware:
+    def __init__(
+        self,
+        app,
+        tamanho_minimo: int = 1024,
+        nivel_gzip: int = 6,
+        nivel_brotli: int = 4,
+        nivel_zstd: int = 3,
+        cache_max_bytes: int = 32 * 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.tamanho_minimo = tamanho_minimo
+        self.disponiveis = algoritmos_disponiveis()
+        self.cache = CacheVariantes(cache_max_bytes) if cache_max_bytes > 0 else None
+        self._fabricas = {
+            "gzip": lambda: _Gzip(nivel_gzip),
+            "br": lambda: _Brotli(nivel_brotli),
+            "zstd": lambda: _Zstd(nivel_zstd),
+        }
+
+    def comprimir_completo(self, corpo: bytes, algoritmo: str, chave: bytes | None = None) -> bytes:
+        """Comprime um corpo inteiro; com a `chave` da resposta, passa pelo cache de variantes."""
+
+        def comprimir(dados: bytes) -> bytes:
+            compressor = self._fabricas[algoritmo]()
+            return compressor.comprimir(dados) + compressor.finalizar()
+
+        if self.cache is None or chave is None:
+            return comprimir(corpo)
+        return self.cache.obter_ou_comprimir(chave, corpo, algoritmo, comprimir)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for nome, valor in scope["headers"]:
+            if nome == b"accept-encoding":
+                accept_encoding = valor.decode("latin-1")
+                break
+
+        # HEAD: o Content-Length é o do GET, sem corpo para comprimir
+        algoritmo = None
+        if accept_encoding and scope["method"] != "HEAD":
+            algoritmo = negociar(accept_encoding, self.disponiveis)
+        if algoritmo is None:
+            await self.app(scope, receive, self._repassar(send))
+            return
+
+        await _RespostaComprimida(self, algoritmo, send).executar(scope, receive)
+
+    @staticmethod
+    def _repassar(send):
+        """Resposta sem compressão para este cliente: segue intacta, só com o Vary."""
+
+        async def enviar(message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": _cabecalhos_saida(message)}
+            await send(message)
+
+        return enviar
+
+
+class _RespostaComprimida:
+    """Estado de uma única resposta passando pelo middleware."""
+
+    def __init__(self, middleware: CompressaoMiddleware, algoritmo: str, send) -> None:
+        self.middleware = middleware
+        self.algoritmo = algoritmo
+        self.send = send
+        self.inicio: dict | None = None
+        self.chave: bytes | None = None   # CABECALHO_CHAVE: usa o cache de variantes
+        self.ativo = True            # False -> repassa a resposta sem mexer
+        self.pendente = b""          # início do stream guardado até atingir o tamanho mínimo
+        self.compressor = None
+
+    async def executar(self, scope, receive) -> None:
+        await self.middleware.app(scope, receive, self.enviar)
+
+    async def enviar(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.inicio = message
+            if not _compressivel(message):
+                self.ativo = False
+                await self.send({**message, "headers": _cabecalhos_saida(message)})
+                return
+            self.chave = next((v for k, v in message.get("headers", []) if k.lower() == _CHAVE), None)
+            return
+
+        if message["type"] != "http.response.body" or not self.ativo:
+            await self.send(message)
+            return
+
+        corpo = message.get("body", b"")
+        mais = message.get("more_body", False)
+
+        if self.compressor is not None:
+            # Streaming já em andamento: comprime e repassa este pedaço
+            dados = self.compressor.comprimir(corpo) if corpo else b""
+            if not mais:
+                dados += self.compressor.finalizar()
+            await self.send({"type": "http.response.body", "body": dados, "more_body": mais})
+            return
+
+        self.pendente += corpo
+        if not mais:
+            # Corpo completo (ou fim de um stream curto)
+            if len(self.pendente) < self.middleware.tamanho_minimo:
+                await self._iniciar(comprimido=False, tamanho=len(self.pendente))
+                await self.send({"type": "http.response.body", "body": self.pendente})
+            else:
+                comprimido = self.middleware.comprimir_completo(self.pendente, self.algoritmo, self.chave)
+                await self._iniciar(comprimido=True, tamanho=len(comprimido))
+                await self.send({"type": "http.response.body", "body": comprimido})
+            return
+
+        if len(self.pendente) >= self.middleware.tamanho_minimo:
+            # Stream grande o suficiente: passa a comprimir pedaço a pedaço
+            self.compressor = self.middleware._fabricas[self.algoritmo]()
+            await self._iniciar(comprimido=True, tamanho=None)
+            dados = self.compressor.comprimir(self.pendente)
+            self.pendente = b""
+            await self.send({"type": "http.response.body", "body": dados, "more_body": True})
+
+    async def _iniciar(self, comprimido: bool, tamanho: int | None) -> None:
+        """Envia o `http.response.start` guardado, ajustando os cabeçalhos."""
+        # Mesmo sem comprimir (corpo pequeno), a resposta depende do Accept-Encoding
+        cabecalhos = [(k, v) for k, v in _cabecalhos_saida(self.inicio) if k.lower() != b"content-length"]
+        if comprimido:
+            cabecalhos.append((b"content-encoding", self.algoritmo.encode("latin-1")))
+        if tamanho is not None:
+            cabecalhos.append((b"content-length", str(tamanho).encode("latin-1")))
+        await self.send({**self.inicio, "headers": cabecalhos})
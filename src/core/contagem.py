@@ -0,0 +1,95 @@
+# src/core/contagem.py
+"""
+Total de registros das listagens (`X-Total-Count`), em dois modos:
+
+- "exato": `SELECT count(*)` sobre a consulta filtrada. O resultado fica em cache
+  por alguns segundos (CONTAGEM_CACHE_TTL) e é descartado assim que a tabela muda
+  (em qualquer worker; ver src/core/cache_backends.py).
+- "aproximado": estimativa do PostgreSQL, sem varrer a tabela.
+    * sem filtros: `pg_class.reltuples` (atualizado por VACUUM/ANALYZE);
+    * com filtros: linhas estimadas pelo planejador (`EXPLAIN`).
+  Em outros bancos, ou se a tabela nunca foi analisada, cai para o modo exato.
+"""
+import json
+from typing import Literal
+
+from fastapi import Response
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from src.configs.settings import settings
+from src.core.cache_backends import cache
+
+ModoTotal = Literal["exato", "aproximado"]
+
+
+def definir_total(response: Response, total: int, modo: ModoTotal) -> None:
+    response.headers["X-Total-Count"] = str(total)
+    response.headers["X-Total-Count-Tipo"] = modo
+
+
+async def contar(
+    db_session: AsyncSession, consulta: Select, modo: ModoTotal, escopo: str = ""
+) -> tuple[int, ModoTotal]:
+    """
+    Conta as linhas de `consulta` (sem LIMIT/OFFSET) no modo pedido.
+    Retorna o total e o modo efetivamente usado. `escopo` separa no cache a mesma
+    consulta feita em bancos diferentes (shards).
+    """
+    if modo == "aproximado" and db_session.bind.dialect.name == "postgresql":
+        estimativa = await _estimar(db_session, consulta)
+        if estimativa is not None:
+            return estimativa, "aproximado"
+    return await _contar_exato(db_session, consulta, escopo), "exato"
+
+
+async def _contar_exato(db_session: AsyncSession, consulta: Select, escopo: str = "") -> int:
+    compilada = consulta.compile()
+    identificacao = repr((escopo, str(compilada), sorted((k, str(v)) for k, v in compilada.params.items())))
+    tabelas = sorted({t.name for origem in consulta.get_final_froms() for t in _tabelas(origem)})
+    chave = cache.chave("contagem", identificacao, tabelas)
+
+    guardado = await cache.obter("contagem", chave)
+    if guardado is not None:
+        return int(guardado)
+    contagem = select(func.count()).select_from(consulta.order_by(None).subquery())
+    valor = (await db_session.execute(contagem)).scalar_one()
+    await cache.guardar(chave, str(valor).encode(), settings.CONTAGEM_CACHE_TTL)
+    return valor
+
+
+async def _estimar(db_session: AsyncSession, consulta: Select) -> int | None:
+    if consulta.whereclause is None:
+        froms = consulta.get_final_froms()
+        tabela = froms[0].name if len(froms) == 1 and hasattr(froms[0], "name") else None
+        if tabela is not None:
+            # A tabela pai de uma particionada não tem estatística própria (reltuples = -1):
+            # soma as partições. Numa tabela comum, pg_partition_tree devolve só ela mesma.
+            reltuples = (await db_session.execute(
+                text(
+                    "SELECT sum(greatest(c.reltuples, 0))::bigint "
+                    "FROM pg_partition_tree(CAST(:tabela AS regclass)) AS arvore "
+                    "JOIN pg_class AS c ON c.oid = arvore.relid WHERE arvore.isleaf"
+                ),
+                {"tabela": tabela},
+            )).scalar_one_or_none()
+            # -1 (ou 0 em versões antigas) = tabela ainda não analisada pelo autovacuum
+            return reltuples if reltuples and reltuples > 0 else None
+
+    # Com filtros: usa a estimativa de linhas do plano de execução
+    sql = consulta.order_by(None).compile(dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True})
+    conexao = await db_session.connection()
+    plano = (await conexao.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar_one()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]["Plan"]["Plan Rows"])
+
+
+def _tabelas(from_clause):
+    """Tabelas físicas por trás de um FROM (tabela simples ou JOIN)."""
+    if hasattr(from_clause, "left"):
+        yield from _tabelas(from_clause.left)
+        yield from _tabelas(from_clause.right)
+    else:
+        yield from_clause
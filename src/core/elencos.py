@@ -0,0 +1,79 @@
+# src/core/elencos.py
+"""
+Carregamento em lote dos atletas de categorias/centros de treinamento (`?incluir=atletas`).
+
+Uma única consulta traz o elenco de todos os pais da página: `row_number()` por pai
+limita quantos atletas vêm de cada um, e `count(*)` na mesma janela informa o total
+(para o cliente saber se o elenco veio truncado). O resultado é atribuído com
+`set_committed_value`, sem disparar lazy load (as relações `atletas` usam
+`lazy="raise_on_sql"` justamente para que nenhum acesso implícito vire N+1).
+
+Com sharding, a consulta roda em todos os shards ao mesmo tempo; os elencos
+parciais são mesclados por pk_id e os totais, somados.
+"""
+from collections import defaultdict
+from typing import Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.core.shards import SessoesShards, mesclar
+from src.models.atleta import AtletaModel
+from src.models.categorias import CategoriaModel
+from src.models.centro_treinamento import CentroTreinamentoModel
+
+# Coluna de AtletaModel que aponta para cada tipo de pai
+_CHAVES = {
+    CategoriaModel: AtletaModel.categoria_id,
+    CentroTreinamentoModel: AtletaModel.centro_treinamento_id,
+}
+
+
+async def carregar_elencos(
+    sessoes: SessoesShards,
+    pais: Sequence[CategoriaModel | CentroTreinamentoModel],
+    limite: int,
+) -> dict[int, int]:
+    """
+    Preenche `pai.atletas` (até `limite` atletas por pai, em ordem de cadastro) para
+    todos os `pais` com uma consulta. Retorna pk_id do pai -> total de atletas dele.
+    """
+    if not pais:
+        return {}
+    chave = _CHAVES[type(pais[0])]
+
+    numerados = (
+        select(
+            AtletaModel,
+            func.row_number().over(partition_by=chave, order_by=AtletaModel.pk_id).label("posicao"),
+            func.count().over(partition_by=chave).label("total"),
+        )
+        .where(chave.in_([pai.pk_id for pai in pais]))
+        .subquery()
+    )
+    atleta = aliased(AtletaModel, numerados)
+    consulta = (
+        select(atleta, numerados.c.total)
+        .where(numerados.c.posicao <= limite)
+        .order_by(numerados.c[chave.key], numerados.c.pk_id)
+        # O elenco não precisa da categoria/CT de cada atleta (é o próprio pai)
+        .options(raiseload(atleta.categoria), raiseload(atleta.centro_treinamento))
+    )
+
+    async def carregar(_, db_session: AsyncSession) -> tuple[dict, dict]:
+        elencos: defaultdict[int, list[AtletaModel]] = defaultdict(list)
+        totais: dict[int, int] = {}
+        for atleta_model, total in (await db_session.execute(consulta)).all():
+            id_pai = getattr(atleta_model, chave.key)
+            elencos[id_pai].append(atleta_model)
+            totais[id_pai] = total
+        return elencos, totais
+
+    parciais = await sessoes.em_todas(carregar)
+    for pai in pais:
+        listas = [elencos.get(pai.pk_id, []) for elencos, _ in parciais]
+        elenco = listas[0] if len(listas) == 1 else mesclar(listas, lambda atleta: atleta.pk_id, 0, limite)
+        set_committed_value(pai, "atletas", elenco)
+    return {pai.pk_id: sum(totais.get(pai.pk_id, 0) for _, totais in parciais) for pai in pais}
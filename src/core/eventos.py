@@ -0,0 +1,278 @@
+# src/core/eventos.py
+"""
+Feed de alterações em tempo real (Server-Sent Events) alimentado por LISTEN/NOTIFY.
+
+- Os handlers de mutação chamam `publicar(...)` ANTES do commit. No PostgreSQL o
+  `pg_notify` sai no fim da transação (before_commit), então o evento só é entregue
+  se o commit acontecer.
+- O id do evento é tirado da sequence nesse mesmo momento, sob um advisory lock de
+  transação: quem publica fica serializado só durante o próprio commit, e os ids
+  crescem na ordem dos commits. Sem isso uma transação que pegou o id 10 e demorou a
+  commitar chegaria depois do id 11, e um cliente retomando a partir do 11 a perderia.
+- Cada processo mantém UMA conexão LISTEN (`broker`) e distribui os eventos para
+  todos os assinantes locais, cada um com sua fila limitada.
+- Cliente lento (fila cheia) é desconectado; ao reconectar com `Last-Event-ID`
+  ele recebe o que perdeu a partir do histórico recente mantido em memória. Se o
+  histórico não cobre mais esse ponto, ou os eventos perdidos não cabem na fila, a
+  retomada é recusada: o cliente recebe o evento `recarregar` (deve buscar o estado
+  completo de novo pela listagem) e segue recebendo os eventos novos.
+
+Em bancos que não são PostgreSQL (ex.: SQLite) os eventos são entregues apenas ao
+próprio processo, logo após o commit.
+
+Com sharding (SHARDS), os atletas são publicados na transação do seu shard: o broker
+escuta o banco principal e cada shard PostgreSQL. Os ids vêm da `eventos_id_seq` de
+cada banco; para não repetirem entre shards, configure as sequences com o mesmo
+INCREMENT e STARTs diferentes (ex.: INCREMENT 4, START 1, 2, 3, 4). A ordem dos
+commits só é garantida dentro de cada banco: entre shards os ids podem chegar fora
+de ordem, e a retomada por `Last-Event-ID` pode perder eventos de outro shard
+(nesse cenário, trate `recarregar` e prefira a outbox para integrações).
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.configs.settings import settings
+from src.core.outbox import registrar as registrar_outbox
+from src.core.shards import roteador
+
+logger = logging.getLogger(__name__)
+
+# Canais disponíveis (um por recurso)
+CANAIS = ("atletas", "centros_treinamento")
+
+# Evento que encerra o stream de um assinante desconectado por lentidão
+_DESCONECTAR = object()
+# Retomada impossível sem buracos: o cliente precisa recarregar o estado completo
+_RECARREGAR = object()
+_MENSAGEM_RECARREGAR = "event: recarregar\ndata: {}\n\n"
+
+# Chave do advisory lock que ordena a atribuição dos ids pelos commits
+_LOCK_EVENTOS = 0x45564E54
+
+
+@dataclass
+class Evento:
+    id: int
+    tipo: str          # "criado" | "atualizado" | "removido"
+    dados: dict
+
+    def formatar(self) -> str:
+        """Formato de uma mensagem SSE."""
+        return f"id: {self.id}\nevent: {self.tipo}\ndata: {json.dumps(self.dados)}\n\n"
+
+
+@dataclass(eq=False)
+class Assinatura:
+    canal: str
+    fila: asyncio.Queue
+    desconectada: bool = field(default=False)
+
+
+class Broker:
+    """Uma conexão LISTEN por processo, distribuída (fan-out) para muitos assinantes."""
+
+    def __init__(self, tamanho_historico: int = 1000, tamanho_fila: int = 256) -> None:
+        self.tamanho_fila = tamanho_fila
+        self._historico = {canal: deque(maxlen=tamanho_historico) for canal in CANAIS}
+        self._assinantes: dict[str, set[Assinatura]] = {canal: set() for canal in CANAIS}
+        self._tarefas: list[asyncio.Task] = []
+        self._observadores: dict[str, list[Callable[[Evento], None]]] = {canal: [] for canal in CANAIS}
+        # Canais de uso interno (ex.: invalidação de cache): payload bruto, sem histórico nem SSE
+        self._internos: dict[str, Callable[[str], None]] = {}
+        self._id_local = 0
+
+    # --- CICLO DE VIDA ---
+    async def iniciar(self) -> None:
+        """Abre a conexão LISTEN de cada banco PostgreSQL e as mantém vivas em segundo plano."""
+        for endereco in roteador.urls():
+            url = make_url(endereco)
+            if url.get_backend_name() != "postgresql":
+                continue
+            dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+            self._tarefas.append(asyncio.create_task(self._manter_conexao(dsn)))
+
+    async def parar(self) -> None:
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+        for assinantes in self._assinantes.values():
+            for assinatura in list(assinantes):
+                self._desconectar(assinatura)
+
+    async def _manter_conexao(self, dsn: str) -> None:
+        """Reconecta com espera crescente caso a conexão LISTEN caia."""
+        import asyncpg
+
+        espera = 1
+        while True:
+            perdida = asyncio.Event()
+            conexao = None
+            try:
+                conexao = await asyncpg.connect(dsn)
+                conexao.add_termination_listener(lambda _: perdida.set())
+                for canal in CANAIS:
+                    await conexao.add_listener(canal, self._ao_notificar)
+                for canal in self._internos:
+                    await conexao.add_listener(canal, self._ao_notificar_interno)
+                espera = 1
+                await perdida.wait()
+                logger.warning("Conexão LISTEN perdida; reconectando")
+            except asyncio.CancelledError:
+                if conexao is not None and not conexao.is_closed():
+                    await conexao.close()
+                raise
+            except Exception:
+                logger.exception("Falha ao abrir a conexão LISTEN; nova tentativa em %ss", espera)
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 30)
+
+    def _ao_notificar(self, conexao, pid, canal: str, payload: str) -> None:
+        mensagem = json.loads(payload)
+        self.distribuir(canal, Evento(id=mensagem["id"], tipo=mensagem["tipo"], dados=mensagem["dados"]))
+
+    def _ao_notificar_interno(self, conexao, pid, canal: str, payload: str) -> None:
+        try:
+            self._internos[canal](payload)
+        except Exception:
+            logger.exception("Falha ao tratar a notificação do canal %s", canal)
+
+    # --- DISTRIBUIÇÃO ---
+    def distribuir(self, canal: str, evento: Evento) -> None:
+        """Guarda o evento no histórico e entrega a cada assinante do canal."""
+        self._historico[canal].append(evento)
+        for observador in self._observadores[canal]:
+            try:
+                observador(evento)
+            except Exception:
+                logger.exception("Falha no observador do canal %s", canal)
+        for assinatura in list(self._assinantes[canal]):
+            try:
+                assinatura.fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                # Backpressure: o cliente não acompanha o ritmo. Em vez de acumular
+                # memória sem limite, encerramos o stream; ele retoma pelo Last-Event-ID.
+                self._desconectar(assinatura)
+
+    def proximo_id_local(self) -> int:
+        self._id_local += 1
+        return self._id_local
+
+    def _desconectar(self, assinatura: Assinatura) -> None:
+        self._assinantes[assinatura.canal].discard(assinatura)
+        if not assinatura.desconectada:
+            assinatura.desconectada = True
+            # Descarta tudo o que não foi entregue: o cliente retoma a partir do último
+            # evento que realmente recebeu, sem buracos na sequência
+            while not assinatura.fila.empty():
+                assinatura.fila.get_nowait()
+            assinatura.fila.put_nowait(_DESCONECTAR)
+
+    def assinar(self, canal: str, ultimo_id: int | None = None) -> Assinatura:
+        """
+        Registra um assinante; com `ultimo_id`, reenvia os eventos perdidos do histórico.
+        Nunca reenvia só parte deles: se o histórico não alcança mais `ultimo_id` (ou o
+        processo não o viu) ou se os perdidos não cabem na fila, manda `_RECARREGAR`.
+        """
+        assinatura = Assinatura(canal=canal, fila=asyncio.Queue(maxsize=self.tamanho_fila))
+        if ultimo_id is not None:
+            historico = self._historico[canal]
+            perdidos = [evento for evento in historico if evento.id > ultimo_id]
+            # O evento `ultimo_id` ainda no histórico garante que nada depois dele saiu de lá
+            if not historico or historico[0].id > ultimo_id or len(perdidos) > self.tamanho_fila:
+                assinatura.fila.put_nowait(_RECARREGAR)
+            else:
+                for evento in perdidos:
+                    assinatura.fila.put_nowait(evento)
+        self._assinantes[canal].add(assinatura)
+        return assinatura
+
+    def observar(self, canal: str, observador: Callable[[Evento], None]) -> None:
+        """Registra uma função chamada (de forma síncrona) a cada evento do canal, sem fila."""
+        self._observadores[canal].append(observador)
+
+    def escutar(self, canal: str, funcao: Callable[[str], None]) -> None:
+        """Escuta um canal interno com a conexão LISTEN do processo (registre antes de `iniciar`)."""
+        self._internos[canal] = funcao
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        self._assinantes[assinatura.canal].discard(assinatura)
+
+    async def stream(self, canal: str, ultimo_id: int | None = None, intervalo_ping: float = 15.0) -> AsyncIterator[str]:
+        """Gera as mensagens SSE de um canal até o cliente desconectar."""
+        assinatura = self.assinar(canal, ultimo_id)
+        try:
+            # Orienta o navegador (EventSource) a reconectar após 3 segundos
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    evento = await asyncio.wait_for(assinatura.fila.get(), timeout=intervalo_ping)
+                except asyncio.TimeoutError:
+                    # Comentário SSE: mantém proxies e balanceadores com a conexão aberta
+                    yield ": ping\n\n"
+                    continue
+                if evento is _DESCONECTAR:
+                    return
+                if evento is _RECARREGAR:
+                    yield _MENSAGEM_RECARREGAR
+                    continue
+                yield evento.formatar()
+        finally:
+            self.cancelar(assinatura)
+
+
+broker = Broker(
+    tamanho_historico=settings.EVENTOS_HISTORICO,
+    tamanho_fila=settings.EVENTOS_FILA_POR_CLIENTE,
+)
+
+
+# --- PUBLICAÇÃO ---
+async def publicar(db_session: AsyncSession, canal: str, tipo: str, dados: dict) -> None:
+    """
+    Publica um evento de alteração na transação corrente da sessão.
+    Deve ser chamado antes do `commit`; se houver rollback o evento é descartado.
+    Com OUTBOX_ATIVO, o evento também é gravado na outbox (entrega para integrações).
+    """
+    registrar_outbox(db_session, canal, tipo, dados)
+    db_session.sync_session.info.setdefault("eventos_pendentes", []).append((canal, tipo, dados))
+
+
+@event.listens_for(Session, "before_commit")
+def _notificar_pendentes(session: Session) -> None:
+    """No PostgreSQL, numera e envia os eventos da transação no momento do commit."""
+    if not session.info.get("eventos_pendentes") or session.get_bind().dialect.name != "postgresql":
+        return
+    # Flush antes do lock: com ele na mão a transação não espera por mais nenhum lock de linha
+    session.flush()
+    session.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": _LOCK_EVENTOS})
+    for canal, tipo, dados in session.info.pop("eventos_pendentes"):
+        # O id vem de uma sequence para ser o mesmo em todos os processos
+        session.execute(
+            text(
+                "SELECT pg_notify(:canal, json_build_object("
+                "'id', nextval('eventos_id_seq'), 'tipo', CAST(:tipo AS text), 'dados', CAST(:dados AS json))::text)"
+            ),
+            {"canal": canal, "tipo": tipo, "dados": json.dumps(dados)},
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _entregar_pendentes(session: Session) -> None:
+    """Entrega local (bancos sem LISTEN/NOTIFY) dos eventos publicados na transação."""
+    for canal, tipo, dados in session.info.pop("eventos_pendentes", []):
+        broker.distribuir(canal, Evento(id=broker.proximo_id_local(), tipo=tipo, dados=dados))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendentes(session: Session) -> None:
+    session.info.pop("eventos_pendentes", None)
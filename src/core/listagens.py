@@ -0,0 +1,70 @@
+# src/core/listagens.py
+"""
+Cache de resultados das listagens (GET /categorias, /centros-treinamento e /atletas).
+
+Entre duas escritas, as listagens devolvem sempre as mesmas linhas. A resposta já
+serializada (JSON em bytes, mais o X-Total-Count, se pedido) fica no cache de valores
+(src/core/cache_backends.py, espaço "listagem": LRU limitado em bytes ou o servidor
+compartilhado), sob uma chave com:
+
+- a rota e os parâmetros JÁ INTERPRETADOS por ela (CPF sem pontuação, paginação com os
+  padrões aplicados, `fields` validado...): `?offset=0` e a ausência de offset, ou o CPF
+  com e sem pontuação, caem na mesma chave;
+- as versões das tabelas lidas. Todo commit que altera uma delas dá a ela uma versão
+  nova (src/core/cache.py), em todos os workers, e as chaves antigas deixam de ser lidas.
+
+Um acerto devolve os bytes direto, sem consultar o banco e sem passar pelo Pydantic.
+As respostas guardadas levam a chave no cabeçalho interno do middleware de compressão
+(src/core/compressao.py), que guarda a versão comprimida delas sob a mesma chave.
+"""
+import json
+from typing import Iterable, Optional
+
+from fastapi import Response
+
+from src.configs.settings import settings
+from src.core.cache_backends import cache
+from src.core.compressao import CABECALHO_CHAVE
+from src.core.contagem import ModoTotal, definir_total
+
+ESPACO = "listagem"
+
+Total = Optional[tuple[int, ModoTotal]]
+
+
+def chave_listagem(rota: str, parametros: dict, tabelas: Iterable[str]) -> Optional[str]:
+    """Chave da listagem nas versões ATUAIS das `tabelas` (monte antes de consultar); None = cache desligado."""
+    if not settings.LISTAGEM_CACHE_ATIVO:
+        return None
+    identificacao = json.dumps([rota, parametros], sort_keys=True, default=str)
+    return cache.chave(ESPACO, identificacao, sorted(tabelas))
+
+
+def _resposta(corpo: bytes, total: Total, chave: Optional[str] = None) -> Response:
+    resposta = Response(content=corpo, media_type="application/json")
+    if total:
+        definir_total(resposta, *total)
+    if chave is not None and settings.COMPRESSAO_ATIVA:
+        # Mesma chave, mesmo corpo: a variante comprimida pode ser reaproveitada
+        resposta.headers[CABECALHO_CHAVE] = chave
+    return resposta
+
+
+async def obter_listagem(chave: Optional[str]) -> Optional[Response]:
+    """Resposta guardada sob `chave`, ou None (miss ou cache desligado)."""
+    if chave is None:
+        return None
+    guardado = await cache.obter(ESPACO, chave)
+    if guardado is None:
+        return None
+    # Formato: o total em JSON ("null" sem ?total), uma quebra de linha e o corpo
+    total, corpo = guardado.split(b"\n", 1)
+    return _resposta(corpo, json.loads(total), chave)
+
+
+async def guardar_listagem(chave: Optional[str], corpo: bytes, total: Total = None) -> Response:
+    """Guarda o JSON da listagem (se couber em LISTAGEM_CACHE_MAX_BYTES) e devolve a resposta."""
+    if chave is None or len(corpo) > settings.LISTAGEM_CACHE_MAX_BYTES:
+        return _resposta(corpo, total)
+    await cache.guardar(chave, json.dumps(total).encode() + b"\n" + corpo, settings.LISTAGEM_CACHE_TTL)
+    return _resposta(corpo, total, chave)
@@ -0,0 +1,258 @@
+# src/core/migracoes.py
+"""
+Ferramentas para migrações sem indisponibilidade (uso dentro de alembic/versions).
+
+- `criar_indice_concorrente` / `remover_indice_concorrente`: CREATE/DROP INDEX CONCURRENTLY,
+  executados fora da transação da migração (o PostgreSQL não permite CONCURRENTLY dentro dela).
+- `backfill_em_lotes`: UPDATE em faixas da chave primária, com commit por lote, pausa entre
+  lotes (para não saturar o disco/replicação) e progresso no log.
+- `copiar_em_lotes`: INSERT ... SELECT de uma tabela para outra em faixas da chave, para
+  reconstruir tabelas (ex.: particionar) sem uma transação gigante.
+- `ddl_com_lock_timeout`: executa DDL que precisa de lock forte (ALTER TABLE ...) com
+  `lock_timeout` curto e novas tentativas: se a tabela estiver ocupada, a migração desiste
+  rápido em vez de ficar na fila do lock bloqueando todo o tráfego que chega depois.
+- `validar_constraint`: VALIDATE CONSTRAINT de uma constraint criada com NOT VALID, em
+  transação própria (depois de commitar o ALTER e liberar o lock forte dele).
+
+Exemplo:
+
+    from src.core.migracoes import criar_indice_concorrente, ddl_com_lock_timeout
+
+    def upgrade() -> None:
+        ddl_com_lock_timeout("ALTER TABLE atletas ADD COLUMN apelido varchar(30)")
+        criar_indice_concorrente("ix_atletas_nome", "atletas", ["nome"])
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from alembic import context, op
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger("alembic.migracoes")
+
+# SQLSTATE 55P03 = lock_not_available (estourou o lock_timeout)
+_LOCK_NAO_DISPONIVEL = "55P03"
+
+# Configuração customizada (só da transação) onde lock_timeout() guarda o valor a restaurar
+_LOCK_TIMEOUT_ANTERIOR = "migracao.lock_timeout_anterior"
+
+
+def _postgres() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _offline() -> bool:
+    return context.is_offline_mode()
+
+
+def _lock_indisponivel(erro: DBAPIError) -> bool:
+    origem = erro.orig
+    return (getattr(origem, "sqlstate", None) or getattr(origem, "pgcode", None)) == _LOCK_NAO_DISPONIVEL
+
+
+# --- ÍNDICES ---
+def criar_indice_concorrente(
+    nome: str,
+    tabela: str,
+    colunas: list[str],
+    unique: bool = False,
+    where: str | None = None,
+    using: str | None = None,
+) -> None:
+    """
+    Cria um índice sem bloquear escritas (CREATE INDEX CONCURRENTLY).
+    Se uma tentativa anterior falhou no meio e deixou o índice INVÁLIDO, ele é removido e recriado.
+    """
+    if not _postgres():
+        op.create_index(nome, tabela, colunas, unique=unique)
+        return
+
+    sql = (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {nome} "
+        f"ON {tabela}{f' USING {using}' if using else ''} ({', '.join(colunas)})"
+        f"{f' WHERE {where}' if where else ''}"
+    )
+    with op.get_context().autocommit_block():
+        if not _offline():
+            invalido = op.get_bind().execute(
+                text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :nome AND NOT i.indisvalid"
+                ),
+                {"nome": nome},
+            ).first()
+            if invalido:
+                logger.warning("Índice %s inválido (build anterior interrompido); recriando", nome)
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nome}")
+        inicio = time.monotonic()
+        op.execute(sql)
+        logger.info("Índice %s criado em %.1fs", nome, time.monotonic() - inicio)
+
+
+def remover_indice_concorrente(nome: str, tabela: str | None = None) -> None:
+    """Remove um índice sem bloquear a tabela (DROP INDEX CONCURRENTLY)."""
+    if not _postgres():
+        op.drop_index(nome, table_name=tabela)
+        return
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nome}")
+
+
+# --- LOCKS ---
+@contextmanager
+def lock_timeout(valor: str):
+    """Limita a espera por locks dos comandos executados no bloco (ex.: '2s', '500ms')."""
+    if not _postgres():
+        yield
+        return
+    # Volta ao valor anterior (o MIGRACAO_LOCK_TIMEOUT do alembic/env.py), e não ao DEFAULT do
+    # servidor (em geral 0 = sem limite), que deixaria o resto da migração esperando para sempre.
+    # Guardado no próprio banco, para funcionar também no modo --sql
+    op.execute(f"SELECT set_config('{_LOCK_TIMEOUT_ANTERIOR}', current_setting('lock_timeout'), true)")
+    op.execute(f"SET LOCAL lock_timeout = '{valor}'")
+    try:
+        yield
+    finally:
+        op.execute(f"SELECT set_config('lock_timeout', current_setting('{_LOCK_TIMEOUT_ANTERIOR}'), true)")
+
+
+def ddl_com_lock_timeout(*comandos: str, timeout: str = "2s", tentativas: int = 5, espera: float = 2.0) -> None:
+    """
+    Executa comandos DDL com lock_timeout curto; se o lock não sair a tempo, desfaz
+    (SAVEPOINT), espera e tenta de novo, até `tentativas` vezes.
+    """
+    if not _postgres() or _offline():
+        with lock_timeout(timeout):
+            for comando in comandos:
+                op.execute(comando)
+        return
+
+    conexao = op.get_bind()
+    for tentativa in range(1, tentativas + 1):
+        try:
+            with conexao.begin_nested():
+                # Um ROLLBACK TO SAVEPOINT desfaz o SET LOCAL, mas o RELEASE não: sem restaurar, o
+                # timeout curto valeria para o resto da migração
+                anterior = conexao.execute(text("SELECT current_setting('lock_timeout')")).scalar_one()
+                conexao.execute(text(f"SET LOCAL lock_timeout = '{timeout}'"))
+                for comando in comandos:
+                    conexao.execute(text(comando))
+                conexao.execute(text("SELECT set_config('lock_timeout', :anterior, true)"), {"anterior": anterior})
+            return
+        except DBAPIError as erro:
+            if not _lock_indisponivel(erro) or tentativa == tentativas:
+                raise
+            logger.warning(
+                "Lock não obtido em %s (tentativa %d/%d); nova tentativa em %.1fs",
+                timeout, tentativa, tentativas, espera,
+            )
+            time.sleep(espera)
+            espera *= 2
+
+
+def validar_constraint(tabela: str, constraint: str) -> None:
+    """
+    Valida uma constraint adicionada com NOT VALID sem bloquear leituras e escritas.
+
+    O VALIDATE só pede SHARE UPDATE EXCLUSIVE, mas, na mesma transação do
+    `ALTER TABLE ... NOT VALID`, o ACCESS EXCLUSIVE do ALTER continuaria segurado durante
+    toda a varredura. O bloco autocommit commita antes a transação da migração (liberando
+    esse lock) e roda o VALIDATE em uma transação própria.
+    """
+    if not _postgres():
+        return
+    with op.get_context().autocommit_block():
+        inicio = time.monotonic()
+        op.execute(f"ALTER TABLE {tabela} VALIDATE CONSTRAINT {constraint}")
+        logger.info("Constraint %s validada em %.1fs", constraint, time.monotonic() - inicio)
+
+
+# --- BACKFILL ---
+def backfill_em_lotes(
+    tabela: str,
+    atribuicao: str,
+    where: str | None = None,
+    chave: str = "pk_id",
+    tamanho_lote: int = 5000,
+    pausa: float = 0.05,
+) -> int:
+    """
+    Executa `UPDATE tabela SET atribuicao [WHERE where]` em faixas de `chave`,
+    com um commit por lote. Cada lote segura locks de linha por pouco tempo e a
+    pausa entre lotes deixa folga para o tráfego normal. Retorna as linhas alteradas.
+
+    Ex.: backfill_em_lotes("atletas", "cpf = regexp_replace(cpf, '[^0-9]', '', 'g')", where="cpf ~ '[^0-9]'")
+    """
+    filtro = f" AND ({where})" if where else ""
+    sql = text(f"UPDATE {tabela} SET {atribuicao} WHERE {chave} >= :inicio AND {chave} < :fim{filtro}")
+
+    if _offline():
+        # No modo --sql não há como descobrir as faixas: gera um único UPDATE
+        op.execute(f"UPDATE {tabela} SET {atribuicao}{f' WHERE {where}' if where else ''}")
+        return 0
+
+    conexao = op.get_bind()
+    with op.get_context().autocommit_block():
+        minimo, maximo = conexao.execute(text(f"SELECT min({chave}), max({chave}) FROM {tabela}")).one()
+        if minimo is None:
+            return 0
+
+        alteradas, inicio_backfill = 0, time.monotonic()
+        for inicio in range(minimo, maximo + 1, tamanho_lote):
+            alteradas += conexao.execute(sql, {"inicio": inicio, "fim": inicio + tamanho_lote}).rowcount
+            progresso = min(inicio + tamanho_lote - minimo, maximo - minimo + 1) / (maximo - minimo + 1)
+            decorrido = time.monotonic() - inicio_backfill
+            logger.info(
+                "Backfill %s: %5.1f%% (%d linhas alteradas, %.0f linhas/s)",
+                tabela, progresso * 100, alteradas, alteradas / decorrido if decorrido else 0,
+            )
+            if pausa:
+                time.sleep(pausa)
+    return alteradas
+
+
+def copiar_em_lotes(
+    origem: str,
+    destino: str,
+    colunas: str = "*",
+    chave: str = "pk_id",
+    tamanho_lote: int = 5000,
+    pausa: float = 0.05,
+) -> int:
+    """
+    Copia as linhas de `origem` para `destino` em faixas de `chave`, com um commit por
+    lote e ON CONFLICT DO NOTHING (linhas que já chegaram ao destino por trigger ficam
+    como estão). Cada lote trava as linhas lidas (FOR SHARE) até o commit: um UPDATE ou
+    DELETE concorrente espera o lote terminar e então é propagado pelo trigger, sem que a
+    cópia grave uma versão antiga da linha. Retorna as linhas copiadas.
+
+    Ex.: copiar_em_lotes("atletas", "atletas_chaves", "pk_id, id, cpf, centro_treinamento_id")
+    """
+    lista = "" if colunas == "*" else f" ({colunas})"
+    copia = f"INSERT INTO {destino}{lista} SELECT {colunas} FROM {origem}"
+
+    if _offline():
+        op.execute(f"{copia} ON CONFLICT DO NOTHING")
+        return 0
+
+    sql = text(f"{copia} WHERE {chave} >= :inicio AND {chave} < :fim FOR SHARE ON CONFLICT DO NOTHING")
+    conexao = op.get_bind()
+    with op.get_context().autocommit_block():
+        minimo, maximo = conexao.execute(text(f"SELECT min({chave}), max({chave}) FROM {origem}")).one()
+        if minimo is None:
+            return 0
+
+        copiadas, inicio_copia = 0, time.monotonic()
+        for inicio in range(minimo, maximo + 1, tamanho_lote):
+            copiadas += conexao.execute(sql, {"inicio": inicio, "fim": inicio + tamanho_lote}).rowcount
+            progresso = min(inicio + tamanho_lote - minimo, maximo - minimo + 1) / (maximo - minimo + 1)
+            decorrido = time.monotonic() - inicio_copia
+            logger.info(
+                "Cópia %s -> %s: %5.1f%% (%d linhas, %.0f linhas/s)",
+                origem, destino, progresso * 100, copiadas, copiadas / decorrido if decorrido else 0,
+            )
+            if pausa:
+                time.sleep(pausa)
+    return copiadas
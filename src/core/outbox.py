@@ -0,0 +1,337 @@
+# src/core/outbox.py
+"""
+Transactional outbox: eventos de integração para sistemas externos (cobrança,
+controle de acesso), sem que eles precisem consultar a API periodicamente.
+
+- Gravação: todo evento publicado pelas mutações de atletas e centros de treinamento
+  (`publicar`, em src/core/eventos.py) também vira uma linha da tabela `outbox`, na
+  MESMA transação. Se a transação é desfeita, o evento some junto; se é confirmada,
+  o evento será entregue (pelo menos uma vez).
+- Entrega: o despachante lê a outbox em lotes (OUTBOX_LOTE), envia cada lote ao
+  destino configurado e apaga o que foi entregue. Em caso de falha o lote volta para
+  a fila com espera exponencial; após OUTBOX_MAX_TENTATIVAS o evento é marcado como
+  esgotado (`falhou_em`) e sai da fila. Para reenviá-lo, basta limpar `falhou_em`.
+- Ordem por agregado: um evento só é entregue junto com (ou depois de) todos os
+  eventos anteriores ainda pendentes do mesmo registro. Entre registros diferentes
+  não há ordem garantida.
+- Vários processos podem despachar ao mesmo tempo: no PostgreSQL as linhas do lote
+  ficam travadas (FOR UPDATE SKIP LOCKED) até o fim da entrega.
+
+Cada evento leva um `id` (UUID) estável: o consumidor deve descartar ids repetidos.
+
+Execução avulsa do despachante (fora da API):
+    poetry run python -m src.core.outbox
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import urllib.request
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Protocol
+
+from sqlalchemy import delete, event, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.configs.settings import settings
+from src.core.shards import roteador
+from src.models.outbox import OutboxModel
+
+logger = logging.getLogger(__name__)
+
+
+# --- GRAVAÇÃO ---
+def registrar(db_session: AsyncSession, agregado: str, tipo: str, dados: dict) -> None:
+    """Acrescenta o evento à transação corrente (deve ser chamado antes do commit)."""
+    if not settings.OUTBOX_ATIVO:
+        return
+    db_session.add(OutboxModel(agregado=agregado, agregado_id=str(dados["id"]), tipo=tipo, dados=dados))
+    db_session.sync_session.info["outbox_novos"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _acordar_despachante(session: Session) -> None:
+    # Entrega imediata no próprio processo; os demais processos percebem no próximo OUTBOX_INTERVALO
+    if session.info.pop("outbox_novos", False):
+        despachante.acordar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_aviso(session: Session) -> None:
+    session.info.pop("outbox_novos", None)
+
+
+# --- DESTINOS ---
+class Destino(Protocol):
+    async def enviar(self, eventos: list[dict]) -> None:
+        """Entrega o lote inteiro ou levanta exceção (o lote todo volta para a fila)."""
+
+
+class DestinoStdout:
+    """Uma linha JSON por evento na saída padrão (desenvolvimento e testes)."""
+
+    async def enviar(self, eventos: list[dict]) -> None:
+        for evento in eventos:
+            print(json.dumps(evento, ensure_ascii=False), flush=True)
+
+
+class DestinoArquivo:
+    """Acrescenta uma linha JSON por evento ao arquivo (gravado em disco antes de confirmar)."""
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = Path(caminho)
+
+    def _gravar(self, linhas: str) -> None:
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self.caminho.open("a", encoding="utf-8") as arquivo:
+            arquivo.write(linhas)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+    async def enviar(self, eventos: list[dict]) -> None:
+        linhas = "".join(json.dumps(evento, ensure_ascii=False) + "\n" for evento in eventos)
+        await asyncio.to_thread(self._gravar, linhas)
+
+
+class DestinoHttp:
+    """POST de um array JSON por lote; resposta fora de 2xx (ou timeout) é falha."""
+
+    def __init__(self, url: str, timeout: float) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def _postar(self, corpo: bytes) -> None:
+        requisicao = urllib.request.Request(
+            self.url, data=corpo, method="POST", headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+            resposta.read()
+
+    async def enviar(self, eventos: list[dict]) -> None:
+        # urllib (biblioteca padrão) em uma thread, para não bloquear o event loop
+        await asyncio.to_thread(self._postar, json.dumps(eventos, ensure_ascii=False).encode())
+
+
+def criar_destino(nome: str) -> Destino:
+    if nome == "stdout":
+        return DestinoStdout()
+    if nome == "arquivo":
+        return DestinoArquivo(settings.OUTBOX_ARQUIVO)
+    if nome == "http":
+        if not settings.OUTBOX_URL:
+            raise ValueError("OUTBOX_DESTINO=http exige OUTBOX_URL")
+        return DestinoHttp(settings.OUTBOX_URL, settings.OUTBOX_HTTP_TIMEOUT)
+    raise ValueError(f"Destino de outbox desconhecido: {nome}")
+
+
+# --- MÉTRICAS ---
+class MetricasOutbox:
+    """Contadores do processo e vazão/latência dos últimos `janela` segundos."""
+
+    def __init__(self, janela: float = 60.0) -> None:
+        self.janela = janela
+        self.entregues = 0
+        self.lotes = 0
+        self.falhas = 0
+        self.esgotados = 0
+        self.ultima_entrega_em: datetime | None = None
+        self._recentes: deque[tuple[float, int, float]] = deque()  # (instante, eventos, latência média)
+
+    def _podar(self, agora: float) -> None:
+        while self._recentes and self._recentes[0][0] < agora - self.janela:
+            self._recentes.popleft()
+
+    def registrar_entrega(self, quantidade: int, latencia_media: float) -> None:
+        agora = time.monotonic()
+        self.entregues += quantidade
+        self.lotes += 1
+        self.ultima_entrega_em = datetime.now(timezone.utc)
+        self._recentes.append((agora, quantidade, latencia_media))
+        self._podar(agora)
+
+    def resumo(self) -> dict:
+        self._podar(time.monotonic())
+        eventos = sum(quantidade for _, quantidade, _ in self._recentes)
+        return {
+            "entregues": self.entregues,
+            "lotes": self.lotes,
+            "falhas": self.falhas,
+            "esgotados": self.esgotados,
+            "ultima_entrega_em": self.ultima_entrega_em,
+            f"eventos_por_segundo_{int(self.janela)}s": round(eventos / self.janela, 2),
+            # Do commit da alteração até a confirmação do destino
+            "latencia_media_ms": round(
+                sum(quantidade * latencia for _, quantidade, latencia in self._recentes) / eventos * 1000, 1
+            ) if eventos else None,
+        }
+
+
+# --- DESPACHANTE ---
+def _utc(momento: datetime) -> datetime:
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+def _serializar(evento: OutboxModel) -> dict:
+    return {
+        "id": str(evento.id),
+        "agregado": evento.agregado,
+        "agregado_id": evento.agregado_id,
+        "tipo": evento.tipo,
+        "dados": evento.dados,
+        "criado_em": _utc(evento.criado_em).isoformat(),
+    }
+
+
+class Despachante:
+    def __init__(
+        self,
+        lote: int,
+        intervalo: float,
+        max_tentativas: int,
+        espera_base: float,
+        espera_max: float,
+        destino: Destino | None = None,
+    ) -> None:
+        self.lote = lote
+        self.intervalo = intervalo
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.destino = destino
+        self.metricas = MetricasOutbox()
+        self._acordar = asyncio.Event()
+
+    def acordar(self) -> None:
+        self._acordar.set()
+
+    async def _selecionar(self, sessao: AsyncSession, agora: datetime) -> list[OutboxModel]:
+        candidatos = (await sessao.execute(
+            select(OutboxModel)
+            .where(OutboxModel.falhou_em.is_(None), OutboxModel.proxima_tentativa_em <= agora)
+            .order_by(OutboxModel.pk_id)
+            .limit(self.lote)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+        if not candidatos:
+            return []
+
+        # Ordem por agregado: percorre os pendentes de cada agregado em ordem e libera
+        # só o trecho inicial que está no lote (o resto espera os anteriores saírem)
+        no_lote = {evento.pk_id for evento in candidatos}
+        pendentes = (await sessao.execute(
+            select(OutboxModel.agregado, OutboxModel.agregado_id, OutboxModel.pk_id)
+            .where(
+                tuple_(OutboxModel.agregado, OutboxModel.agregado_id).in_(
+                    {(evento.agregado, evento.agregado_id) for evento in candidatos}
+                ),
+                OutboxModel.falhou_em.is_(None),
+                OutboxModel.pk_id <= candidatos[-1].pk_id,
+            )
+            .order_by(OutboxModel.pk_id)
+        )).all()
+        bloqueados, liberados = set(), set()
+        for agregado, agregado_id, pk_id in pendentes:
+            if (agregado, agregado_id) in bloqueados:
+                continue
+            if pk_id in no_lote:
+                liberados.add(pk_id)
+            else:
+                bloqueados.add((agregado, agregado_id))
+        return [evento for evento in candidatos if evento.pk_id in liberados]
+
+    def _adiar(self, eventos: list[OutboxModel], erro: Exception, agora: datetime) -> None:
+        self.metricas.falhas += 1
+        logger.warning("Falha ao entregar %d eventos da outbox: %r", len(eventos), erro)
+        for evento in eventos:
+            evento.tentativas += 1
+            evento.ultimo_erro = repr(erro)[:1000]
+            if evento.tentativas >= self.max_tentativas:
+                evento.falhou_em = agora
+                self.metricas.esgotados += 1
+                logger.error("Evento %s da outbox esgotou as tentativas", evento.id)
+            else:
+                espera = min(self.espera_max, self.espera_base * 2 ** (evento.tentativas - 1))
+                evento.proxima_tentativa_em = agora + timedelta(seconds=espera)
+
+    async def drenar_lote(self, fabrica: sessionmaker) -> int:
+        """Entrega um lote do banco da `fabrica`. Retorna quantos eventos foram entregues."""
+        agora = datetime.now(timezone.utc)
+        async with fabrica() as sessao:
+            async with sessao.begin():
+                eventos = await self._selecionar(sessao, agora)
+                if not eventos:
+                    return 0
+                try:
+                    await self.destino.enviar([_serializar(evento) for evento in eventos])
+                except Exception as erro:
+                    self._adiar(eventos, erro, agora)
+                    return 0
+                await sessao.execute(delete(OutboxModel).where(OutboxModel.pk_id.in_([e.pk_id for e in eventos])))
+
+        entregue_em = datetime.now(timezone.utc)
+        latencias = [(entregue_em - _utc(evento.criado_em)).total_seconds() for evento in eventos]
+        self.metricas.registrar_entrega(len(eventos), sum(latencias) / len(latencias))
+        return len(eventos)
+
+    async def executar(self) -> None:
+        """Laço de entrega (lifespan com OUTBOX_DESPACHANTE_ATIVO=true, ou `python -m src.core.outbox`)."""
+        if self.destino is None:
+            self.destino = criar_destino(settings.OUTBOX_DESTINO)
+        while True:
+            self._acordar.clear()
+            try:
+                # Cada banco (principal e shards) tem a sua outbox, drenadas em paralelo
+                entregues = sum(await asyncio.gather(
+                    *(self.drenar_lote(fabrica) for _, fabrica in roteador.bancos())
+                ))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Falha no despachante da outbox")
+                entregues = 0
+            if entregues:
+                continue  # pode haver mais na fila: segue sem esperar
+            try:
+                await asyncio.wait_for(self._acordar.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def pendencias() -> dict[str, dict]:
+    """Tamanho da fila de cada banco (para /admin/outbox)."""
+    async def contar(fabrica: sessionmaker) -> dict:
+        async with fabrica() as sessao:
+            pendentes, esgotados, mais_antigo = (await sessao.execute(
+                select(
+                    func.count().filter(OutboxModel.falhou_em.is_(None)),
+                    func.count().filter(OutboxModel.falhou_em.is_not(None)),
+                    func.min(OutboxModel.criado_em).filter(OutboxModel.falhou_em.is_(None)),
+                )
+            )).one()
+        return {
+            "pendentes": pendentes,
+            "esgotados": esgotados,
+            "mais_antigo_em": _utc(mais_antigo) if mais_antigo else None,
+        }
+
+    bancos = roteador.bancos()
+    resultados = await asyncio.gather(*(contar(fabrica) for _, fabrica in bancos))
+    return {nome: resultado for (nome, _), resultado in zip(bancos, resultados)}
+
+
+despachante = Despachante(
+    lote=settings.OUTBOX_LOTE,
+    intervalo=settings.OUTBOX_INTERVALO,
+    max_tentativas=settings.OUTBOX_MAX_TENTATIVAS,
+    espera_base=settings.OUTBOX_ESPERA_BASE,
+    espera_max=settings.OUTBOX_ESPERA_MAX,
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(despachante.executar())
@@ -0,0 +1,248 @@
+# src/core/perfil.py
+"""
+Profiling sob demanda, por requisição.
+
+Uma requisição é perfilada quando:
+  - sorteada pela taxa de amostragem (PERFIL_AMOSTRAGEM, ex.: 0.01 = 1%); ou
+  - traz o cabeçalho `X-Perfil` com o token de administração (ADMIN_TOKEN).
+
+Para ela são registrados:
+  - um perfil cProfile (tempo por função: validação Pydantic, hidratação do ORM, driver...);
+  - o atraso (lag) do event loop durante a requisição: uma tarefa auxiliar dorme
+    PERFIL_LAG_INTERVALO_MS e mede quanto acordou atrasada. Lag alto = código
+    síncrono segurando o loop (e atrasando todas as outras requisições).
+
+Os resultados vão para um anel de arquivos em disco (PERFIL_DIRETORIO), limitado a
+PERFIL_MAX_ARQUIVOS perfis: os mais antigos são apagados. A resposta perfilada
+recebe o cabeçalho `X-Perfil-Id`, e o perfil é lido em `GET /admin/perfis/{id}`.
+
+O cProfile mede a thread inteira: enquanto a requisição espera o banco, outras
+tarefas do loop também aparecem no perfil. Por isso apenas uma requisição é
+perfilada por vez (as demais sorteadas no mesmo instante seguem sem perfil).
+
+Desligado (PERFIL_ATIVO=false), o middleware nem é instalado: custo zero.
+"""
+import asyncio
+import cProfile
+import json
+import logging
+import math
+import os
+import pstats
+import random
+import re
+import secrets
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.configs.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_FUNCOES_NO_RESUMO = 40
+
+
+# --- LAG DO EVENT LOOP ---
+class MedidorLag:
+    """Mede o atraso do event loop enquanto estiver ativo."""
+
+    def __init__(self, intervalo: float) -> None:
+        self.intervalo = intervalo
+        self.amostras: list[float] = []
+        self._tarefa: asyncio.Task | None = None
+        self._inicio_espera = 0.0
+
+    async def _medir(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._inicio_espera = loop.time()
+            await asyncio.sleep(self.intervalo)
+            self.amostras.append(max(0.0, loop.time() - self._inicio_espera - self.intervalo))
+
+    def iniciar(self) -> None:
+        self._inicio_espera = asyncio.get_running_loop().time()
+        self._tarefa = asyncio.create_task(self._medir())
+
+    async def parar(self) -> dict:
+        # Espera em curso já atrasada conta como amostra: se o loop ficou bloqueado
+        # a requisição inteira, a tarefa de medição nem chegou a acordar
+        atraso = asyncio.get_running_loop().time() - self._inicio_espera - self.intervalo
+        if atraso > 0:
+            self.amostras.append(atraso)
+        self._tarefa.cancel()
+        await asyncio.gather(self._tarefa, return_exceptions=True)
+        amostras = sorted(self.amostras)
+        if not amostras:
+            return {"amostras": 0}
+        return {
+            "amostras": len(amostras),
+            "intervalo_ms": self.intervalo * 1000,
+            "medio_ms": round(statistics.fmean(amostras) * 1000, 3),
+            "p99_ms": round(amostras[math.ceil(len(amostras) * 0.99) - 1] * 1000, 3),
+            "max_ms": round(amostras[-1] * 1000, 3),
+        }
+
+
+# --- ANEL DE PERFIS EM DISCO ---
+class ArmazenamentoPerfis:
+    """
+    Cada perfil ocupa dois arquivos: `<id>.json` (resumo legível) e `<id>.prof`
+    (dados brutos do pstats, para snakeviz/`python -m pstats`).
+    """
+
+    _ID_VALIDO = re.compile(r"^[0-9]{8}T[0-9]{6}_[0-9a-f]{8}$")
+
+    def __init__(self, diretorio: str, max_perfis: int) -> None:
+        self.diretorio = Path(diretorio)
+        self.max_perfis = max_perfis
+
+    @staticmethod
+    def novo_id() -> str:
+        # Ordenável pelo nome: o anel apaga sempre os mais antigos
+        return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{secrets.token_hex(4)}"
+
+    def _caminho(self, id: str, extensao: str) -> Path | None:
+        if not self._ID_VALIDO.match(id):
+            return None
+        caminho = self.diretorio / f"{id}.{extensao}"
+        return caminho if caminho.exists() else None
+
+    def gravar(self, id: str, resumo: dict, perfil: cProfile.Profile) -> None:
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        perfil.dump_stats(self.diretorio / f"{id}.prof")
+        # Grava o resumo por último: ele é o que torna o perfil visível na listagem
+        temporario = self.diretorio / f"{id}.json.tmp"
+        temporario.write_text(json.dumps(resumo, ensure_ascii=False))
+        os.replace(temporario, self.diretorio / f"{id}.json")
+        self._podar()
+
+    def _podar(self) -> None:
+        resumos = sorted(self.diretorio.glob("*.json"))
+        for antigo in resumos[: max(0, len(resumos) - self.max_perfis)]:
+            for extensao in ("json", "prof"):
+                (self.diretorio / f"{antigo.stem}.{extensao}").unlink(missing_ok=True)
+
+    def listar(self) -> list[dict]:
+        """Resumos sem a lista de funções, do mais recente para o mais antigo."""
+        if not self.diretorio.exists():
+            return []
+        perfis = []
+        for caminho in sorted(self.diretorio.glob("*.json"), reverse=True):
+            try:
+                resumo = json.loads(caminho.read_text())
+            except (OSError, ValueError):  # apagado pelo anel durante a leitura
+                continue
+            resumo.pop("funcoes", None)
+            perfis.append(resumo)
+        return perfis
+
+    def resumo(self, id: str) -> dict | None:
+        caminho = self._caminho(id, "json")
+        return json.loads(caminho.read_text()) if caminho else None
+
+    def arquivo_pstats(self, id: str) -> Path | None:
+        return self._caminho(id, "prof")
+
+
+def resumir_funcoes(perfil: cProfile.Profile, limite: int = _FUNCOES_NO_RESUMO) -> list[dict]:
+    """As funções de maior tempo acumulado, em formato JSON."""
+    estatisticas = pstats.Stats(perfil).stats
+    maiores = sorted(estatisticas.items(), key=lambda item: item[1][3], reverse=True)[:limite]
+    return [
+        {
+            "funcao": f"{arquivo}:{linha}({nome})",
+            "chamadas": chamadas,
+            "tempo_proprio_ms": round(tempo_proprio * 1000, 3),
+            "tempo_acumulado_ms": round(tempo_acumulado * 1000, 3),
+        }
+        for (arquivo, linha, nome), (_, chamadas, tempo_proprio, tempo_acumulado, _) in maiores
+    ]
+
+
+armazenamento_perfis = ArmazenamentoPerfis(settings.PERFIL_DIRETORIO, settings.PERFIL_MAX_ARQUIVOS)
+
+
+# --- MIDDLEWARE ---
+class PerfilMiddleware:
+    def __init__(
+        self,
+        app,
+        armazenamento: ArmazenamentoPerfis,
+        amostragem: float = 0.0,
+        token: str | None = None,
+        intervalo_lag: float = 0.01,
+    ) -> None:
+        self.app = app
+        self.armazenamento = armazenamento
+        self.amostragem = amostragem
+        self.token = token.encode("latin-1") if token else None
+        self.intervalo_lag = intervalo_lag
+        # Um perfil por vez: o cProfile é por thread e mediria as requisições umas das outras
+        self._ocupado = False
+
+    def _motivo(self, scope) -> str | None:
+        if self.token is not None:
+            for nome, valor in scope["headers"]:
+                if nome == b"x-perfil":
+                    if secrets.compare_digest(valor, self.token):
+                        return "cabecalho"
+                    break
+        if self.amostragem and random.random() < self.amostragem:
+            return "amostragem"
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        motivo = self._motivo(scope)
+        if motivo is None or self._ocupado:
+            await self.app(scope, receive, send)
+            return
+
+        self._ocupado = True
+        try:
+            await self._perfilar(scope, receive, send, motivo)
+        finally:
+            self._ocupado = False
+
+    async def _perfilar(self, scope, receive, send, motivo: str) -> None:
+        id = self.armazenamento.novo_id()
+        status_http = None
+
+        async def enviar(mensagem) -> None:
+            nonlocal status_http
+            if mensagem["type"] == "http.response.start":
+                status_http = mensagem["status"]
+                mensagem = {**mensagem, "headers": [*mensagem.get("headers", []), (b"x-perfil-id", id.encode())]}
+            await send(mensagem)
+
+        lag = MedidorLag(self.intervalo_lag)
+        perfil = cProfile.Profile()
+        lag.iniciar()
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        perfil.enable()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            perfil.disable()
+            duracao, cpu = time.perf_counter() - inicio, time.process_time() - inicio_cpu
+            resumo = {
+                "id": id,
+                "metodo": scope["method"],
+                "caminho": scope["path"],
+                "consulta": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_http,
+                "motivo": motivo,
+                "duracao_ms": round(duracao * 1000, 3),
+                "cpu_ms": round(cpu * 1000, 3),
+                "lag_event_loop": await lag.parar(),
+                "funcoes": resumir_funcoes(perfil),
+            }
+            try:
+                # Escrita em disco fora do event loop
+                await asyncio.to_thread(self.armazenamento.gravar, id, resumo, perfil)
+            except OSError:
+                logger.exception("Falha ao gravar o perfil %s", id)
@@ -0,0 +1,384 @@
+# src/core/shards.py
+"""
+Sharding opcional dos atletas por centro de treinamento.
+
+Com SHARDS vazio (padrão) tudo continua em um único banco (DB_URL) e as funções
+daqui operam sobre a sessão da requisição, sem custo extra.
+
+Com SHARDS = {"nome": "url", ...}:
+- cada centro de treinamento pertence a um shard: o indicado em SHARDS_MAPA
+  (id do CT -> nome do shard) ou, se não estiver lá, um hash estável do id.
+  Fixe os CTs existentes em SHARDS_MAPA antes de acrescentar um shard, senão o
+  hash passa a apontar alguns deles para o shard novo;
+- atletas, medidas e arquivo ficam no shard do CT do atleta;
+- categorias e centros de treinamento (dados de referência) continuam tendo o banco
+  principal (DB_URL) como origem e são replicados, com o mesmo pk_id, em todos os shards,
+  para que as FOREIGN KEYs e os JOINs dos atletas funcionem localmente. A cópia sai logo
+  após o commit no principal; se algum shard falhar, a sincronização periódica
+  (`tarefa_sincronizacao`) a refaz com o estado atual do principal, até conseguir;
+- o CPF e o pk_id de cada atleta são reservados antes no registro global do banco
+  principal (`atletas_registro`): o UNIQUE(cpf) de lá vale para todos os shards e os
+  pk_id não se repetem entre eles (a mescla das listagens ordena por pk_id);
+- consultas que não sabem o shard (listagens, busca por id) rodam em todos os shards
+  ao mesmo tempo (asyncio.gather) e os resultados são mesclados em ordem.
+
+Cada shard precisa das migrações: `DB_URL=<url do shard> alembic upgrade head`.
+"""
+import asyncio
+import heapq
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Awaitable, Callable, Iterable, Sequence, TypeVar
+from uuid import UUID
+
+from sqlalchemy import delete, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import Select
+
+from src.configs.settings import settings
+from src.core.cache import marcar_alteradas
+from src.core.database import async_session, engine
+from src.models.atleta import AtletaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+from src.models.atleta_registro import AtletaRegistroModel
+from src.models.categorias import CategoriaModel
+from src.models.centro_treinamento import CentroTreinamentoModel
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Dados de referência copiados do principal para os shards
+REFERENCIAS = (CategoriaModel, CentroTreinamentoModel)
+# Reserva sem atleta há mais que isso é sobra de uma queda entre a reserva e o INSERT
+_RESERVA_ORFA_APOS = timedelta(minutes=10)
+
+# Nome usado para o banco principal quando o sharding está desligado
+PRINCIPAL = "principal"
+
+
+class Roteador:
+    """Engines e fábricas de sessão de cada shard, e o mapa CT -> shard."""
+
+    def __init__(self, urls: dict[str, str], mapa: dict[str, str]) -> None:
+        desconhecidos = set(mapa.values()) - set(urls)
+        if desconhecidos:
+            raise ValueError(f"SHARDS_MAPA aponta para shards inexistentes: {sorted(desconhecidos)}")
+        self.nomes = sorted(urls)
+        self.mapa = {UUID(str(centro)): shard for centro, shard in mapa.items()}
+        self._urls = urls
+        self._engines: dict[str, AsyncEngine] = {}
+        self._fabricas: dict[str, sessionmaker] = {}
+        # Cópias para os shards que falharam: (modelo, pk_id), refeitas pela sincronização
+        self._pendentes: set[tuple[type, int]] = set()
+        # Acorda a sincronização antes do intervalo (uma réplica ficou para trás)
+        self.sincronizacao_pendente = asyncio.Event()
+        # Uma cópia por vez no processo: a sincronização não grava um estado mais velho por cima
+        self._replicacao = asyncio.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.nomes)
+
+    def shard_do_centro(self, centro_id: UUID) -> str:
+        if not self.ativo:
+            return PRINCIPAL
+        if centro_id in self.mapa:
+            return self.mapa[centro_id]
+        # crc32 (e não hash()): estável entre processos e reinícios
+        return self.nomes[zlib.crc32(centro_id.bytes) % len(self.nomes)]
+
+    def fabrica(self, nome: str) -> sessionmaker:
+        """Fábrica de sessões do shard (engines criadas sob demanda)."""
+        if not self.ativo:
+            return async_session
+        if nome not in self._fabricas:
+            url = self._urls[nome]
+            # Um shard pode ser o próprio banco principal: reaproveita o pool
+            self._engines[nome] = engine if url == settings.DB_URL else create_async_engine(url, echo=False)
+            self._fabricas[nome] = sessionmaker(bind=self._engines[nome], class_=AsyncSession, expire_on_commit=False)
+        return self._fabricas[nome]
+
+    def fabrica_principal(self) -> sessionmaker:
+        """Fábrica de sessões do banco principal (dados de referência e registro global)."""
+        return async_session
+
+    def fabricas(self) -> list[tuple[str, sessionmaker]]:
+        """Todos os bancos que guardam atletas (só o principal, sem sharding)."""
+        if not self.ativo:
+            return [(PRINCIPAL, async_session)]
+        return [(nome, self.fabrica(nome)) for nome in self.nomes]
+
+    def bancos(self) -> list[tuple[str, sessionmaker]]:
+        """Todos os bancos distintos: o principal e os shards que não são ele mesmo."""
+        replicas = [(nome, self.fabrica(nome)) for nome in self.nomes if self._urls[nome] != settings.DB_URL]
+        return [(PRINCIPAL, self.fabrica_principal()), *replicas]
+
+    def urls(self) -> list[str]:
+        """URLs distintas em uso (principal + shards)."""
+        return list(dict.fromkeys([settings.DB_URL, *self._urls.values()]))
+
+    # --- REPLICAÇÃO DOS DADOS DE REFERÊNCIA ---
+    def _replicas(self) -> list[sessionmaker]:
+        return [self.fabrica(nome) for nome in self.nomes if self._urls[nome] != settings.DB_URL]
+
+    async def _em_cada_replica(self, funcao: Callable[[sessionmaker], Awaitable[None]]) -> list[Exception]:
+        """Executa `funcao` em cada shard ao mesmo tempo; a falha de um não interrompe os demais."""
+        resultados = await asyncio.gather(*(funcao(fabrica) for fabrica in self._replicas()), return_exceptions=True)
+        return [resultado for resultado in resultados if isinstance(resultado, Exception)]
+
+    async def _copiar(self, modelo, pk_id: int, valores: dict | None) -> None:
+        """Grava (upsert pelo pk_id) ou, com `valores` None, apaga o registro em cada shard."""
+        tabela = modelo.__table__
+
+        async def gravar(fabrica: sessionmaker) -> None:
+            async with fabrica() as sessao:
+                if valores is None:
+                    await sessao.execute(tabela.delete().where(tabela.c.pk_id == pk_id))
+                else:
+                    dialeto_insert = pg_insert if sessao.bind.dialect.name == "postgresql" else sqlite_insert
+                    consulta = dialeto_insert(tabela).values(valores)
+                    await sessao.execute(consulta.on_conflict_do_update(
+                        index_elements=["pk_id"],
+                        set_={coluna: consulta.excluded[coluna] for coluna in valores if coluna != "pk_id"},
+                    ))
+                # Os atletas do shard exibem o nome da categoria/CT: listagens em cache lidas
+                # entre o commit no principal e esta cópia ficariam com o nome antigo
+                marcar_alteradas(sessao, tabela.name)
+                await sessao.commit()
+
+        falhas = await self._em_cada_replica(gravar)
+        if falhas:
+            # O principal já confirmou a alteração: a sincronização tenta de novo
+            logger.warning("Falha ao replicar %s %s em %d shard(s): %r", tabela.name, pk_id, len(falhas), falhas[0])
+            self._pendentes.add((modelo, pk_id))
+            self.sincronizacao_pendente.set()
+
+    async def replicar(self, instancia) -> None:
+        """Copia (upsert pelo pk_id) uma categoria/CT já gravada no principal para os shards."""
+        if not self.ativo:
+            return
+        mapper = inspect(instancia).mapper
+        valores = {atributo.columns[0].name: getattr(instancia, atributo.key) for atributo in mapper.column_attrs}
+        async with self._replicacao:
+            await self._copiar(mapper.class_, valores["pk_id"], valores)
+
+    async def remover(self, modelo, pk_id: int) -> None:
+        """Remove dos shards uma categoria/CT apagada no principal."""
+        if not self.ativo:
+            return
+        async with self._replicacao:
+            await self._copiar(modelo, pk_id, None)
+
+    # --- SINCRONIZAÇÃO ---
+    async def sincronizar(self) -> None:
+        """
+        Acerta os shards com o banco principal:
+        - refaz as cópias que falharam neste processo, com o estado ATUAL do principal;
+        - insere as categorias/CTs que faltam em algum shard (cópia perdida numa queda do
+          processo). Só insere: o retrato do principal lido aqui pode ser mais velho que
+          uma cópia feita em paralelo por outra requisição, e não deve sobrescrevê-la;
+        - apaga do registro global as reservas órfãs.
+        """
+        if not self.ativo:
+            return
+        async with self.fabrica_principal()() as principal:
+            async with self._replicacao:
+                for modelo, pk_id in list(self._pendentes):
+                    self._pendentes.discard((modelo, pk_id))
+                    linha = (await principal.execute(
+                        select(modelo.__table__).where(modelo.__table__.c.pk_id == pk_id)
+                    )).mappings().first()
+                    await self._copiar(modelo, pk_id, dict(linha) if linha else None)
+            referencias = {
+                modelo.__table__: [dict(linha) for linha in (await principal.execute(select(modelo.__table__))).mappings()]
+                for modelo in REFERENCIAS
+            }
+            await self._remover_reservas_orfas(principal)
+
+        async def completar(fabrica: sessionmaker) -> None:
+            async with fabrica() as sessao:
+                dialeto_insert = pg_insert if sessao.bind.dialect.name == "postgresql" else sqlite_insert
+                for tabela, linhas in referencias.items():
+                    if linhas:
+                        await sessao.execute(dialeto_insert(tabela).values(linhas).on_conflict_do_nothing())
+                        marcar_alteradas(sessao, tabela.name)
+                await sessao.commit()
+
+        falhas = await self._em_cada_replica(completar)
+        if falhas:
+            logger.warning("Sincronização incompleta em %d shard(s): %r", len(falhas), falhas[0])
+            self.sincronizacao_pendente.set()
+
+    async def _remover_reservas_orfas(self, principal: AsyncSession) -> None:
+        """
+        Reservas do registro global sem atleta (quente ou arquivado) em nenhum shard: sobras
+        de uma queda entre a reserva e o INSERT. Confere as do último dia com mais de
+        `_RESERVA_ORFA_APOS` (as mais novas podem estar com o INSERT em andamento).
+        """
+        agora = datetime.now(timezone.utc)
+        reservas = set((await principal.execute(
+            select(AtletaRegistroModel.pk_id).where(
+                AtletaRegistroModel.criado_em.between(agora - timedelta(days=1), agora - _RESERVA_ORFA_APOS)
+            )
+        )).scalars())
+        if not reservas:
+            return
+        for _, fabrica in self.fabricas():
+            async with fabrica() as sessao:
+                for modelo in (AtletaModel, AtletaArquivoModel):
+                    reservas -= set((await sessao.execute(
+                        select(modelo.pk_id).where(modelo.pk_id.in_(reservas))
+                    )).scalars())
+        if reservas:
+            await principal.execute(delete(AtletaRegistroModel).where(AtletaRegistroModel.pk_id.in_(reservas)))
+            await principal.commit()
+            logger.warning("Registro global: %d reservas órfãs removidas", len(reservas))
+
+    async def encerrar(self) -> None:
+        await asyncio.gather(*(e.dispose() for e in self._engines.values() if e is not engine))
+
+
+roteador = Roteador(settings.SHARDS, settings.SHARDS_MAPA)
+
+
+async def tarefa_sincronizacao(intervalo: float = settings.SHARDS_SINCRONIZACAO_INTERVALO) -> None:
+    """
+    Laço de segundo plano iniciado pelo lifespan (com SHARDS): sincroniza ao iniciar, a
+    cada `intervalo` e logo depois de uma replicação que falhou, com espera crescente
+    enquanto algum shard continuar falhando.
+    """
+    espera = 1.0
+    while True:
+        roteador.sincronizacao_pendente.clear()
+        try:
+            await roteador.sincronizar()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Falha na sincronização dos shards")
+            roteador.sincronizacao_pendente.set()
+        if roteador.sincronizacao_pendente.is_set():
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, intervalo)
+            continue
+        espera = 1.0
+        try:
+            await asyncio.wait_for(roteador.sincronizacao_pendente.wait(), timeout=intervalo)
+        except asyncio.TimeoutError:
+            pass
+
+
+# --- REGISTRO GLOBAL DOS ATLETAS ---
+async def reservar_cpfs(principal: AsyncSession, linhas: list[dict]) -> dict[str, int]:
+    """
+    Grava no registro global (banco principal) o id e o CPF de cada atleta novo e devolve
+    cpf -> pk_id das reservas feitas; CPFs já registrados ficam de fora. Confirma na hora:
+    o INSERT no shard vem depois e, se falhar, as reservas voltam com `liberar_reservas`.
+    """
+    dialeto_insert = pg_insert if principal.bind.dialect.name == "postgresql" else sqlite_insert
+    consulta = (
+        dialeto_insert(AtletaRegistroModel)
+        .values([{"id": linha["id"], "cpf": linha["cpf"]} for linha in linhas])
+        .on_conflict_do_nothing()
+        .returning(AtletaRegistroModel.pk_id, AtletaRegistroModel.cpf)
+    )
+    reservados = {cpf: pk_id for pk_id, cpf in (await principal.execute(consulta)).all()}
+    await principal.commit()
+    return reservados
+
+
+async def liberar_reservas(principal: AsyncSession, pk_ids: Iterable[int]) -> None:
+    """Apaga reservas do registro global (INSERT no shard que falhou, atleta removido)."""
+    pk_ids = list(pk_ids)
+    if not pk_ids:
+        return
+    try:
+        await principal.execute(delete(AtletaRegistroModel).where(AtletaRegistroModel.pk_id.in_(pk_ids)))
+        await principal.commit()
+    except Exception:
+        # O CPF continua bloqueado até a sincronização achar a reserva órfã
+        await principal.rollback()
+        logger.exception("Falha ao liberar %d reservas do registro global", len(pk_ids))
+
+
+async def trocar_cpf_reservado(principal: AsyncSession, pk_id: int, cpf: str) -> None:
+    """Troca o CPF de uma reserva (IntegrityError se o novo já estiver registrado)."""
+    try:
+        await principal.execute(
+            update(AtletaRegistroModel).where(AtletaRegistroModel.pk_id == pk_id).values(cpf=cpf)
+        )
+        await principal.commit()
+    except Exception:
+        await principal.rollback()
+        raise
+
+
+class SessoesShards:
+    """
+    Sessões de uma requisição, uma por shard, abertas sob demanda.
+    Sem sharding, todas são a própria sessão da requisição (DatabaseDependency).
+    """
+
+    def __init__(self, principal: AsyncSession, roteador: Roteador = roteador) -> None:
+        self.principal = principal
+        self.roteador = roteador
+        self._abertas: dict[str, AsyncSession] = {}
+
+    def sessao(self, nome: str) -> AsyncSession:
+        if not self.roteador.ativo:
+            return self.principal
+        if nome not in self._abertas:
+            self._abertas[nome] = self.roteador.fabrica(nome)()
+        return self._abertas[nome]
+
+    def do_centro(self, centro_id: UUID) -> AsyncSession:
+        """Sessão do shard onde ficam os atletas do CT."""
+        return self.sessao(self.roteador.shard_do_centro(centro_id))
+
+    def todas(self) -> list[tuple[str, AsyncSession]]:
+        if not self.roteador.ativo:
+            return [(PRINCIPAL, self.principal)]
+        return [(nome, self.sessao(nome)) for nome in self.roteador.nomes]
+
+    async def em_todas(self, funcao: Callable[[str, AsyncSession], Awaitable[T]]) -> list[T]:
+        """Executa `funcao` em cada shard ao mesmo tempo (cada um com a sua sessão/conexão)."""
+        return list(await asyncio.gather(*(funcao(nome, sessao) for nome, sessao in self.todas())))
+
+    async def fechar(self) -> None:
+        await asyncio.gather(*(sessao.close() for sessao in self._abertas.values()))
+
+
+async def executar_consultas(
+    pares: Iterable[tuple[AsyncSession, Select]], escalar: bool
+) -> list[Sequence]:
+    """
+    Executa várias consultas e devolve os resultados na mesma ordem. Consultas de
+    sessões diferentes rodam em paralelo; as da mesma sessão, uma após a outra
+    (uma AsyncSession não aceita comandos simultâneos).
+    """
+    pares = list(pares)
+    por_sessao: dict[int, list[int]] = {}
+    for posicao, (sessao, _) in enumerate(pares):
+        por_sessao.setdefault(id(sessao), []).append(posicao)
+
+    resultados: list[Sequence] = [()] * len(pares)
+
+    async def executar(posicoes: list[int]) -> None:
+        for posicao in posicoes:
+            sessao, consulta = pares[posicao]
+            resultado = await sessao.execute(consulta)
+            resultados[posicao] = resultado.scalars().all() if escalar else resultado.all()
+
+    await asyncio.gather(*(executar(posicoes) for posicoes in por_sessao.values()))
+    return resultados
+
+
+def mesclar(parciais: Sequence[Sequence[T]], chave: Callable[[T], object], inicio: int = 0, fim: int | None = None) -> list[T]:
+    """Mescla listas já ordenadas por `chave` e devolve a fatia [inicio:fim]."""
+    return list(islice(heapq.merge(*parciais, key=chave), inicio, fim))
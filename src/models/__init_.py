@@ -1,6 +1,11 @@
 from .base import BaseModel
 from .atleta import AtletaModel
+from .atleta_arquivo import AtletaArquivoModel
+from .atleta_chave import AtletaChaveModel
+from .atleta_registro import AtletaRegistroModel
 from .categorias import CategoriaModel
 from .centro_treinamento import CentroTreinamentoModel
+from .medida import MedidaModel
+from .outbox import OutboxModel
 
-__all__ = ["BaseModel", "AtletaModel", "CategoriaModel", "CentroTreinamentoModel"]
+__all__ = ["BaseModel", "AtletaModel", "AtletaArquivoModel", "AtletaChaveModel", "AtletaRegistroModel", "CategoriaModel", "CentroTreinamentoModel", "MedidaModel", "OutboxModel"]
@@ -1,6 +1,6 @@
 # src/models/atleta.py
 from datetime import datetime, timezone
-from sqlalchemy import ForeignKey, Integer, String, Float, DateTime
+from sqlalchemy import ForeignKey, Index, Integer, String, Float, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import BaseModel
 
@@ -19,6 +19,14 @@ class AtletaModel(BaseModel):
         default=lambda: datetime.now(timezone.utc), 
         nullable=False
     )
+    # Última escrita no atleta (cadastro, alteração ou medida); base do arquivamento de inativos
+    ultima_atividade_em: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True
+    )
 
     categoria_id: Mapped[int] = mapped_column(ForeignKey("categorias.pk_id"))
     categoria: Mapped["CategoriaModel"] = relationship(
@@ -31,3 +39,14 @@ class AtletaModel(BaseModel):
         "CentroTreinamentoModel", back_populates="atletas",
         lazy="selectin"
     )
+
+    __table_args__ = (
+        # Elencos por categoria/CT (src/core/elencos.py): filtro pelo pai + ordem de cadastro
+        Index("ix_atletas_categoria_id_pk_id", "categoria_id", "pk_id"),
+        Index("ix_atletas_centro_treinamento_id_pk_id", "centro_treinamento_id", "pk_id"),
+    )
+    __mapper_args__ = {
+        # Identidade no ORM = chave da tabela particionada (pk_id + CT, migração e4b7c2d9a615):
+        # os UPDATE/DELETE do ORM já saem com a coluna de partição e vão direto à partição certa
+        "primary_key": [pk_id, centro_treinamento_id],
+    }
@@ -0,0 +1,34 @@
+# src/models/atleta_arquivo.py
+from datetime import datetime, timezone
+from sqlalchemy import ForeignKey, Integer, String, Float, DateTime
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from .base import BaseModel
+
+class AtletaArquivoModel(BaseModel):
+    """
+    Atletas inativos movidos para fora da tabela `atletas` (camada fria).
+    Mesmas colunas e mesmo pk_id do registro original, para que possam ser
+    lidos com o mesmo schema de saída (AtletaOut).
+    """
+    __tablename__ = "atletas_arquivo"
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    nome: Mapped[str] = mapped_column(String(50), nullable=False)
+    cpf: Mapped[str] = mapped_column(String(11), unique=True, nullable=False)
+    idade: Mapped[int] = mapped_column(Integer, nullable=False)
+    peso: Mapped[float] = mapped_column(Float, nullable=False)
+    altura: Mapped[float] = mapped_column(Float, nullable=False)
+    sexo: Mapped[str] = mapped_column(String(1), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ultima_atividade_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    arquivado_em: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    categoria_id: Mapped[int] = mapped_column(ForeignKey("categorias.pk_id"))
+    categoria: Mapped["CategoriaModel"] = relationship("CategoriaModel", lazy="selectin")
+
+    centro_treinamento_id: Mapped[int] = mapped_column(ForeignKey("centros_treinamento.pk_id"))
+    centro_treinamento: Mapped["CentroTreinamentoModel"] = relationship("CentroTreinamentoModel", lazy="selectin")
@@ -0,0 +1,24 @@
+# src/models/atleta_chave.py
+from sqlalchemy import Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import BaseModel
+
+class AtletaChaveModel(BaseModel):
+    """
+    Chaves globais dos atletas quando `atletas` é particionada (migração e4b7c2d9a615).
+
+    Numa tabela particionada, UNIQUE/PRIMARY KEY precisam incluir a coluna de partição,
+    então `id` e `cpf` deixam de ser únicos no conjunto das partições. Esta tabela
+    (não particionada) guarda uma linha por atleta, mantida por trigger, e é ela que
+    garante a unicidade global. Também diz o centro de treinamento (chave de
+    partição) de um id/cpf, para as buscas chegarem a uma única partição.
+    """
+    __tablename__ = "atletas_chaves"
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    cpf: Mapped[str] = mapped_column(String(11), unique=True, nullable=False)
+    centro_treinamento_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("id", name="atletas_chaves_id_key"),
+    )
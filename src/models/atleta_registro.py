@@ -0,0 +1,29 @@
+# src/models/atleta_registro.py
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import BaseModel
+
+class AtletaRegistroModel(BaseModel):
+    """
+    Registro global dos atletas com sharding (SHARDS), mantido no banco principal.
+
+    O índice único de cada shard só enxerga o próprio banco: é o UNIQUE(cpf) daqui que
+    garante o CPF único entre os shards. O pk_id também nasce aqui e é gravado no shard,
+    então não se repete entre eles. Uma linha por atleta (quente ou arquivado), criada
+    antes do INSERT no shard e apagada junto com o atleta (src/core/shards.py).
+    """
+    __tablename__ = "atletas_registro"
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cpf: Mapped[str] = mapped_column(String(11), unique=True, nullable=False)
+    criado_em: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    __table_args__ = (
+        # Reservas recentes, conferidas pela sincronização (src/core/shards.py)
+        Index("ix_atletas_registro_criado_em", "criado_em"),
+    )
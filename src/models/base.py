@@ -1,11 +1,11 @@
-from uuid import uuid4
-from sqlalchemy import UUID
+from uuid import UUID, uuid4
+from sqlalchemy import Uuid
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
 class BaseModel(DeclarativeBase):
+    # Uuid genérico: UUID nativo no PostgreSQL e CHAR(32) no SQLite (testes em memória)
     id: Mapped[UUID] = mapped_column(
-        PG_UUID(as_uuid=True),
+        Uuid(as_uuid=True),
         default=uuid4,
         nullable=False
     )
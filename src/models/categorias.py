@@ -8,7 +8,9 @@ class CategoriaModel(BaseModel):
     pk_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     nome: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
 
-    # Usando string "AtletaModel" para evitar referência direta
+    # Usando string "AtletaModel" para evitar referência direta.
+    # raise_on_sql: em contexto assíncrono um lazy load implícito quebraria (MissingGreenlet)
+    # ou viraria N+1; o elenco é carregado em lote por src/core/elencos.py
     atletas: Mapped[list['AtletaModel']] = relationship(
-        "AtletaModel", back_populates="categoria"
+        "AtletaModel", back_populates="categoria", lazy="raise_on_sql"
     )
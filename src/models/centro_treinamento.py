@@ -14,7 +14,9 @@ class CentroTreinamentoModel(BaseModel):
     proprietario: Mapped[str] = mapped_column(String(30), nullable=False)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), nullable=False)
+    # Carregado em lote por src/core/elencos.py; acesso implícito levanta erro em vez de consultar
     atletas: Mapped[list['AtletaModel']] = relationship(
         "AtletaModel", 
-        back_populates='centro_treinamento'
+        back_populates='centro_treinamento',
+        lazy="raise_on_sql"
     )
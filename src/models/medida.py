@@ -0,0 +1,28 @@
+# src/models/medida.py
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, DateTime, Float, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import BaseModel
+
+class MedidaModel(BaseModel):
+    """Histórico de peso/altura do atleta (série temporal)."""
+    __tablename__ = "atletas_medidas"
+
+    # BIGSERIAL no PostgreSQL; INTEGER no SQLite (só assim ele gera o autoincremento)
+    pk_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # Sem FOREIGN KEY: o atleta pode estar em `atletas` ou em `atletas_arquivo` (mesmo pk_id)
+    atleta_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    peso: Mapped[float | None] = mapped_column(Float, nullable=True)
+    altura: Mapped[float | None] = mapped_column(Float, nullable=True)
+    medido_em: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    __table_args__ = (
+        # Consultas por atleta + intervalo de tempo (o caso comum dos gráficos)
+        Index("ix_atletas_medidas_atleta_medido_em", "atleta_id", "medido_em"),
+        # BRIN: índice minúsculo para varreduras por período em toda a tabela (dados chegam em ordem de tempo)
+        Index("ix_atletas_medidas_medido_em_brin", "medido_em", postgresql_using="brin"),
+    )
@@ -0,0 +1,44 @@
+# src/models/outbox.py
+from datetime import datetime, timezone
+from sqlalchemy import JSON, BigInteger, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import BaseModel
+
+class OutboxModel(BaseModel):
+    """
+    Eventos de integração (transactional outbox), gravados na mesma transação da
+    alteração e entregues aos sistemas externos por src/core/outbox.py.
+    O `id` (UUID) identifica o evento para o consumidor descartar reentregas.
+    """
+    __tablename__ = "outbox"
+
+    # BIGSERIAL no PostgreSQL; INTEGER no SQLite (só assim ele gera o autoincremento)
+    pk_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    agregado: Mapped[str] = mapped_column(String(30), nullable=False)      # "atletas" | "centros_treinamento"
+    agregado_id: Mapped[str] = mapped_column(String(36), nullable=False)   # id (UUID) do registro alterado
+    tipo: Mapped[str] = mapped_column(String(20), nullable=False)          # "criado" | "atualizado" | "removido"
+    dados: Mapped[dict] = mapped_column(JSON, nullable=False)
+    criado_em: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+    tentativas: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    proxima_tentativa_em: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+    ultimo_erro: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Preenchido ao esgotar as tentativas: o evento sai da fila (e libera os seguintes do mesmo agregado)
+    falhou_em: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Ordem por agregado: eventos anteriores ainda pendentes do mesmo registro
+        Index("ix_outbox_agregado_pk_id", "agregado", "agregado_id", "pk_id"),
+        # Fila do despachante: só as linhas ainda pendentes
+        Index(
+            "ix_outbox_pendentes", "proxima_tentativa_em",
+            postgresql_where=text("falhou_em IS NULL"), sqlite_where=text("falhou_em IS NULL"),
+        ),
+    )
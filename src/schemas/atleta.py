@@ -1,16 +1,66 @@
 # src/schemas/atleta.py
 
+import re
 from datetime import datetime
 from typing import Annotated, Optional
-from pydantic import BaseModel, Field, PositiveFloat
+from pydantic import UUID4, AfterValidator, BaseModel, Field, PositiveFloat
+from src.configs.settings import settings
 from src.schemas.schemas import BaseSchema, OutMixin
 from src.schemas.categorias import CategoriaIn
 from src.schemas.centros_treinamento import CentroTreinamentoIn
 
+_NAO_DIGITOS = re.compile(r"[^0-9]")
+
+
+def digitos_verificadores_cpf(base: str) -> str:
+    """Os dois dígitos verificadores dos 9 primeiros dígitos do CPF."""
+    digitos = [int(d) for d in base]
+    for _ in range(2):
+        soma = sum(d * peso for d, peso in zip(digitos, range(len(digitos) + 1, 1, -1)))
+        digitos.append(soma * 10 % 11 % 10)
+    return f"{digitos[-2]}{digitos[-1]}"
+
+
+def digitos_verificadores_cpf_sql(base: str) -> str:
+    """
+    Mesmo cálculo de `digitos_verificadores_cpf` em SQL (PostgreSQL e SQLite), para a
+    expressão `base` com os 9 primeiros dígitos: migrações e dados sintéticos dos benchmarks.
+    """
+    digitos = [f"CAST(substr({base}, {posicao}, 1) AS INTEGER)" for posicao in range(1, 10)]
+    primeiro = f"(({' + '.join(f'{d} * {peso}' for d, peso in zip(digitos, range(10, 1, -1)))}) * 10 % 11 % 10)"
+    segundo = (
+        f"(({' + '.join(f'{d} * {peso}' for d, peso in zip(digitos, range(11, 2, -1)))} + {primeiro} * 2)"
+        f" * 10 % 11 % 10)"
+    )
+    return f"CAST({primeiro} AS TEXT) || CAST({segundo} AS TEXT)"
+
+
+def normalizar_cpf(valor: str) -> str:
+    """
+    Aceita o CPF com ou sem formatação ("123.456.789-09" ou "12345678909") e devolve
+    só os 11 dígitos, que é como ele é gravado e comparado no banco.
+    """
+    cpf = _NAO_DIGITOS.sub("", valor)
+    if len(cpf) != 11:
+        raise ValueError('CPF deve ter 11 dígitos')
+    # Sequências repetidas (000..., 111...) passam no cálculo, mas não são CPFs válidos
+    if cpf == cpf[0] * 11 or digitos_verificadores_cpf(cpf[:9]) != cpf[9:]:
+        raise ValueError('CPF inválido')
+    return cpf
+
+
+# CPF normalizado e com dígitos verificadores conferidos (corpo, query e path)
+Cpf = Annotated[
+    str,
+    Field(description='CPF do atleta (com ou sem pontuação)', example='123.456.789-09', max_length=14),
+    AfterValidator(normalizar_cpf),
+]
+
+
 # Schemas para entrada (usados no POST)
 class Atleta(BaseSchema):
     nome: Annotated[str, Field(description='Nome do atleta', example='João', max_length=50)]
-    cpf: Annotated[str, Field(description='CPF do atleta', example='12345678900', max_length=11)]
+    cpf: Cpf
     idade: Annotated[int, Field(description='Idade do atleta', example=20)]
     peso: Annotated[PositiveFloat, Field(description='Peso do atleta', example=70.5)]
     altura: Annotated[PositiveFloat, Field(description='Altura do atleta', example=1.70)]
@@ -56,8 +106,15 @@ class AtletaOut(OutMixin):
 
 class AtletaUpdate(BaseSchema):
     nome: Optional[str] = Field(default=None, description='Nome do atleta', example='João', max_length=50)
-    cpf: Optional[str] = Field(default=None, description='CPF do atleta', example='12345678900', max_length=11)
+    cpf: Optional[Cpf] = None
     idade: Optional[int] = Field(default=None, description='Idade do atleta', example=20)
     peso: Optional[PositiveFloat] = Field(default=None, description='Peso do atleta', example=70.5)
     altura: Optional[PositiveFloat] = Field(default=None, description='Altura do atleta', example=1.70)
-    sexo: Optional[str] = Field(default=None, description='Sexo do atleta', example='M', max_length=1)
\ No newline at end of file
+    sexo: Optional[str] = Field(default=None, description='Sexo do atleta', example='M', max_length=1)
+
+class AtletaBatchIn(BaseSchema):
+    """Lista de ids para buscar vários atletas em uma única consulta (POST /atletas/batch-get)"""
+    ids: Annotated[
+        list[UUID4],
+        Field(description='Ids dos atletas', min_length=1, max_length=settings.ATLETAS_BATCH_MAX),
+    ]
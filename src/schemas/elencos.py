@@ -0,0 +1,29 @@
+# src/schemas/elencos.py
+from typing import Annotated
+from pydantic import Field
+from src.schemas.categorias import CategoriaOut
+from src.schemas.centros_treinamento import CentroTreinamentoOut
+from src.schemas.schemas import BaseSchema, OutMixin
+
+
+class AtletaElencoOut(OutMixin):
+    """Atleta dentro do elenco de uma categoria/CT (sem repetir o próprio pai)"""
+    nome: str
+    cpf: str
+    idade: int
+    peso: float
+    altura: float
+    sexo: str
+
+
+class ElencoMixin(BaseSchema):
+    atletas: Annotated[list[AtletaElencoOut], Field(description='Atletas, em ordem de cadastro (até atletas_limite)')]
+    total_atletas: Annotated[int, Field(description='Total de atletas; maior que len(atletas) se o elenco foi truncado')]
+
+
+class CategoriaComAtletasOut(ElencoMixin, CategoriaOut):
+    pass
+
+
+class CentroTreinamentoComAtletasOut(ElencoMixin, CentroTreinamentoOut):
+    pass
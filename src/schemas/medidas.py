@@ -0,0 +1,45 @@
+# src/schemas/medidas.py
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+from pydantic import Field, PositiveFloat, model_validator
+from src.configs.settings import settings
+from src.schemas.schemas import BaseSchema
+
+class MedidaIn(BaseSchema):
+    peso: Optional[PositiveFloat] = Field(default=None, description='Peso do atleta', example=70.5)
+    altura: Optional[PositiveFloat] = Field(default=None, description='Altura do atleta', example=1.70)
+    medido_em: Optional[datetime] = Field(default=None, description='Momento da medição (padrão: agora)')
+
+    @model_validator(mode='after')
+    def exige_alguma_medida(self):
+        if self.peso is None and self.altura is None:
+            raise ValueError('Informe ao menos peso ou altura')
+        return self
+
+
+class MedidasLoteIn(BaseSchema):
+    """Envio em lote (ex.: sincronização de balanças e relógios)"""
+    medidas: Annotated[list[MedidaIn], Field(min_length=1, max_length=settings.MEDIDAS_LOTE_MAX)]
+
+
+class MedidasLoteOut(BaseSchema):
+    inseridas: Annotated[int, Field(description='Quantidade de medidas gravadas')]
+
+
+class MedidaOut(BaseSchema):
+    peso: Optional[float]
+    altura: Optional[float]
+    medido_em: datetime
+
+
+class MedidaAgregadaOut(BaseSchema):
+    """Um ponto por período (dia/semana/mês) com os agregados das medidas do período"""
+    periodo: Annotated[datetime, Field(description='Início do período')]
+    quantidade: int
+    peso_medio: Optional[float]
+    peso_min: Optional[float]
+    peso_max: Optional[float]
+    altura_media: Optional[float]
+
+
+Agregacao = Literal['dia', 'semana', 'mes']
@@ -0,0 +1,187 @@
+# tests/conftest.py
+"""
+Infraestrutura dos testes da API.
+
+- O schema é criado UMA vez por execução (por worker do pytest-xdist), direto de
+  BaseModel.metadata, sem rodar as migrações.
+- Todos os testes usam a mesma conexão. Cada teste abre uma transação nela e a
+  desfaz no final; as sessões das requisições (get_session) entram nessa transação
+  como SAVEPOINTs, então os commits/rollbacks das rotas funcionam normalmente e nada
+  sobra para o teste seguinte.
+- Banco padrão: SQLite em memória (TEST_DB_URL=sqlite+aiosqlite://). Para rodar contra
+  o PostgreSQL, aponte TEST_DB_URL para um banco de testes: cada worker usa um schema
+  próprio (testes_<worker>), recriado no início.
+"""
+import os
+
+# Antes de importar `src`: as configurações são lidas na importação
+TEST_DB_URL = os.environ.get("TEST_DB_URL", "sqlite+aiosqlite://")
+os.environ["DB_URL"] = TEST_DB_URL
+os.environ["ADMIN_TOKEN"] = "token-testes"
+for variavel in ("SHARDS", "SHARDS_MAPA", "ATLETAS_AGRUPAMENTO_ATIVO", "ATLETAS_PARTICIONADA", "CACHE_BACKEND"):
+    os.environ.pop(variavel, None)
+
+import httpx
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.app.main import app
+from src.core.cache_backends import cache
+from src.core.database import get_session
+from src.models.base import BaseModel
+# Registra todas as tabelas em BaseModel.metadata (mesma lista do alembic/env.py)
+from src.models.atleta import AtletaModel  # noqa: F401
+from src.models.atleta_arquivo import AtletaArquivoModel  # noqa: F401
+from src.models.atleta_chave import AtletaChaveModel  # noqa: F401
+from src.models.atleta_registro import AtletaRegistroModel  # noqa: F401
+from src.models.categorias import CategoriaModel  # noqa: F401
+from src.models.centro_treinamento import CentroTreinamentoModel  # noqa: F401
+from src.models.medida import MedidaModel  # noqa: F401
+from src.models.outbox import OutboxModel  # noqa: F401
+from src.schemas.atleta import digitos_verificadores_cpf
+
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "principal")
+
+
+def criar_engine(url: str):
+    """Engine de testes: uma conexão só, com SAVEPOINTs funcionando também no SQLite."""
+    if make_url(url).get_backend_name() != "sqlite":
+        schema = f"testes_{WORKER}"
+        return create_async_engine(
+            url, poolclass=StaticPool, connect_args={"server_settings": {"search_path": schema}}
+        ), schema
+
+    motor = create_async_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    # O driver do SQLite abre/fecha transações por conta própria e ignora os SAVEPOINTs;
+    # com isolation_level=None quem emite o BEGIN é o SQLAlchemy
+    @event.listens_for(motor.sync_engine, "connect")
+    def _autocommit_driver(conexao_dbapi, _registro):
+        conexao_dbapi.isolation_level = None
+        # FOREIGN KEYs valendo, como no PostgreSQL (o SQLite as ignora por padrão)
+        cursor = conexao_dbapi.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.close()
+
+    @event.listens_for(motor.sync_engine, "begin")
+    def _begin(conexao):
+        conexao.exec_driver_sql("BEGIN")
+
+    return motor, None
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def conexao():
+    """Conexão única da execução, já com o schema criado."""
+    motor, schema = criar_engine(TEST_DB_URL)
+    async with motor.connect() as conexao:
+        if schema is not None:
+            await conexao.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await conexao.execute(text(f"CREATE SCHEMA {schema}"))
+            # Criada pela migração dos eventos (não faz parte dos modelos)
+            await conexao.execute(text("CREATE SEQUENCE eventos_id_seq"))
+        await conexao.run_sync(BaseModel.metadata.create_all)
+        await conexao.commit()
+        yield conexao
+        if schema is not None:
+            await conexao.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+            await conexao.commit()
+    await motor.dispose()
+
+
+@pytest.fixture
+async def transacao(conexao):
+    """Transação do teste: tudo o que ele gravar é desfeito no final."""
+    externa = await conexao.begin()
+    try:
+        yield conexao
+    finally:
+        await externa.rollback()
+
+
+def nova_sessao(conexao) -> AsyncSession:
+    # commit/rollback da sessão viram RELEASE/ROLLBACK TO SAVEPOINT na transação do teste
+    return AsyncSession(bind=conexao, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+
+@pytest.fixture
+async def db_session(transacao):
+    """Sessão para preparar/conferir dados direto no banco, dentro da transação do teste."""
+    async with nova_sessao(transacao) as sessao:
+        yield sessao
+
+
+@pytest.fixture
+async def client(transacao):
+    """Cliente HTTP da aplicação; cada requisição ganha sua sessão, como em produção."""
+
+    async def sessao_de_teste():
+        async with nova_sessao(transacao) as sessao:
+            yield sessao
+
+    app.dependency_overrides[get_session] = sessao_de_teste
+    # O rollback do teste não muda as versões das tabelas: valores em cache de um
+    # teste seriam servidos no seguinte
+    await cache.fechar()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testes") as cliente:
+            yield cliente
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+
+
+# --- DADOS ---
+def gerar_cpf(numero: int) -> str:
+    """CPF válido a partir de um número (1 -> 00000000191)."""
+    base = f"{numero:09d}"
+    return base + digitos_verificadores_cpf(base)
+
+
+def dados_atleta(numero: int = 1, categoria: str = "Scale", centro: str = "CT King", **campos) -> dict:
+    return {
+        "nome": f"Atleta {numero}",
+        "cpf": gerar_cpf(numero),
+        "idade": 25,
+        "peso": 70.5,
+        "altura": 1.7,
+        "sexo": "M",
+        "categoria": {"nome": categoria},
+        "centro_treinamento": {"nome": centro, "endereco": "Rua X", "proprietario": "Marcos"},
+        **campos,
+    }
+
+
+@pytest.fixture
+async def categoria(client) -> dict:
+    resposta = await client.post("/categorias/", json={"nome": "Scale"})
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+@pytest.fixture
+async def centro(client) -> dict:
+    resposta = await client.post(
+        "/centros-treinamento/", json={"nome": "CT King", "endereco": "Rua X", "proprietario": "Marcos"}
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+@pytest.fixture
+async def criar_atleta(client, categoria, centro):
+    """Cadastra atletas pela API (na categoria/CT padrão) e devolve o JSON de resposta."""
+
+    async def criar(numero: int = 1, **campos) -> dict:
+        resposta = await client.post("/atletas/", json=dados_atleta(numero, **campos))
+        assert resposta.status_code == 201, resposta.text
+        return resposta.json()
+
+    return criar
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from src.core.agrupamento import AgrupadorEscritas
+
+pytestmark = pytest.mark.anyio
+
+
+class Processador:
+    """Guarda os lotes recebidos; itens negativos voltam como erro só deles."""
+
+    def __init__(self) -> None:
+        self.lotes: list[list[int]] = []
+
+    async def __call__(self, itens: list[int]) -> list:
+        self.lotes.append(itens)
+        return [ValueError(item) if item < 0 else item * 10 for item in itens]
+
+
+async def test_itens_da_janela_viram_um_lote():
+    processador = Processador()
+    agrupador = AgrupadorEscritas(processador, janela=0.01, maximo=10)
+
+    resultados = await asyncio.gather(*(agrupador.enviar(item) for item in (1, 2, 3)))
+    assert resultados == [10, 20, 30]
+    assert processador.lotes == [[1, 2, 3]]
+
+
+async def test_maximo_despacha_sem_esperar_a_janela():
+    processador = Processador()
+    agrupador = AgrupadorEscritas(processador, janela=60, maximo=2)
+
+    resultados = await asyncio.wait_for(asyncio.gather(*(agrupador.enviar(item) for item in (1, 2))), 1)
+    assert resultados == [10, 20]
+
+
+async def test_erro_de_um_item_fica_so_com_ele():
+    agrupador = AgrupadorEscritas(Processador(), janela=0.01, maximo=10)
+
+    resultados = await asyncio.gather(*(agrupador.enviar(item) for item in (1, -2, 3)), return_exceptions=True)
+    assert resultados[0] == 10 and resultados[2] == 30
+    assert isinstance(resultados[1], ValueError)
+
+
+async def test_falha_do_lote_vai_para_todos():
+    async def falhar(itens):
+        raise ConnectionError("banco fora do ar")
+
+    agrupador = AgrupadorEscritas(falhar, janela=0.01, maximo=10)
+    resultados = await asyncio.gather(*(agrupador.enviar(item) for item in (1, 2)), return_exceptions=True)
+    assert all(isinstance(resultado, ConnectionError) for resultado in resultados)
+
+
+async def test_esvaziar_processa_os_pendentes():
+    processador = Processador()
+    agrupador = AgrupadorEscritas(processador, janela=60, maximo=10)
+
+    pendente = asyncio.ensure_future(agrupador.enviar(1))
+    await asyncio.sleep(0)
+    await agrupador.esvaziar()
+    assert await pendente == 10
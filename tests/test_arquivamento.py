@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+
+from src.core.arquivamento import arquivar_lote
+from src.models.atleta import AtletaModel
+from src.models.atleta_arquivo import AtletaArquivoModel
+from tests.conftest import dados_atleta, nova_sessao
+
+pytestmark = pytest.mark.anyio
+
+LIMITE = datetime.now(timezone.utc) - timedelta(days=30)
+
+
+@pytest.fixture
+def arquivar(transacao):
+    """arquivar_lote com sessões dentro da transação do teste."""
+
+    async def executar(tamanho: int = 500) -> int:
+        return await arquivar_lote(LIMITE, tamanho, lambda: nova_sessao(transacao))
+
+    return executar
+
+
+async def inativar(db_session, *atletas: dict) -> None:
+    await db_session.execute(
+        update(AtletaModel)
+        .where(AtletaModel.cpf.in_([atleta["cpf"] for atleta in atletas]))
+        .values(ultima_atividade_em=datetime(2020, 1, 1, tzinfo=timezone.utc))
+    )
+    await db_session.commit()
+
+
+async def contar(db_session, modelo) -> int:
+    return (await db_session.execute(select(func.count()).select_from(modelo))).scalar_one()
+
+
+# --- LOTES ---
+async def test_lote_move_e_apaga_so_os_inativos(db_session, arquivar, criar_atleta):
+    primeiro, segundo, ativo = [await criar_atleta(numero) for numero in (1, 2, 3)]
+    await inativar(db_session, primeiro, segundo)
+
+    # Um por lote, em ordem de pk_id: cada lote copia para o arquivo e apaga da tabela quente
+    assert await arquivar(tamanho=1) == 1
+    arquivados = (await db_session.execute(select(AtletaArquivoModel.cpf))).scalars().all()
+    assert arquivados == [primeiro["cpf"]]
+    assert await contar(db_session, AtletaModel) == 2
+
+    assert await arquivar(tamanho=1) == 1
+    assert await arquivar(tamanho=1) == 0
+
+    restantes = (await db_session.execute(select(AtletaModel.cpf))).scalars().all()
+    assert restantes == [ativo["cpf"]]
+    assert await contar(db_session, AtletaArquivoModel) == 2
+
+
+async def test_arquivo_preserva_os_dados_do_atleta(db_session, arquivar, criar_atleta):
+    atleta = await criar_atleta(1)
+    original = (await db_session.execute(select(AtletaModel).where(AtletaModel.cpf == atleta["cpf"]))).scalar_one()
+    pk_id = original.pk_id
+    await inativar(db_session, atleta)
+
+    assert await arquivar() == 1
+    arquivado = (await db_session.execute(select(AtletaArquivoModel))).scalar_one()
+    assert (arquivado.pk_id, str(arquivado.id), arquivado.nome) == (pk_id, atleta["id"], atleta["nome"])
+    assert arquivado.arquivado_em is not None
+
+
+# --- LEITURA ---
+async def test_arquivado_so_aparece_quando_pedido(client, db_session, arquivar, criar_atleta):
+    atleta = await criar_atleta(1)
+    await inativar(db_session, atleta)
+    await arquivar()
+
+    resposta = await client.get(f"/atletas/{atleta['id']}")
+    assert resposta.status_code == 404
+
+    resposta = await client.get(f"/atletas/{atleta['id']}", params={"incluir_arquivados": True})
+    assert resposta.status_code == 200
+    assert resposta.json()["cpf"] == atleta["cpf"]
+    assert resposta.json()["categoria"]["nome"] == "Scale"
+
+    resposta = await client.get(f"/atletas/cpf/{atleta['cpf']}", params={"incluir_arquivados": True})
+    assert resposta.status_code == 200
+
+    resposta = await client.post(
+        "/atletas/batch-get", params={"incluir_arquivados": True}, json={"ids": [atleta["id"]]}
+    )
+    assert [a["id"] for a in resposta.json()] == [atleta["id"]]
+
+
+async def test_historico_de_medidas_segue_disponivel(client, db_session, arquivar, criar_atleta):
+    atleta = await criar_atleta(1)
+    url = f"/atletas/{atleta['id']}/medidas"
+    await client.post(url, json={"peso": 71.0, "medido_em": "2030-01-02T10:00:00Z"})
+    await inativar(db_session, atleta)
+    await arquivar()
+
+    resposta = await client.get(url, params={"inicio": "2030-01-01T00:00:00Z"})
+    assert resposta.status_code == 200
+    assert [m["peso"] for m in resposta.json()] == [71.0]
+
+
+async def test_cpf_de_arquivado_continua_ocupado(client, db_session, arquivar, criar_atleta):
+    atleta = await criar_atleta(1)
+    await inativar(db_session, atleta)
+    await arquivar()
+
+    resposta = await client.post("/atletas/", json=dados_atleta(1))
+    assert resposta.status_code == 409
+
+
+# --- ESCRITA ---
+async def test_arquivado_e_somente_leitura(client, db_session, arquivar, criar_atleta):
+    atleta = await criar_atleta(1)
+    await inativar(db_session, atleta)
+    await arquivar()
+    url = f"/atletas/{atleta['id']}"
+
+    respostas = [
+        await client.patch(url, json={"nome": "Outro"}),
+        await client.delete(url),
+        await client.post(f"{url}/medidas", json={"peso": 70.0}),
+        await client.post(f"{url}/medidas/lote", json={"medidas": [{"peso": 70.0}]}),
+    ]
+    assert [resposta.status_code for resposta in respostas] == [409] * 4
+    assert all("arquivado" in resposta.json()["detail"] for resposta in respostas)
+
+    # Nada mudou no arquivo
+    resposta = await client.get(url, params={"incluir_arquivados": True})
+    assert resposta.json()["nome"] == atleta["nome"]
+
+
+async def test_inexistente_continua_404_na_escrita(client):
+    url = "/atletas/00000000-0000-4000-8000-000000000000"
+    assert (await client.patch(url, json={"nome": "Outro"})).status_code == 404
+    assert (await client.delete(url)).status_code == 404
+    assert (await client.post(f"{url}/medidas", json={"peso": 70.0})).status_code == 404
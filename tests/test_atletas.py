@@ -0,0 +1,137 @@
+import uuid
+
+import pytest
+from sqlalchemy import select, text
+
+from src.models.medida import MedidaModel
+from src.schemas.atleta import digitos_verificadores_cpf_sql
+from tests.conftest import dados_atleta, gerar_cpf
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cadastra_com_categoria_e_centro(client, criar_atleta):
+    atleta = await criar_atleta(1)
+    assert atleta["nome"] == "Atleta 1"
+    assert atleta["categoria"] == {"nome": "Scale"}
+    assert atleta["centro_treinamento"] == {"nome": "CT King"}
+
+    resposta = await client.get(f"/atletas/{atleta['id']}")
+    assert resposta.status_code == 200
+    assert resposta.json()["id"] == atleta["id"]
+    assert resposta.json()["cpf"] == atleta["cpf"]
+
+
+async def test_categoria_inexistente(client, centro):
+    resposta = await client.post("/atletas/", json=dados_atleta(1, categoria="RX"))
+    assert resposta.status_code == 400
+
+
+async def test_cpf_repetido(client, criar_atleta):
+    await criar_atleta(1)
+    resposta = await client.post("/atletas/", json=dados_atleta(1, nome="Outro"))
+    assert resposta.status_code == 409
+
+
+async def test_cpf_invalido(client, categoria, centro):
+    resposta = await client.post("/atletas/", json=dados_atleta(1, cpf="12345678900"))
+    assert resposta.status_code == 422
+
+
+async def test_digitos_verificadores_em_sql(db_session):
+    # A migração do CPF e os benchmarks calculam os dígitos no banco: mesmo resultado do Python
+    for numero in (1, 12345678, 987654321):
+        base = f"{numero:09d}"
+        calculado = (await db_session.execute(
+            text(f"SELECT {digitos_verificadores_cpf_sql(':base')}"), {"base": base}
+        )).scalar_one()
+        assert base + calculado == gerar_cpf(numero)
+
+
+async def test_consulta_pelo_cpf_com_pontuacao(client, criar_atleta):
+    atleta = await criar_atleta(1)
+    cpf = atleta["cpf"]
+    formatado = f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+    resposta = await client.get(f"/atletas/cpf/{formatado}")
+    assert resposta.status_code == 200
+    assert resposta.json()["id"] == atleta["id"]
+    assert (await client.head(f"/atletas/cpf/{cpf}")).status_code == 200
+    assert (await client.head(f"/atletas/cpf/{gerar_cpf(2)}")).status_code == 404
+
+
+async def test_listagem_com_filtros_e_total(client, criar_atleta):
+    for numero in range(1, 6):
+        await criar_atleta(numero)
+
+    resposta = await client.get("/atletas/", params={"limit": 2, "offset": 1, "total": "exato"})
+    assert [a["nome"] for a in resposta.json()] == ["Atleta 2", "Atleta 3"]
+    assert resposta.headers["X-Total-Count"] == "5"
+
+    resposta = await client.get("/atletas/", params={"nome": "Atleta 4"})
+    assert [a["cpf"] for a in resposta.json()] == [gerar_cpf(4)]
+
+    resposta = await client.get("/atletas/", params={"cpf": gerar_cpf(5)})
+    assert [a["nome"] for a in resposta.json()] == ["Atleta 5"]
+
+
+async def test_campos_parciais(client, criar_atleta):
+    await criar_atleta(1)
+
+    resposta = await client.get("/atletas/", params={"fields": "nome,categoria"})
+    assert resposta.status_code == 200
+    assert resposta.json() == [{"nome": "Atleta 1", "categoria": {"nome": "Scale"}}]
+
+    resposta = await client.get("/atletas/", params={"fields": "nome,inexistente"})
+    assert resposta.status_code == 400
+
+
+async def test_busca_em_lote_na_ordem_dos_ids(client, criar_atleta):
+    ids = [(await criar_atleta(numero))["id"] for numero in range(1, 4)]
+
+    pedidos = [ids[2], str(uuid.uuid4()), ids[0]]
+    resposta = await client.post("/atletas/batch-get", json={"ids": pedidos})
+    assert resposta.status_code == 200
+    assert [a["id"] for a in resposta.json()] == [ids[2], ids[0]]
+
+    resposta = await client.post("/atletas/batch-get", params={"fields": "nome"}, json={"ids": ids})
+    assert resposta.json() == [{"nome": f"Atleta {numero}"} for numero in range(1, 4)]
+
+
+async def test_altera_e_registra_medida(client, db_session, criar_atleta):
+    atleta = await criar_atleta(1)
+
+    resposta = await client.patch(f"/atletas/{atleta['id']}", json={"peso": 72.0})
+    assert resposta.status_code == 200
+    assert resposta.json()["peso"] == 72.0
+
+    # Cadastro + alteração: dois pontos no histórico
+    pesos = (await db_session.execute(select(MedidaModel.peso).order_by(MedidaModel.pk_id))).scalars().all()
+    assert pesos == [70.5, 72.0]
+
+
+async def test_alterar_para_cpf_de_outro_atleta(client, criar_atleta):
+    await criar_atleta(1)
+    atleta = await criar_atleta(2)
+
+    resposta = await client.patch(f"/atletas/{atleta['id']}", json={"cpf": gerar_cpf(1)})
+    assert resposta.status_code == 409
+
+
+async def test_alteracao_com_outra_violacao_nao_vira_409(client, criar_atleta):
+    atleta = await criar_atleta(1)
+
+    # NOT NULL violado sem mexer no CPF: erro interno, como no POST, e não "CPF repetido"
+    resposta = await client.patch(f"/atletas/{atleta['id']}", json={"nome": None})
+    assert resposta.status_code == 500
+    assert "CPF" not in resposta.json()["detail"]
+
+
+async def test_remove(client, criar_atleta):
+    atleta = await criar_atleta(1)
+
+    resposta = await client.delete(f"/atletas/{atleta['id']}")
+    assert resposta.status_code == 200
+    assert resposta.json()["id"] == atleta["id"]
+    assert (await client.get(f"/atletas/{atleta['id']}")).status_code == 404
+    assert (await client.delete(f"/atletas/{atleta['id']}")).status_code == 404
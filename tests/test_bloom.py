@@ -0,0 +1,49 @@
+import pytest
+
+import src.core.shards
+from src.core.bloom import FiltroBloom, IndiceCpfs
+from src.core.eventos import Evento
+from tests.conftest import gerar_cpf, nova_sessao
+
+pytestmark = pytest.mark.anyio
+
+
+def test_filtro_sem_falsos_negativos():
+    filtro = FiltroBloom(capacidade=1000, taxa_erro=0.01)
+    cpfs = [gerar_cpf(numero) for numero in range(1000)]
+    for cpf in cpfs:
+        filtro.adicionar(cpf)
+
+    assert all(cpf in filtro for cpf in cpfs)
+    # Falsos positivos perto da taxa pedida (com folga: o dimensionamento é uma estimativa)
+    falsos = sum(gerar_cpf(numero) in filtro for numero in range(1000, 11000))
+    assert falsos < 10000 * 0.03
+
+
+@pytest.fixture
+def indice(transacao, monkeypatch) -> IndiceCpfs:
+    """Índice novo, montado a partir da transação do teste."""
+    monkeypatch.setattr(src.core.shards, "async_session", lambda: nova_sessao(transacao))
+    return IndiceCpfs(capacidade_minima=1000, taxa_erro=0.01)
+
+
+async def test_antes_de_montar_tudo_vai_ao_banco(indice):
+    assert not indice.pronto
+    assert indice.pode_existir(gerar_cpf(1))
+
+
+async def test_montado_com_os_cpfs_do_banco(indice, criar_atleta):
+    await criar_atleta(1)
+    await criar_atleta(2)
+
+    assert await indice.carregar() == 2
+    assert indice.pode_existir(gerar_cpf(1)) and indice.pode_existir(gerar_cpf(2))
+    assert not indice.pode_existir(gerar_cpf(3))
+
+
+async def test_cpfs_de_outros_processos_pelo_feed(indice):
+    await indice.carregar()
+    assert not indice.pode_existir(gerar_cpf(5))
+
+    indice.ao_evento(Evento(id=1, tipo="criado", dados={"cpf": gerar_cpf(5)}))
+    assert indice.pode_existir(gerar_cpf(5))
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.core.cache import receber_invalidacao, versoes
+from src.core.cache_backends import CacheMemoria, CacheRedis, cache
+
+pytestmark = pytest.mark.anyio
+
+
+# --- VERSÕES E CONTAGENS ---
+async def test_commit_invalida_a_tabela(client):
+    antes = versoes.versao("categorias", "atletas")
+    await client.post("/categorias/", json={"nome": "Scale"})
+    depois = versoes.versao("categorias", "atletas")
+
+    assert depois[0] > antes[0]
+    assert depois[1] == antes[1]
+
+
+async def test_contagem_em_cache_ate_a_proxima_escrita(client, categoria):
+    await client.get("/categorias/", params={"total": "exato"})
+    acertos = cache.resumo()["espacos"]["contagem"]["acertos"]
+
+    # Outra página (a listagem não está em cache), mesma contagem
+    resposta = await client.get("/categorias/", params={"total": "exato", "limit": 1})
+    assert resposta.headers["X-Total-Count"] == "1"
+    assert cache.resumo()["espacos"]["contagem"]["acertos"] == acertos + 1
+
+    await client.post("/categorias/", json={"nome": "RX"})
+    resposta = await client.get("/categorias/", params={"total": "exato"})
+    assert resposta.headers["X-Total-Count"] == "2"
+
+
+def test_invalidacao_recebida_de_outro_worker():
+    [atual] = versoes.versao("centros_treinamento")
+    payload = {"tabelas": ["centros_treinamento"], "versao": atual + 10, "enviado_em": time.time(), "origem": 0}
+    receber_invalidacao(json.dumps(payload))
+    assert versoes.versao("centros_treinamento") == (atual + 10,)
+
+    # Mensagens atrasadas (versão menor) não fazem a versão voltar
+    receber_invalidacao(json.dumps({**payload, "versao": atual + 5}))
+    assert versoes.versao("centros_treinamento") == (atual + 10,)
+
+
+# --- MEMÓRIA ---
+async def test_memoria_descarta_os_menos_usados_pelo_tamanho():
+    memoria = CacheMemoria(max_bytes=10)
+    await memoria.guardar("a", b"1234", ttl=60)
+    await memoria.guardar("b", b"1234", ttl=60)
+    assert await memoria.obter("a") == b"1234"  # "a" passa a ser o mais recente
+
+    await memoria.guardar("c", b"1234", ttl=60)
+    assert await memoria.obter("b") is None
+    assert await memoria.obter("a") == b"1234"
+    assert memoria.resumo()["bytes"] == 8
+
+    # Maior que o limite: nem entra
+    await memoria.guardar("d", b"x" * 11, ttl=60)
+    assert await memoria.obter("d") is None
+
+
+async def test_memoria_expira_pelo_ttl():
+    memoria = CacheMemoria(max_bytes=100)
+    await memoria.guardar("a", b"1", ttl=0)
+    assert await memoria.obter("a") is None
+    assert memoria.resumo()["itens"] == 0
+
+
+# --- REDIS (RESP) ---
+@pytest.fixture
+async def servidor_resp():
+    """Servidor RESP mínimo (GET/SET PX) para exercitar o cliente sem um Redis de verdade."""
+    dados: dict[bytes, tuple[bytes, float]] = {}
+
+    async def ler(leitor):
+        linha = await leitor.readline()
+        if not linha:
+            return None
+        partes = []
+        for _ in range(int(linha[1:-2])):
+            tamanho = int((await leitor.readline())[1:-2])
+            partes.append((await leitor.readexactly(tamanho + 2))[:-2])
+        return partes
+
+    async def atender(leitor, escritor):
+        while (partes := await ler(leitor)) is not None:
+            comando = partes[0].upper()
+            if comando == b"GET":
+                valor, expira_em = dados.get(partes[1], (None, 0.0))
+                escritor.write(b"$-1\r\n" if expira_em < time.monotonic() else b"$%d\r\n%s\r\n" % (len(valor), valor))
+            elif comando == b"SET":
+                dados[partes[1]] = (partes[2], time.monotonic() + int(partes[4]) / 1000)
+                escritor.write(b"+OK\r\n")
+            else:
+                escritor.write(b"-ERR comando desconhecido\r\n")
+            await escritor.drain()
+        escritor.close()
+
+    servidor = await asyncio.start_server(atender, "127.0.0.1", 0)
+    porta = servidor.sockets[0].getsockname()[1]
+    yield f"redis://127.0.0.1:{porta}/0", dados
+    servidor.close()
+    await servidor.wait_closed()
+
+
+async def test_redis_guarda_com_prefixo_e_expiracao(servidor_resp):
+    url, dados = servidor_resp
+    redis = CacheRedis(url, conexoes=2, timeout=1)
+    await redis.guardar("contagem:x", b"42", ttl=5)
+
+    assert await redis.obter("contagem:x") == b"42"
+    assert await redis.obter("contagem:y") is None
+    assert list(dados) == [b"workout:cache:contagem:x"]
+    await redis.fechar()
+
+
+async def test_redis_indisponivel_vira_miss():
+    # Porta sem servidor: a falha não chega à requisição
+    redis = CacheRedis("redis://127.0.0.1:1/0", conexoes=1, timeout=0.5)
+    assert await redis.obter("x") is None
+    await redis.guardar("x", b"1", ttl=5)
+    assert redis.resumo()["erros"] == 2
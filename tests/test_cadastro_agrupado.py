@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+import src.core.shards
+from src.api.controllers import atleta as controlador
+from src.api.controllers.atleta import cadastrar_lote
+from src.core.shards import PRINCIPAL
+from src.models.atleta import AtletaModel
+from src.models.categorias import CategoriaModel
+from src.models.centro_treinamento import CentroTreinamentoModel
+from tests.conftest import dados_atleta, gerar_cpf, nova_sessao
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def sessoes_do_lote(transacao, monkeypatch):
+    """O lote abre a própria sessão (fábrica do banco principal): aponta para a transação do teste."""
+    monkeypatch.setattr(src.core.shards, "async_session", lambda: nova_sessao(transacao))
+
+
+@pytest.fixture
+async def referencias(categoria, centro, db_session) -> tuple[int, int]:
+    """pk_id da categoria e do CT padrão."""
+    categoria_id = await db_session.scalar(select(CategoriaModel.pk_id))
+    centro_id = await db_session.scalar(select(CentroTreinamentoModel.pk_id))
+    return categoria_id, centro_id
+
+
+def item(numero: int, categoria_id: int, centro_id: int, cpf: str | None = None):
+    agora = datetime.now(timezone.utc)
+    dados = dados_atleta(numero)
+    linha = {
+        **{campo: dados[campo] for campo in ("nome", "idade", "peso", "altura", "sexo")},
+        "cpf": cpf or dados["cpf"],
+        "id": uuid4(),
+        "created_at": agora,
+        "ultima_atividade_em": agora,
+        "categoria_id": categoria_id,
+        "centro_treinamento_id": centro_id,
+    }
+    return linha, "Scale", "CT King", PRINCIPAL
+
+
+async def test_lote_grava_todos(sessoes_do_lote, referencias, db_session):
+    resultados = await cadastrar_lote([item(numero, *referencias) for numero in range(1, 4)])
+
+    assert [r.cpf for r in resultados] == [gerar_cpf(numero) for numero in range(1, 4)]
+    assert all(r.categoria.nome == "Scale" for r in resultados)
+    cpfs = (await db_session.execute(select(AtletaModel.cpf).order_by(AtletaModel.pk_id))).scalars().all()
+    assert cpfs == [gerar_cpf(numero) for numero in range(1, 4)]
+
+
+async def test_cpf_repetido_no_lote_e_no_banco(sessoes_do_lote, referencias, criar_atleta):
+    await criar_atleta(9)
+    resultados = await cadastrar_lote([
+        item(1, *referencias),
+        item(2, *referencias, cpf=gerar_cpf(1)),  # repete o CPF do item anterior
+        item(3, *referencias, cpf=gerar_cpf(9)),  # CPF já cadastrado
+    ])
+
+    assert resultados[0].cpf == gerar_cpf(1)
+    assert [r.status_code for r in resultados[1:]] == [409, 409]
+
+
+async def test_falha_de_fk_fica_so_com_o_item(sessoes_do_lote, referencias, db_session):
+    categoria_id, centro_id = referencias
+    resultados = await cadastrar_lote([
+        item(1, categoria_id, centro_id),
+        item(2, categoria_id + 1000, centro_id),  # categoria inexistente
+        item(3, categoria_id, centro_id),
+    ])
+
+    assert [r.cpf for r in (resultados[0], resultados[2])] == [gerar_cpf(1), gerar_cpf(3)]
+    # Não é conflito de CPF: a mesma resposta do cadastro sem agrupamento para outros erros
+    assert resultados[1].status_code == 500
+    cpfs = (await db_session.execute(select(AtletaModel.cpf).order_by(AtletaModel.pk_id))).scalars().all()
+    assert cpfs == [gerar_cpf(1), gerar_cpf(3)]
+
+
+async def test_rota_com_agrupamento(client, sessoes_do_lote, criar_atleta, monkeypatch):
+    monkeypatch.setattr(controlador.settings, "ATLETAS_AGRUPAMENTO_ATIVO", True)
+    atleta = await criar_atleta(1)
+
+    resposta = await client.get(f"/atletas/{atleta['id']}")
+    assert resposta.status_code == 200
+    assert resposta.json()["cpf"] == gerar_cpf(1)
+
+    resposta = await client.post("/atletas/", json=dados_atleta(1))
+    assert resposta.status_code == 409
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cadastra_e_consulta_pelo_id(client):
+    resposta = await client.post("/categorias/", json={"nome": "Scale"})
+    assert resposta.status_code == 201
+    criada = resposta.json()
+
+    resposta = await client.get(f"/categorias/{criada['id']}")
+    assert resposta.status_code == 200
+    assert resposta.json() == criada
+
+
+async def test_cada_teste_comeca_com_o_banco_vazio(client):
+    resposta = await client.get("/categorias/")
+    assert resposta.status_code == 200
+    assert resposta.json() == []
+
+
+async def test_listagem_paginada_com_total(client):
+    for nome in ("RX", "Scale", "Master"):
+        await client.post("/categorias/", json={"nome": nome})
+
+    resposta = await client.get("/categorias/", params={"limit": 2, "offset": 1, "total": "exato"})
+    assert resposta.status_code == 200
+    assert [c["nome"] for c in resposta.json()] == ["Scale", "Master"]
+    assert resposta.headers["X-Total-Count"] == "3"
+    assert resposta.headers["X-Total-Count-Tipo"] == "exato"
+
+
+async def test_altera_e_remove(client, categoria):
+    resposta = await client.patch(f"/categorias/{categoria['id']}", json={"nome": "RX"})
+    assert resposta.status_code == 200
+    assert resposta.json()["nome"] == "RX"
+
+    assert (await client.delete(f"/categorias/{categoria['id']}")).status_code == 204
+    assert (await client.get(f"/categorias/{categoria['id']}")).status_code == 404
+
+
+async def test_inexistente(client):
+    id = uuid.uuid4()
+    assert (await client.get(f"/categorias/{id}")).status_code == 404
+    assert (await client.patch(f"/categorias/{id}", json={"nome": "RX"})).status_code == 404
+    assert (await client.delete(f"/categorias/{id}")).status_code == 404
+
+
+async def test_elencos_embutidos(client, criar_atleta):
+    for numero in range(1, 4):
+        await criar_atleta(numero)
+
+    resposta = await client.get("/categorias/", params={"incluir": "atletas", "atletas_limite": 2})
+    assert resposta.status_code == 200
+    [categoria] = resposta.json()
+    assert categoria["total_atletas"] == 3
+    assert len(categoria["atletas"]) == 2
@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+CT = {"nome": "CT King", "endereco": "Rua X", "proprietario": "Marcos"}
+
+
+async def test_cadastra_e_consulta_pelo_id(client):
+    resposta = await client.post("/centros-treinamento/", json=CT)
+    assert resposta.status_code == 201
+    criado = resposta.json()
+    assert criado["nome"] == "CT King"
+
+    resposta = await client.get(f"/centros-treinamento/{criado['id']}")
+    assert resposta.status_code == 200
+    assert resposta.json()["endereco"] == "Rua X"
+
+
+async def test_nome_repetido(client, centro):
+    resposta = await client.post("/centros-treinamento/", json=CT)
+    assert resposta.status_code == 409
+
+    # O rollback do conflito desfaz só a requisição: o CT já cadastrado continua lá
+    resposta = await client.get("/centros-treinamento/")
+    assert [c["nome"] for c in resposta.json()] == ["CT King"]
+
+
+async def test_listagem_paginada_com_total(client):
+    for numero in range(5):
+        await client.post("/centros-treinamento/", json={**CT, "nome": f"CT {numero}"})
+
+    resposta = await client.get("/centros-treinamento/", params={"limit": 2, "offset": 2, "total": "exato"})
+    assert [c["nome"] for c in resposta.json()] == ["CT 2", "CT 3"]
+    assert resposta.headers["X-Total-Count"] == "5"
+
+
+async def test_altera_e_remove(client, centro):
+    resposta = await client.patch(f"/centros-treinamento/{centro['id']}", json={"endereco": "Rua Y"})
+    assert resposta.status_code == 200
+    assert resposta.json()["endereco"] == "Rua Y"
+    assert resposta.json()["nome"] == "CT King"
+
+    assert (await client.delete(f"/centros-treinamento/{centro['id']}")).status_code == 204
+    assert (await client.get(f"/centros-treinamento/{centro['id']}")).status_code == 404
+
+
+async def test_inexistente(client):
+    assert (await client.get(f"/centros-treinamento/{uuid.uuid4()}")).status_code == 404
+
+
+async def test_elenco_embutido(client, centro, criar_atleta):
+    await criar_atleta(1)
+    await criar_atleta(2)
+
+    resposta = await client.get(f"/centros-treinamento/{centro['id']}", params={"incluir": "atletas"})
+    assert resposta.status_code == 200
+    assert resposta.json()["total_atletas"] == 2
+    assert {a["nome"] for a in resposta.json()["atletas"]} == {"Atleta 1", "Atleta 2"}
@@ -0,0 +1,184 @@
+import gzip
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+
+from src.core.compressao import CABECALHO_CHAVE, CompressaoMiddleware, negociar
+
+pytestmark = pytest.mark.anyio
+
+GRANDE = b'{"nome": "Atleta"}' * 200
+PEQUENO = b'{"nome": "Atleta"}'
+
+
+def criar_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.api_route("/grande", methods=["GET", "HEAD"])
+    async def grande():
+        return Response(GRANDE, media_type="application/json")
+
+    @app.get("/listagem")
+    async def listagem():
+        # Como as listagens em cache: a chave identifica o corpo
+        return Response(GRANDE, media_type="application/json", headers={CABECALHO_CHAVE: "listagem:abc:1"})
+
+    @app.get("/pequeno")
+    async def pequeno():
+        return Response(PEQUENO, media_type="application/json", headers={"Vary": "Origin"})
+
+    @app.get("/stream")
+    async def stream(pedacos: int = 50):
+        async def gerar():
+            for _ in range(pedacos):
+                yield b"linha de dados\n" * 10
+
+        return StreamingResponse(gerar(), media_type="text/plain")
+
+    @app.get("/eventos")
+    async def eventos():
+        return StreamingResponse(iter([b"data: 1\n\n" * 200]), media_type="text/event-stream")
+
+    @app.get("/nao-modificado")
+    async def nao_modificado():
+        return Response(status_code=304, headers={"ETag": '"v1"', "Content-Length": str(len(GRANDE))})
+
+    @app.delete("/vazio", status_code=204)
+    async def vazio():
+        return Response(status_code=204)
+
+    return app
+
+
+@pytest.fixture
+def middleware() -> CompressaoMiddleware:
+    return CompressaoMiddleware(criar_app(), tamanho_minimo=1024)
+
+
+@pytest.fixture
+async def cliente(middleware):
+    # Sem decodificação automática: os testes conferem os bytes que saem do middleware
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://testes") as cliente:
+        yield cliente
+
+
+async def pedir(cliente, caminho: str, encoding: str = "gzip", metodo: str = "GET") -> tuple[httpx.Response, bytes]:
+    async with cliente.stream(metodo, caminho, headers={"Accept-Encoding": encoding}) as resposta:
+        return resposta, b"".join([pedaco async for pedaco in resposta.aiter_raw()])
+
+
+# --- NEGOCIAÇÃO ---
+@pytest.mark.parametrize(("accept_encoding", "esperado"), [
+    ("gzip", "gzip"),
+    ("gzip, br, zstd", "zstd"),               # empate: preferência do servidor
+    ("gzip;q=1.0, br;q=0.5", "gzip"),         # maior peso vence
+    ("*", "zstd"),
+    ("br;q=0, gzip;q=0", None),               # q=0 recusa
+    ("identity", None),
+])
+def test_negociacao(accept_encoding, esperado):
+    assert negociar(accept_encoding, ["zstd", "br", "gzip"]) == esperado
+
+
+async def test_cliente_sem_compressao(cliente):
+    resposta, corpo = await pedir(cliente, "/grande", encoding="identity")
+    assert "content-encoding" not in resposta.headers
+    assert corpo == GRANDE
+    # Outros clientes recebem a mesma URL comprimida: caches compartilhados precisam separar
+    assert resposta.headers["vary"] == "Accept-Encoding"
+
+
+async def test_sem_accept_encoding_tambem_varia(cliente):
+    requisicao = cliente.build_request("GET", "/pequeno")
+    del requisicao.headers["accept-encoding"]
+    resposta = await cliente.send(requisicao)
+    assert "content-encoding" not in resposta.headers
+    assert resposta.headers["vary"] == "Origin, Accept-Encoding"
+
+
+# --- TAMANHO MÍNIMO ---
+async def test_corpo_grande_comprimido(cliente):
+    resposta, corpo = await pedir(cliente, "/grande")
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert resposta.headers["content-length"] == str(len(corpo))
+    assert gzip.decompress(corpo) == GRANDE
+
+
+async def test_corpo_pequeno_segue_sem_compressao(cliente):
+    resposta, corpo = await pedir(cliente, "/pequeno")
+    assert "content-encoding" not in resposta.headers
+    assert resposta.headers["content-length"] == str(len(PEQUENO))
+    assert corpo == PEQUENO
+
+
+async def test_variante_comprimida_reaproveitada(cliente, middleware):
+    await pedir(cliente, "/listagem")
+    resposta, corpo = await pedir(cliente, "/listagem")
+    assert middleware.cache.acertos == 1
+    assert gzip.decompress(corpo) == GRANDE
+    # A chave é só para o middleware
+    assert CABECALHO_CHAVE.lower() not in resposta.headers
+
+    resposta, _ = await pedir(cliente, "/listagem", encoding="identity")
+    assert CABECALHO_CHAVE.lower() not in resposta.headers
+
+
+async def test_resposta_sem_chave_nao_passa_pelo_cache(cliente, middleware):
+    await pedir(cliente, "/grande")
+    await pedir(cliente, "/grande")
+    assert (middleware.cache.acertos, middleware.cache.falhas, middleware.cache.bytes_usados) == (0, 0, 0)
+
+
+# --- STREAMING ---
+async def test_stream_comprimido_em_pedacos(cliente):
+    resposta, corpo = await pedir(cliente, "/stream")
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert "content-length" not in resposta.headers
+    assert gzip.decompress(corpo) == b"linha de dados\n" * 10 * 50
+
+
+async def test_stream_curto_segue_sem_compressao(cliente):
+    resposta, corpo = await pedir(cliente, "/stream?pedacos=1")
+    assert "content-encoding" not in resposta.headers
+    assert corpo == b"linha de dados\n" * 10
+
+
+async def test_eventos_sse_nao_sao_comprimidos(cliente):
+    resposta, _ = await pedir(cliente, "/eventos")
+    assert "content-encoding" not in resposta.headers
+    assert "vary" not in resposta.headers
+
+
+# --- VARY ---
+async def test_vary_acrescenta_accept_encoding(cliente):
+    resposta, _ = await pedir(cliente, "/pequeno")
+    assert resposta.headers["vary"] == "Origin, Accept-Encoding"
+
+    resposta, _ = await pedir(cliente, "/grande")
+    assert resposta.headers["vary"] == "Accept-Encoding"
+
+
+# --- RESPOSTAS SEM CORPO ---
+async def test_head_mantem_o_content_length_do_get(cliente):
+    resposta, corpo = await pedir(cliente, "/grande", metodo="HEAD")
+    assert "content-encoding" not in resposta.headers
+    assert resposta.headers["content-length"] == str(len(GRANDE))
+    assert resposta.headers["vary"] == "Accept-Encoding"
+    assert corpo == b""
+
+
+async def test_304_e_204_passam_intactos(cliente):
+    resposta, _ = await pedir(cliente, "/nao-modificado")
+    assert resposta.status_code == 304
+    assert "content-encoding" not in resposta.headers
+    assert resposta.headers["content-length"] == str(len(GRANDE))
+    # O 304 repete o Vary que o 200 teria
+    assert resposta.headers["vary"] == "Accept-Encoding"
+
+    resposta, corpo = await pedir(cliente, "/vazio", metodo="DELETE")
+    assert resposta.status_code == 204
+    assert "content-encoding" not in resposta.headers
+    assert "vary" not in resposta.headers
+    assert corpo == b""
@@ -0,0 +1,95 @@
+import pytest
+
+from src.core.eventos import _DESCONECTAR, _RECARREGAR, Broker, Evento, broker
+
+pytestmark = pytest.mark.anyio
+
+
+def novo_broker(**opcoes) -> Broker:
+    return Broker(**{"tamanho_historico": 10, "tamanho_fila": 4, **opcoes})
+
+
+def publicar_em(alvo: Broker, *ids: int) -> None:
+    for id_ in ids:
+        alvo.distribuir("atletas", Evento(id=id_, tipo="criado", dados={"n": id_}))
+
+
+def conteudo(assinatura) -> list:
+    itens = []
+    while not assinatura.fila.empty():
+        item = assinatura.fila.get_nowait()
+        itens.append(item.id if isinstance(item, Evento) else item)
+    return itens
+
+
+# --- RETOMADA (Last-Event-ID) ---
+async def test_retomada_reenvia_os_eventos_perdidos():
+    alvo = novo_broker()
+    publicar_em(alvo, 1, 2, 3, 4)
+
+    assert conteudo(alvo.assinar("atletas", ultimo_id=2)) == [3, 4]
+
+
+async def test_retomada_em_dia_nao_reenvia_nada():
+    alvo = novo_broker()
+    publicar_em(alvo, 1, 2)
+
+    assert conteudo(alvo.assinar("atletas", ultimo_id=2)) == []
+
+
+async def test_perdidos_que_nao_cabem_na_fila_pedem_recarga():
+    alvo = novo_broker()
+    publicar_em(alvo, *range(1, 8))
+
+    # 6 perdidos, fila de 4: nada de reenviar só uma parte
+    assert conteudo(alvo.assinar("atletas", ultimo_id=1)) == [_RECARREGAR]
+
+
+async def test_ultimo_id_fora_do_historico_pede_recarga():
+    alvo = novo_broker(tamanho_historico=3)
+    publicar_em(alvo, 1, 2, 3, 4, 5)
+
+    # O histórico guarda 3..5: o 2 (recebido pelo cliente) e o que veio depois dele já saíram
+    assert conteudo(alvo.assinar("atletas", ultimo_id=1)) == [_RECARREGAR]
+    assert conteudo(alvo.assinar("atletas", ultimo_id=3)) == [4, 5]
+
+
+async def test_retomada_sem_historico_pede_recarga():
+    # Processo recém-iniciado: não sabe o que aconteceu depois do ultimo_id
+    assert conteudo(novo_broker().assinar("atletas", ultimo_id=7)) == [_RECARREGAR]
+
+
+async def test_stream_envia_recarregar_e_segue_com_os_novos():
+    alvo = novo_broker()
+    stream = alvo.stream("atletas", ultimo_id=7)
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert await anext(stream) == "event: recarregar\ndata: {}\n\n"
+
+    publicar_em(alvo, 8)
+    assert (await anext(stream)).startswith("id: 8\nevent: criado\n")
+    await stream.aclose()
+
+
+async def test_cliente_lento_e_desconectado():
+    alvo = novo_broker()
+    assinatura = alvo.assinar("atletas")
+    publicar_em(alvo, *range(1, 6))
+
+    # Fila cheia no 5º evento: o que estava pendente é descartado (retoma pelo Last-Event-ID)
+    assert conteudo(assinatura) == [_DESCONECTAR]
+
+
+# --- PUBLICAÇÃO ---
+async def test_evento_entregue_apos_o_commit(client):
+    assinatura = broker.assinar("centros_treinamento")
+    try:
+        resposta = await client.post(
+            "/centros-treinamento/", json={"nome": "CT Novo", "endereco": "Rua Y", "proprietario": "Ana"}
+        )
+        assert resposta.status_code == 201
+
+        [evento] = [assinatura.fila.get_nowait() for _ in range(assinatura.fila.qsize())]
+        assert evento.tipo == "criado"
+        assert evento.dados["nome"] == "CT Novo"
+    finally:
+        broker.cancelar(assinatura)
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import event
+
+from src.core.cache_backends import cache
+from src.core.compressao import CABECALHO_CHAVE
+from src.core.listagens import guardar_listagem
+from tests.conftest import gerar_cpf
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def comandos_sql(transacao):
+    """Comandos SQL enviados ao banco durante o teste."""
+    comandos = []
+
+    def registrar(_conexao, _cursor, sql, *_):
+        comandos.append(sql)
+
+    event.listen(transacao.sync_connection, "before_cursor_execute", registrar)
+    yield comandos
+    event.remove(transacao.sync_connection, "before_cursor_execute", registrar)
+
+
+def acertos() -> int:
+    return cache.resumo()["espacos"].get("listagem", {}).get("acertos", 0)
+
+
+async def test_acerto_nao_consulta_o_banco(client, categoria, comandos_sql):
+    primeira = await client.get("/categorias/", params={"total": "exato"})
+    comandos_sql.clear()
+
+    segunda = await client.get("/categorias/", params={"total": "exato"})
+    assert comandos_sql == []
+    assert segunda.content == primeira.content
+    assert segunda.headers["X-Total-Count"] == "1"
+    assert segunda.headers["content-type"] == "application/json"
+
+
+async def test_listagem_guardada_marca_a_chave_para_a_compressao():
+    resposta = await guardar_listagem("listagem:teste:1", b"[]")
+    assert resposta.headers[CABECALHO_CHAVE] == "listagem:teste:1"
+
+    # Sem cache (chave None), nada a reaproveitar
+    resposta = await guardar_listagem(None, b"[]")
+    assert CABECALHO_CHAVE not in resposta.headers
+
+
+async def test_chave_da_compressao_nao_chega_ao_cliente(client, categoria):
+    for _ in range(2):  # miss e acerto
+        resposta = await client.get("/categorias/")
+        assert CABECALHO_CHAVE.lower() not in resposta.headers
+
+
+async def test_escrita_invalida_a_listagem(client, categoria):
+    await client.get("/categorias/")
+    await client.post("/categorias/", json={"nome": "RX"})
+
+    resposta = await client.get("/categorias/")
+    assert [c["nome"] for c in resposta.json()] == ["Scale", "RX"]
+
+    await client.patch(f"/categorias/{categoria['id']}", json={"nome": "Master"})
+    resposta = await client.get("/categorias/")
+    assert [c["nome"] for c in resposta.json()] == ["Master", "RX"]
+
+
+async def test_parametros_normalizados(client, criar_atleta):
+    atleta = await criar_atleta(1)
+    cpf = atleta["cpf"]
+
+    await client.get("/atletas/", params={"cpf": cpf})
+    antes = acertos()
+    # CPF pontuado e offset explícito: mesma listagem, mesma chave
+    resposta = await client.get("/atletas/", params={"cpf": f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}", "offset": 0})
+    assert [a["id"] for a in resposta.json()] == [atleta["id"]]
+    assert acertos() == antes + 1
+
+    # Parâmetros diferentes: outra chave
+    await client.get("/atletas/", params={"cpf": cpf, "fields": "nome"})
+    assert acertos() == antes + 1
+
+
+async def test_alteracao_em_tabela_relacionada(client, categoria, criar_atleta):
+    await criar_atleta(1)
+    await client.get("/atletas/")
+
+    # O nome da categoria aparece em cada atleta: a listagem de atletas também muda
+    await client.patch(f"/categorias/{categoria['id']}", json={"nome": "RX"})
+    resposta = await client.get("/atletas/")
+    assert resposta.json()[0]["categoria"] == {"nome": "RX"}
+
+
+async def test_cadastro_e_remocao_de_atletas(client, centro, criar_atleta):
+    await criar_atleta(1)
+    await client.get("/atletas/", params={"fields": "cpf"})
+    await client.get("/centros-treinamento/", params={"incluir": "atletas"})
+
+    atleta = await criar_atleta(2)
+    resposta = await client.get("/atletas/", params={"fields": "cpf"})
+    assert resposta.json() == [{"cpf": gerar_cpf(1)}, {"cpf": gerar_cpf(2)}]
+    resposta = await client.get("/centros-treinamento/", params={"incluir": "atletas"})
+    assert resposta.json()[0]["total_atletas"] == 2
+
+    await client.delete(f"/atletas/{atleta['id']}")
+    resposta = await client.get("/atletas/", params={"fields": "cpf"})
+    assert resposta.json() == [{"cpf": gerar_cpf(1)}]
@@ -0,0 +1,44 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_historico_em_ordem_cronologica(client, criar_atleta):
+    atleta = await criar_atleta(1)
+    url = f"/atletas/{atleta['id']}/medidas"
+
+    resposta = await client.post(url, json={"peso": 71.0, "medido_em": "2030-01-02T10:00:00Z"})
+    assert resposta.status_code == 201
+    resposta = await client.post(f"{url}/lote", json={"medidas": [
+        {"peso": 73.0, "medido_em": "2030-01-20T10:00:00Z"},
+        {"peso": 72.0, "medido_em": "2030-01-10T10:00:00Z"},
+    ]})
+    assert resposta.json() == {"inseridas": 2}
+
+    resposta = await client.get(url, params={"inicio": "2030-01-01T00:00:00Z"})
+    assert resposta.status_code == 200
+    assert [m["peso"] for m in resposta.json()] == [71.0, 72.0, 73.0]
+
+
+async def test_agregacao_por_mes(client, criar_atleta):
+    atleta = await criar_atleta(1)
+    url = f"/atletas/{atleta['id']}/medidas"
+    await client.post(f"{url}/lote", json={"medidas": [
+        {"peso": 70.0, "medido_em": "2030-01-05T10:00:00Z"},
+        {"peso": 74.0, "medido_em": "2030-01-25T10:00:00Z"},
+        {"peso": 80.0, "medido_em": "2030-02-05T10:00:00Z"},
+    ]})
+
+    resposta = await client.get(url, params={"inicio": "2030-01-01T00:00:00Z", "agregacao": "mes"})
+    assert resposta.status_code == 200
+    meses = resposta.json()
+    assert [m["quantidade"] for m in meses] == [2, 1]
+    assert meses[0]["peso_medio"] == 72.0
+    assert (meses[0]["peso_min"], meses[0]["peso_max"]) == (70.0, 74.0)
+
+
+async def test_atleta_inexistente(client):
+    resposta = await client.post(f"/atletas/{uuid.uuid4()}/medidas", json={"peso": 70.0})
+    assert resposta.status_code == 404
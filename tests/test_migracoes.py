@@ -0,0 +1,199 @@
+import io
+import logging
+from contextlib import contextmanager
+
+import pytest
+from alembic import context
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from src.core import migracoes
+
+
+@pytest.fixture
+def sqlite(monkeypatch):
+    """Migração online em um SQLite com 12 atletas; devolve a conexão."""
+    monkeypatch.setattr(context, "is_offline_mode", lambda: False)
+    motor = create_engine("sqlite://")
+    with motor.connect() as conexao:
+        conexao.execute(text("CREATE TABLE atletas (pk_id INTEGER PRIMARY KEY, nome VARCHAR(50))"))
+        conexao.execute(text(
+            "INSERT INTO atletas (pk_id, nome) VALUES " + ", ".join(f"({n}, 'atleta {n}')" for n in range(1, 13))
+        ))
+        conexao.commit()
+        migracao = MigrationContext.configure(connection=conexao, opts={"transaction_per_migration": True})
+        with Operations.context(migracao), migracao.begin_transaction(_per_migration=True):
+            yield conexao
+    motor.dispose()
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Migração no modo --sql para o PostgreSQL; devolve uma função que lê os comandos gerados."""
+    monkeypatch.setattr(context, "is_offline_mode", lambda: True)
+    saida = io.StringIO()
+    migracao = MigrationContext.configure(
+        dialect_name="postgresql",
+        # Como no alembic/env.py (run_migrations_offline)
+        dialect_opts={"paramstyle": "named"},
+        opts={"as_sql": True, "output_buffer": saida, "transaction_per_migration": True},
+    )
+    with Operations.context(migracao), migracao.begin_transaction(_per_migration=True):
+        yield lambda: [linha.rstrip(";") for linha in saida.getvalue().splitlines() if linha.strip()]
+
+
+# --- BACKFILL ---
+def test_backfill_em_lotes(sqlite, caplog):
+    with caplog.at_level(logging.INFO, logger="alembic.migracoes"):
+        alteradas = migracoes.backfill_em_lotes(
+            "atletas", "nome = upper(nome)", where="pk_id % 2 = 0", tamanho_lote=5, pausa=0
+        )
+
+    assert alteradas == 6
+    nomes = sqlite.execute(text("SELECT nome FROM atletas ORDER BY pk_id")).scalars().all()
+    assert nomes[:4] == ["atleta 1", "ATLETA 2", "atleta 3", "ATLETA 4"]
+    # 12 linhas em lotes de 5: três faixas de pk_id, com progresso no log
+    assert len([r for r in caplog.records if r.getMessage().startswith("Backfill atletas")]) == 3
+
+
+def test_backfill_no_modo_sql_vira_um_update(offline):
+    migracoes.backfill_em_lotes("atletas", "nome = upper(nome)", where="pk_id % 2 = 0")
+    assert offline()[-1] == "UPDATE atletas SET nome = upper(nome) WHERE pk_id % 2 = 0"
+
+
+def test_copia_no_modo_sql_vira_um_insert(offline):
+    migracoes.copiar_em_lotes("atletas", "atletas_chaves", "pk_id, id, cpf, centro_treinamento_id")
+    assert offline()[-1] == (
+        "INSERT INTO atletas_chaves (pk_id, id, cpf, centro_treinamento_id) "
+        "SELECT pk_id, id, cpf, centro_treinamento_id FROM atletas ON CONFLICT DO NOTHING"
+    )
+
+
+# --- ÍNDICES ---
+def test_indice_fora_do_postgres(sqlite):
+    migracoes.criar_indice_concorrente("ix_atletas_nome", "atletas", ["nome"])
+    assert [indice["name"] for indice in inspect(sqlite).get_indexes("atletas")] == ["ix_atletas_nome"]
+
+    migracoes.remover_indice_concorrente("ix_atletas_nome", "atletas")
+    assert inspect(sqlite).get_indexes("atletas") == []
+
+
+def test_indice_concorrente_fora_da_transacao(offline):
+    migracoes.criar_indice_concorrente(
+        "ix_atletas_cpf", "atletas", ["cpf"], unique=True, where="cpf IS NOT NULL", using="btree"
+    )
+    # O PostgreSQL não aceita CONCURRENTLY dentro de uma transação
+    assert offline()[-3:] == [
+        "COMMIT",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_atletas_cpf ON atletas USING btree (cpf) "
+        "WHERE cpf IS NOT NULL",
+        "BEGIN",
+    ]
+
+
+# --- LOCKS ---
+def test_ddl_com_lock_timeout_no_modo_sql(offline):
+    migracoes.ddl_com_lock_timeout("ALTER TABLE atletas ADD COLUMN apelido varchar(30)")
+    # Restaura o valor anterior (guardado no banco), e não o DEFAULT do servidor
+    assert offline()[1:] == [
+        "SELECT set_config('migracao.lock_timeout_anterior', current_setting('lock_timeout'), true)",
+        "SET LOCAL lock_timeout = '2s'",
+        "ALTER TABLE atletas ADD COLUMN apelido varchar(30)",
+        "SELECT set_config('lock_timeout', current_setting('migracao.lock_timeout_anterior'), true)",
+    ]
+
+
+def test_validacao_fora_da_transacao_do_alter(offline):
+    migracoes.ddl_com_lock_timeout("ALTER TABLE atletas ADD CONSTRAINT ck_cpf CHECK (cpf ~ '^[0-9]{11}$') NOT VALID")
+    migracoes.validar_constraint("atletas", "ck_cpf")
+    # O COMMIT libera o ACCESS EXCLUSIVE do ALTER antes da varredura
+    assert offline()[-3:] == ["COMMIT", "ALTER TABLE atletas VALIDATE CONSTRAINT ck_cpf", "BEGIN"]
+
+
+class LockNaoDisponivel(Exception):
+    sqlstate = "55P03"
+
+
+class ConexaoOcupada:
+    """Conexão PostgreSQL falsa: o ALTER estoura o lock_timeout nas `falhas` primeiras tentativas."""
+
+    def __init__(self, falhas: int, erro: type[Exception] = LockNaoDisponivel) -> None:
+        self.falhas = falhas
+        self.erro = erro
+        self.alteracoes = 0
+        self.lock_timeout = "30s"
+
+    @contextmanager
+    def begin_nested(self):
+        antes = self.lock_timeout
+        try:
+            yield
+        except DBAPIError:
+            # ROLLBACK TO SAVEPOINT desfaz o SET LOCAL
+            self.lock_timeout = antes
+            raise
+
+    def execute(self, comando, parametros=None):
+        sql = str(comando)
+        if sql.startswith("ALTER"):
+            if self.falhas:
+                self.falhas -= 1
+                raise DBAPIError(sql, {}, self.erro())
+            self.alteracoes += 1
+        elif sql.startswith("SET LOCAL lock_timeout"):
+            self.lock_timeout = sql.split("'")[1]
+        elif sql.startswith("SELECT set_config"):
+            self.lock_timeout = parametros["anterior"]
+        return Resultado(self.lock_timeout)
+
+
+class Resultado:
+    def __init__(self, valor: str) -> None:
+        self.valor = valor
+
+    def scalar_one(self) -> str:
+        return self.valor
+
+
+@pytest.fixture
+def postgres_ocupado(monkeypatch):
+    """Migração online no PostgreSQL (falso); devolve a troca de conexão e as esperas entre tentativas."""
+    monkeypatch.setattr(migracoes, "_postgres", lambda: True)
+    monkeypatch.setattr(migracoes, "_offline", lambda: False)
+    esperas: list[float] = []
+    monkeypatch.setattr(migracoes.time, "sleep", esperas.append)
+
+    def usar(conexao: ConexaoOcupada) -> list[float]:
+        monkeypatch.setattr(migracoes.op, "get_bind", lambda: conexao, raising=False)
+        return esperas
+
+    return usar
+
+
+def test_lock_ocupado_tenta_de_novo_com_espera_crescente(postgres_ocupado):
+    conexao = ConexaoOcupada(falhas=2)
+    esperas = postgres_ocupado(conexao)
+
+    migracoes.ddl_com_lock_timeout("ALTER TABLE atletas ADD COLUMN apelido varchar(30)", espera=1.0)
+    assert conexao.alteracoes == 1
+    assert esperas == [1.0, 2.0]
+    # O RELEASE do savepoint mantém o SET LOCAL: o timeout anterior precisa ser restaurado
+    assert conexao.lock_timeout == "30s"
+
+
+def test_lock_ocupado_desiste_apos_as_tentativas(postgres_ocupado):
+    esperas = postgres_ocupado(ConexaoOcupada(falhas=3))
+
+    with pytest.raises(DBAPIError):
+        migracoes.ddl_com_lock_timeout("ALTER TABLE atletas ADD COLUMN apelido varchar(30)", tentativas=3)
+    assert len(esperas) == 2
+
+
+def test_outro_erro_nao_e_repetido(postgres_ocupado):
+    esperas = postgres_ocupado(ConexaoOcupada(falhas=1, erro=ValueError))
+
+    with pytest.raises(DBAPIError):
+        migracoes.ddl_com_lock_timeout("ALTER TABLE atletas ADD COLUMN apelido varchar(30)")
+    assert esperas == []
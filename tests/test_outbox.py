@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.configs.settings import settings
+from src.core.outbox import Despachante
+from src.models.outbox import OutboxModel
+from tests.conftest import nova_sessao
+
+pytestmark = pytest.mark.anyio
+
+
+class DestinoFalso:
+    """Guarda os lotes recebidos; com `falhas` > 0, recusa esse número de entregas."""
+
+    def __init__(self, falhas: int = 0) -> None:
+        self.falhas = falhas
+        self.lotes: list[list[dict]] = []
+
+    async def enviar(self, eventos: list[dict]) -> None:
+        if self.falhas:
+            self.falhas -= 1
+            raise ConnectionError("destino fora do ar")
+        self.lotes.append(eventos)
+
+    @property
+    def entregues(self) -> list[str]:
+        return [f"{evento['agregado_id']}:{evento['tipo']}" for lote in self.lotes for evento in lote]
+
+
+def novo_despachante(destino: DestinoFalso, **opcoes) -> Despachante:
+    return Despachante(**{
+        "lote": 10, "intervalo": 1.0, "max_tentativas": 3, "espera_base": 1.0, "espera_max": 5.0,
+        "destino": destino, **opcoes,
+    })
+
+
+@pytest.fixture
+def fabrica(transacao):
+    return lambda: nova_sessao(transacao)
+
+
+@pytest.fixture
+def enfileirar(fabrica):
+    """Grava eventos na outbox, na ordem dada; `adiado=True` os deixa para daqui a uma hora."""
+
+    async def gravar(*eventos: str, adiado: bool = False) -> None:
+        proxima = datetime.now(timezone.utc) + timedelta(hours=1 if adiado else -1)
+        async with fabrica() as sessao:
+            for evento in eventos:
+                agregado_id, tipo = evento.split(":")
+                sessao.add(OutboxModel(
+                    agregado="atletas", agregado_id=agregado_id, tipo=tipo,
+                    dados={"id": agregado_id}, proxima_tentativa_em=proxima,
+                ))
+            await sessao.commit()
+
+    return gravar
+
+
+def espera_ate(evento: OutboxModel, antes: datetime) -> timedelta:
+    # O SQLite devolve as datas sem fuso (gravadas em UTC)
+    proxima = evento.proxima_tentativa_em
+    return (proxima if proxima.tzinfo else proxima.replace(tzinfo=timezone.utc)) - antes
+
+
+async def fila(fabrica) -> list[OutboxModel]:
+    async with fabrica() as sessao:
+        return (await sessao.execute(select(OutboxModel).order_by(OutboxModel.pk_id))).scalars().all()
+
+
+async def liberar_adiados(fabrica) -> None:
+    async with fabrica() as sessao:
+        for evento in (await sessao.execute(select(OutboxModel))).scalars():
+            evento.proxima_tentativa_em = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await sessao.commit()
+
+
+# --- GRAVAÇÃO ---
+async def test_evento_gravado_na_transacao_da_alteracao(client, fabrica, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_ATIVO", True)
+    resposta = await client.post(
+        "/centros-treinamento/", json={"nome": "CT Novo", "endereco": "Rua Y", "proprietario": "Ana"}
+    )
+    assert resposta.status_code == 201
+
+    [evento] = await fila(fabrica)
+    assert (evento.agregado, evento.agregado_id, evento.tipo) == ("centros_treinamento", resposta.json()["id"], "criado")
+
+
+# --- ENTREGA EM LOTES ---
+async def test_lote_entregue_e_apagado(fabrica, enfileirar):
+    await enfileirar("a:criado", "b:criado", "c:criado")
+    destino = DestinoFalso()
+    despachante = novo_despachante(destino, lote=2)
+
+    assert await despachante.drenar_lote(fabrica) == 2
+    assert await despachante.drenar_lote(fabrica) == 1
+    assert await despachante.drenar_lote(fabrica) == 0
+    assert destino.entregues == ["a:criado", "b:criado", "c:criado"]
+    assert await fila(fabrica) == []
+    assert despachante.metricas.resumo()["entregues"] == 3
+
+
+async def test_lote_travado_com_skip_locked(fabrica, enfileirar):
+    await enfileirar("a:criado")
+    despachante = novo_despachante(DestinoFalso(), lote=5)
+    consultas = []
+
+    def espionar():
+        sessao = fabrica()
+        executar = sessao.execute
+
+        async def execute(consulta, *args, **kwargs):
+            consultas.append(consulta)
+            return await executar(consulta, *args, **kwargs)
+
+        sessao.execute = execute
+        return sessao
+
+    await despachante.drenar_lote(espionar)
+    # O SQLite ignora o FOR UPDATE: confere o SQL que o PostgreSQL receberia
+    sql = str(consultas[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "LIMIT" in sql
+
+
+# --- ORDEM POR AGREGADO ---
+async def test_evento_espera_os_anteriores_do_mesmo_agregado(fabrica, enfileirar):
+    await enfileirar("a:criado", adiado=True)
+    await enfileirar("a:atualizado", "b:criado")
+    destino = DestinoFalso()
+    despachante = novo_despachante(destino)
+
+    # "a:atualizado" está pronto, mas o "a:criado" anterior ainda não: só o "b" sai
+    assert await despachante.drenar_lote(fabrica) == 1
+    assert destino.entregues == ["b:criado"]
+
+    await liberar_adiados(fabrica)
+    assert await despachante.drenar_lote(fabrica) == 2
+    assert destino.entregues == ["b:criado", "a:criado", "a:atualizado"]
+
+
+# --- FALHAS ---
+async def test_falha_devolve_o_lote_com_espera_exponencial(fabrica, enfileirar):
+    await enfileirar("a:criado")
+    despachante = novo_despachante(DestinoFalso(falhas=2), espera_base=1.0)
+
+    antes = datetime.now(timezone.utc)
+    assert await despachante.drenar_lote(fabrica) == 0
+    [evento] = await fila(fabrica)
+    assert evento.tentativas == 1
+    assert "destino fora do ar" in evento.ultimo_erro
+    espera = espera_ate(evento, antes)
+    assert timedelta(seconds=0.5) < espera <= timedelta(seconds=1.5)
+
+    # Ainda esperando: nada é selecionado
+    assert await despachante.drenar_lote(fabrica) == 0
+    assert (await fila(fabrica))[0].tentativas == 1
+
+    await liberar_adiados(fabrica)
+    antes = datetime.now(timezone.utc)
+    assert await despachante.drenar_lote(fabrica) == 0
+    [evento] = await fila(fabrica)
+    assert evento.tentativas == 2
+    espera = espera_ate(evento, antes)
+    assert timedelta(seconds=1.5) < espera <= timedelta(seconds=2.5)
+    assert despachante.metricas.falhas == 2
+
+
+async def test_espera_limitada_ao_maximo(fabrica, enfileirar):
+    await enfileirar("a:criado")
+    despachante = novo_despachante(DestinoFalso(falhas=5), max_tentativas=10, espera_base=1.0, espera_max=3.0)
+    for _ in range(4):
+        await liberar_adiados(fabrica)
+        antes = datetime.now(timezone.utc)
+        await despachante.drenar_lote(fabrica)
+
+    # Sem o limite, a 4ª espera seria de 8s
+    [evento] = await fila(fabrica)
+    assert timedelta(seconds=2.5) < espera_ate(evento, antes) <= timedelta(seconds=3.5)
+
+
+async def test_esgotado_sai_da_fila_e_libera_os_seguintes(fabrica, enfileirar):
+    await enfileirar("a:criado", "a:atualizado")
+    destino = DestinoFalso(falhas=2)
+    despachante = novo_despachante(destino, max_tentativas=2, lote=1)
+
+    assert await despachante.drenar_lote(fabrica) == 0
+    await liberar_adiados(fabrica)
+    assert await despachante.drenar_lote(fabrica) == 0
+
+    esgotado, seguinte = await fila(fabrica)
+    assert esgotado.tentativas == 2 and esgotado.falhou_em is not None
+    assert seguinte.tentativas == 0
+    assert despachante.metricas.esgotados == 1
+
+    # Fora da fila, o esgotado não segura mais o agregado
+    assert await despachante.drenar_lote(fabrica) == 1
+    assert destino.entregues == ["a:atualizado"]
+    assert [evento.tipo for evento in await fila(fabrica)] == ["criado"]
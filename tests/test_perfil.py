@@ -0,0 +1,128 @@
+import asyncio
+import pstats
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.core.perfil import ArmazenamentoPerfis, PerfilMiddleware
+
+pytestmark = pytest.mark.anyio
+
+TOKEN = "token-perfil"
+
+
+def criar_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/rapido")
+    async def rapido():
+        return {"ok": True}
+
+    @app.get("/lento")
+    async def lento():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    @app.get("/bloqueante")
+    async def bloqueante():
+        # Código síncrono no event loop: é o que o medidor de lag precisa acusar
+        time.sleep(0.05)
+        return {"ok": True}
+
+    return app
+
+
+@pytest.fixture
+def armazenamento(tmp_path) -> ArmazenamentoPerfis:
+    return ArmazenamentoPerfis(str(tmp_path), max_perfis=10)
+
+
+def cliente_para(armazenamento: ArmazenamentoPerfis, **opcoes) -> httpx.AsyncClient:
+    middleware = PerfilMiddleware(criar_app(), armazenamento, **{"token": TOKEN, **opcoes})
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://testes")
+
+
+# --- QUANDO PERFILAR ---
+async def test_sem_cabecalho_nem_amostragem_nao_perfila(armazenamento):
+    async with cliente_para(armazenamento) as cliente:
+        resposta = await cliente.get("/rapido")
+    assert resposta.status_code == 200
+    assert "x-perfil-id" not in resposta.headers
+    assert armazenamento.listar() == []
+
+
+async def test_token_errado_nao_perfila(armazenamento):
+    async with cliente_para(armazenamento) as cliente:
+        resposta = await cliente.get("/rapido", headers={"X-Perfil": "outro-token"})
+    assert "x-perfil-id" not in resposta.headers
+
+
+async def test_cabecalho_com_token_perfila(armazenamento):
+    async with cliente_para(armazenamento) as cliente:
+        resposta = await cliente.get("/rapido?campos=nome", headers={"X-Perfil": TOKEN})
+    assert resposta.status_code == 200
+
+    resumo = armazenamento.resumo(resposta.headers["x-perfil-id"])
+    assert resumo["motivo"] == "cabecalho"
+    assert (resumo["metodo"], resumo["caminho"], resumo["consulta"], resumo["status"]) == (
+        "GET", "/rapido", "campos=nome", 200
+    )
+    assert resumo["funcoes"] and {"funcao", "chamadas", "tempo_acumulado_ms"} <= resumo["funcoes"][0].keys()
+
+    # O .prof abre no pstats
+    caminho = armazenamento.arquivo_pstats(resumo["id"])
+    assert pstats.Stats(str(caminho)).total_calls > 0
+
+
+async def test_amostragem(armazenamento):
+    async with cliente_para(armazenamento, token=None, amostragem=1.0) as cliente:
+        resposta = await cliente.get("/rapido")
+    assert armazenamento.resumo(resposta.headers["x-perfil-id"])["motivo"] == "amostragem"
+
+
+async def test_um_perfil_por_vez(armazenamento):
+    async with cliente_para(armazenamento, amostragem=1.0) as cliente:
+        respostas = await asyncio.gather(cliente.get("/lento"), cliente.get("/lento"))
+    # A segunda chega enquanto a primeira está sendo perfilada: segue sem perfil
+    assert sorted("x-perfil-id" in resposta.headers for resposta in respostas) == [False, True]
+    assert len(armazenamento.listar()) == 1
+
+
+# --- LAG DO EVENT LOOP ---
+async def test_lag_acusa_codigo_bloqueante(armazenamento):
+    async with cliente_para(armazenamento) as cliente:
+        resposta = await cliente.get("/bloqueante", headers={"X-Perfil": TOKEN})
+    lag = armazenamento.resumo(resposta.headers["x-perfil-id"])["lag_event_loop"]
+    assert lag["amostras"] >= 1
+    assert lag["max_ms"] >= 30
+
+
+# --- ANEL EM DISCO ---
+async def test_anel_apaga_os_excedentes(tmp_path):
+    armazenamento = ArmazenamentoPerfis(str(tmp_path), max_perfis=2)
+    async with cliente_para(armazenamento) as cliente:
+        for _ in range(3):
+            await cliente.get("/rapido", headers={"X-Perfil": TOKEN})
+
+    perfis = armazenamento.listar()
+    assert len(perfis) == 2
+    assert all("funcoes" not in perfil for perfil in perfis)
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+
+
+def test_id_invalido_nao_le_fora_do_diretorio(armazenamento):
+    assert armazenamento.resumo("../../etc/passwd") is None
+    assert armazenamento.arquivo_pstats("20300101T000000_zzzzzzzz") is None
+
+
+# --- ROTAS /admin ---
+async def test_rotas_admin_exigem_o_token(client):
+    assert (await client.get("/admin/perfis")).status_code == 403
+    assert (await client.get("/admin/perfis", headers={"X-Admin-Token": "outro"})).status_code == 403
+
+    resposta = await client.get("/admin/perfis", headers={"X-Admin-Token": "token-testes"})
+    assert resposta.status_code == 200
+    resposta = await client.get("/admin/perfis/20300101T000000_zzzzzzzz", headers={"X-Admin-Token": "token-testes"})
+    assert resposta.status_code == 404
@@ -0,0 +1,196 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.controllers import atleta as controller_atletas
+from src.core.shards import Roteador, roteador
+from src.models.atleta import AtletaModel
+from src.models.atleta_registro import AtletaRegistroModel
+from src.models.base import BaseModel
+from src.models.centro_treinamento import CentroTreinamentoModel
+from tests.conftest import dados_atleta, nova_sessao
+
+pytestmark = pytest.mark.anyio
+
+CENTROS = [f"CT {numero}" for numero in range(4)]
+
+
+@pytest.fixture
+async def shards(tmp_path, monkeypatch, transacao):
+    """Dois shards em arquivos SQLite; o banco principal continua sendo o dos testes."""
+    urls = {nome: f"sqlite+aiosqlite:///{tmp_path / nome}.db" for nome in ("a", "b")}
+    for url in urls.values():
+        motor = create_async_engine(url)
+        async with motor.begin() as conexao:
+            await conexao.run_sync(BaseModel.metadata.create_all)
+        await motor.dispose()
+
+    # As rotas usam o roteador global: troca o estado dele só durante o teste
+    for atributo, valor in vars(Roteador(urls, {})).items():
+        monkeypatch.setattr(roteador, atributo, valor)
+    # Banco principal (registro global, sincronização) = transação do teste
+    monkeypatch.setattr(roteador, "fabrica_principal", lambda: lambda: nova_sessao(transacao))
+    yield roteador
+    await roteador.encerrar()
+
+
+async def contar_no_shard(shards, nome: str, modelo) -> int:
+    async with shards.fabrica(nome)() as sessao:
+        return await sessao.scalar(select(func.count()).select_from(modelo))
+
+
+@pytest.fixture
+async def atletas(client, shards) -> list[dict]:
+    await client.post("/categorias/", json={"nome": "Scale"})
+    for posicao, nome in enumerate(CENTROS):
+        resposta = await client.post(
+            "/centros-treinamento/", json={"nome": nome, "endereco": "Rua X", "proprietario": "Marcos"}
+        )
+        # Fixa os CTs (SHARDS_MAPA) alternando entre os shards: o hash de ids aleatórios poderia juntá-los
+        shards.mapa[uuid.UUID(resposta.json()["id"])] = shards.nomes[posicao % len(shards.nomes)]
+
+    criados = []
+    for numero in range(1, 9):
+        resposta = await client.post("/atletas/", json=dados_atleta(numero, centro=CENTROS[numero % 4]))
+        assert resposta.status_code == 201, resposta.text
+        criados.append(resposta.json())
+    return criados
+
+
+async def test_referencias_replicadas_e_atletas_distribuidos(shards, atletas):
+    for nome in shards.nomes:
+        assert await contar_no_shard(shards, nome, CentroTreinamentoModel) == len(CENTROS)
+
+    por_shard = [await contar_no_shard(shards, nome, AtletaModel) for nome in shards.nomes]
+    assert por_shard == [4, 4]
+
+
+async def test_listagem_mesclada_entre_shards(client, atletas):
+    paginas = []
+    for offset in range(0, 9, 3):
+        resposta = await client.get("/atletas/", params={"limit": 3, "offset": offset, "total": "exato"})
+        assert resposta.status_code == 200
+        assert resposta.headers["X-Total-Count"] == "8"
+        paginas.append([atleta["id"] for atleta in resposta.json()])
+
+    # Páginas sem repetições nem lacunas
+    assert [len(pagina) for pagina in paginas] == [3, 3, 2]
+    assert sorted(sum(paginas, [])) == sorted(atleta["id"] for atleta in atletas)
+
+
+async def test_pk_id_unico_entre_shards(client, atletas):
+    # Os pk_id vêm do registro global: a listagem mesclada sai na ordem de cadastro
+    pk_ids = [atleta["pk_id"] for atleta in atletas]
+    assert pk_ids == sorted(set(pk_ids))
+
+    resposta = await client.get("/atletas/", params={"limit": 20})
+    assert [atleta["pk_id"] for atleta in resposta.json()] == pk_ids
+
+
+async def test_busca_em_lote_e_por_id_em_todos_os_shards(client, atletas):
+    ids = [atleta["id"] for atleta in reversed(atletas)]
+    resposta = await client.post("/atletas/batch-get", json={"ids": ids + [str(uuid.uuid4())]})
+    assert [a["id"] for a in resposta.json()] == ids
+
+    resposta = await client.patch(f"/atletas/{atletas[3]['id']}", json={"peso": 80.0})
+    assert resposta.status_code == 200
+    resposta = await client.get(f"/atletas/{atletas[3]['id']}")
+    assert resposta.json()["peso"] == 80.0
+
+
+async def test_cpf_unico_entre_shards(client, atletas):
+    # Mesmo CPF do atleta 1, em um CT de outro shard
+    for centro in CENTROS:
+        resposta = await client.post("/atletas/", json=dados_atleta(1, centro=centro))
+        assert resposta.status_code == 409
+
+
+async def test_cpf_unico_entre_shards_sem_a_checagem_previa(client, atletas, monkeypatch):
+    # Dois cadastros simultâneos passariam juntos pela checagem; o registro global barra o segundo
+    async def nao_encontrado(*_):
+        return False
+
+    monkeypatch.setattr(controller_atletas, "cpf_cadastrado", nao_encontrado)
+    resposta = await client.post("/atletas/", json=dados_atleta(1, centro=CENTROS[2]))
+    assert resposta.status_code == 409
+
+    resposta = await client.patch(f"/atletas/{atletas[3]['id']}", json={"cpf": atletas[0]["cpf"]})
+    assert resposta.status_code == 409
+
+
+async def test_troca_de_cpf_atualiza_o_registro(client, atletas, db_session):
+    resposta = await client.patch(f"/atletas/{atletas[0]['id']}", json={"cpf": dados_atleta(50)["cpf"]})
+    assert resposta.status_code == 200
+
+    # O CPF antigo ficou livre
+    resposta = await client.post("/atletas/", json=dados_atleta(1, centro=CENTROS[2]))
+    assert resposta.status_code == 201
+    assert await db_session.scalar(select(func.count()).select_from(AtletaRegistroModel)) == 9
+
+
+async def test_remocao(client, shards, atletas, db_session):
+    assert (await client.delete(f"/atletas/{atletas[0]['id']}")).status_code == 200
+
+    resposta = await client.get("/atletas/", params={"total": "exato"})
+    assert resposta.headers["X-Total-Count"] == "7"
+    assert sum([await contar_no_shard(shards, nome, AtletaModel) for nome in shards.nomes]) == 7
+    assert await db_session.scalar(select(func.count()).select_from(AtletaRegistroModel)) == 7
+
+
+# --- REPLICAÇÃO E SINCRONIZAÇÃO ---
+async def enderecos_no_shard(shards, nome: str) -> list[str]:
+    async with shards.fabrica(nome)() as sessao:
+        return (await sessao.execute(select(CentroTreinamentoModel.endereco))).scalars().all()
+
+
+async def test_replicacao_que_falhou_e_refeita_na_sincronizacao(client, shards, atletas, monkeypatch, tmp_path):
+    quebrado = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/inexistente/c.db")
+    replicas = shards._replicas()
+    # O shard "a" fora do ar (no lugar dele, um destino que não abre conexão)
+    monkeypatch.setattr(shards, "_replicas", lambda: [replicas[1], sessionmaker(bind=quebrado, class_=AsyncSession)])
+
+    centro = (await client.get("/centros-treinamento/")).json()[0]
+    resposta = await client.patch(f"/centros-treinamento/{centro['id']}", json={"endereco": "Rua Nova"})
+    # O principal confirmou: a resposta não depende dos shards
+    assert resposta.status_code == 200
+    assert shards.sincronizacao_pendente.is_set()
+    assert "Rua Nova" not in await enderecos_no_shard(shards, "a")
+    await quebrado.dispose()
+
+    monkeypatch.setattr(shards, "_replicas", lambda: replicas)
+    shards.sincronizacao_pendente.clear()
+    await shards.sincronizar()
+    assert "Rua Nova" in await enderecos_no_shard(shards, "a")
+    assert not shards.sincronizacao_pendente.is_set()
+
+
+async def test_sincronizacao_completa_os_shards(shards, atletas):
+    async with shards.fabrica("a")() as sessao:
+        # Cópia perdida (ex.: queda do processo entre o commit no principal e a réplica)
+        await sessao.execute(delete(AtletaModel))
+        await sessao.execute(delete(CentroTreinamentoModel).where(CentroTreinamentoModel.nome == CENTROS[1]))
+        await sessao.commit()
+
+    await shards.sincronizar()
+    assert len(await enderecos_no_shard(shards, "a")) == len(CENTROS)
+
+
+async def test_sincronizacao_remove_reservas_orfas(shards, atletas, db_session):
+    antiga = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.add_all([
+        AtletaRegistroModel(cpf=dados_atleta(90)["cpf"], criado_em=antiga),
+        # Recente: o INSERT no shard pode estar em andamento
+        AtletaRegistroModel(cpf=dados_atleta(91)["cpf"]),
+    ])
+    await db_session.commit()
+
+    await shards.sincronizar()
+
+    cpfs = set((await db_session.execute(select(AtletaRegistroModel.cpf))).scalars())
+    assert dados_atleta(90)["cpf"] not in cpfs
+    assert dados_atleta(91)["cpf"] in cpfs
+    assert len(cpfs) == len(atletas) + 1